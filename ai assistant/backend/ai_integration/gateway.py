@@ -0,0 +1,163 @@
+"""
+AI Gateway
+The one place text generation goes through. The Gemini client is configured
+once per process and models are reused across calls, so each generation pays
+only for the request itself, not for client setup (genai.configure() drops the
+library's cached clients and their connections).
+
+    generate(prompt)                        -> text, or AIError
+    generate_for('auto_reply', prompt, ...) -> text, or the purpose's fallback text
+    await generate_async(prompt)            -> generate() off the event loop
+
+Every call gets AI_REQUEST_TIMEOUT and no client-side retries, so a slow or
+failing provider costs one timeout per call at most. Calls also go through the
+'gemini' circuit breaker (core/circuit.py): while it is open, generation fails
+at once and callers use their fallback text.
+"""
+
+import asyncio
+import logging
+import threading
+from django.conf import settings
+from core.circuit import get_breaker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = 'gemini-2.0-flash'
+
+# Generation options and fallback text (formatted with the caller's values) per
+# kind of generated message; a None fallback means no message is sent
+PURPOSES = {
+    'automation': {
+        'max_output_tokens': 200,
+        'temperature': 0.7,
+        'fallback': "Hi {lead_name}, this is a {message_type} message.",
+    },
+    'auto_reply': {
+        'max_output_tokens': 200,
+        'temperature': 0.7,
+        'fallback': "Thank you for your message, {lead_name}. We'll get back to you soon!",
+    },
+    'campaign': {
+        'max_output_tokens': 200,
+        'temperature': 0.7,
+        'fallback': None,
+    },
+}
+
+_configured_key = None
+_models = {}
+_lock = threading.Lock()
+
+
+class AIError(Exception):
+    """Generation failed; the message is fit to show to the user"""
+
+
+def is_configured():
+    return bool(settings.GEMINI_API_KEY)
+
+
+def get_model(name=None):
+    """
+    Process-wide GenerativeModel for a model name (default AI_MODEL)
+
+    The client is (re)configured only when the API key changes.
+    """
+    global _configured_key
+    import google.generativeai as genai
+
+    name = name or getattr(settings, 'AI_MODEL', DEFAULT_MODEL)
+    key = settings.GEMINI_API_KEY
+    model = _models.get(name)
+    if model is not None and key == _configured_key:
+        return model
+    with _lock:
+        if key != _configured_key:
+            genai.configure(api_key=key)
+            _configured_key = key
+            _models.clear()
+        model = _models.get(name)
+        if model is None:
+            model = _models[name] = genai.GenerativeModel(name)
+    return model
+
+
+def _describe_error(error):
+    """User-facing message for a provider error"""
+    error_msg = str(error)
+    error_lower = error_msg.lower()
+    if 'api_key' in error_lower or 'invalid' in error_lower or '401' in error_msg or '403' in error_msg:
+        return "Invalid Gemini API Key\n\nPlease check your API key in the .env file. The key may be incorrect or expired."
+    if 'quota' in error_lower or '429' in error_msg:
+        return "Gemini API Rate Limit Exceeded\n\nPlease wait a few moments and try again."
+    if 'deadline' in error_lower or 'timeout' in error_lower or '504' in error_msg:
+        return "Gemini API timed out\n\nPlease try again."
+    return f"Gemini API error: {error_msg}"
+
+
+def generate(prompt, max_output_tokens=200, temperature=0.7, model=None):
+    """
+    Generate text for a prompt
+
+    Args:
+        prompt: Complete prompt text
+        max_output_tokens: Output length limit
+        temperature: Sampling temperature
+        model: Model name (default AI_MODEL)
+
+    Returns:
+        Generated text
+
+    Raises:
+        AIError: AI is not configured, the breaker is open or the call failed
+    """
+    if not is_configured():
+        raise AIError("Gemini API key not configured")
+
+    breaker = get_breaker('gemini')
+    if not breaker.allow():
+        raise AIError("Gemini API is unavailable\n\nPlease try again in a few moments.")
+
+    try:
+        response = get_model(model).generate_content(
+            prompt,
+            generation_config={'max_output_tokens': max_output_tokens, 'temperature': temperature},
+            request_options={'timeout': getattr(settings, 'AI_REQUEST_TIMEOUT', 20), 'retry': None},
+        )
+        text = response.text
+    except Exception as e:
+        # Bad requests and blocked responses say nothing about the provider's health
+        if not isinstance(e, ValueError):
+            breaker.record_failure()
+        logger.error(f"AI generation failed: {str(e)}")
+        raise AIError(_describe_error(e)) from e
+    breaker.record_success()
+    return text
+
+
+def generate_for(purpose, prompt, **values):
+    """
+    Generate text for one of PURPOSES, falling back to its canned text
+
+    Args:
+        purpose: Key of PURPOSES
+        prompt: Complete prompt text
+        **values: Fields for the fallback text (e.g. lead_name)
+
+    Returns:
+        Generated text, the formatted fallback text, or None if the purpose has none
+    """
+    spec = PURPOSES[purpose]
+    try:
+        return generate(prompt, max_output_tokens=spec['max_output_tokens'], temperature=spec['temperature'])
+    except AIError:
+        if spec['fallback'] is None:
+            return None
+        return spec['fallback'].format(**values)
+
+
+async def generate_async(prompt, **options):
+    """generate() for async code; the blocking call runs in the loop's default executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, lambda: generate(prompt, **options))
@@ -3,7 +3,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
 from datetime import datetime
-from django.conf import settings
+from .gateway import generate, is_configured
 from .models import AgentActivity
 from leads.models import Lead
 
@@ -17,8 +17,7 @@ def generate_ai_response(request):
         return Response({'error': 'Prompt is required'}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        # Initialize Gemini client
-        if not settings.GEMINI_API_KEY:
+        if not is_configured():
             return Response({'error': 'Gemini API key not configured'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         # Get conversation history if provided
@@ -33,71 +32,30 @@ def generate_ai_response(request):
             if lead_email:
                 lead_info += f" ({lead_email})"
         
-        # Call Google Gemini API
-        import google.generativeai as genai
+        system_message = "You are an AI assistant helping to write professional, warm, and personalized messages for a coaching/consulting business. Respond naturally to what the user is asking, based on the conversation context. Generate appropriate messages directly without asking for more information."
         
-        try:
-            # Configure Gemini
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            
-            # Use Gemini 2.0 Flash model (fast and efficient)
-            # Alternative: 'gemini-2.5-flash', 'gemini-2.0-flash-lite', 'gemini-pro-latest'
-            model = genai.GenerativeModel('gemini-2.0-flash')
-            
-            # Build conversation context for Gemini
-            chat_history = []
-            
-            # Add system instruction
-            system_message = "You are an AI assistant helping to write professional, warm, and personalized messages for a coaching/consulting business. Respond naturally to what the user is asking, based on the conversation context. Generate appropriate messages directly without asking for more information."
-            
-            if lead_info:
-                system_message += f" {lead_info}."
-            
-            # Add conversation history if available
-            if conversation_history:
-                for msg in conversation_history[-6:]:  # Last 6 messages for context
-                    role = msg.get('role', 'user')
-                    content = msg.get('content', '')
-                    if role == 'user':
-                        chat_history.append(f"User: {content}")
-                    elif role == 'assistant':
-                        chat_history.append(f"Assistant: {content}")
-            
-            # Build the complete prompt
-            if chat_history:
-                history_text = "\n".join(chat_history)
-                complete_prompt = f"{system_message}\n\nConversation history:\n{history_text}\n\nUser: {prompt}\n\nAssistant:"
-            else:
-                complete_prompt = f"{system_message}\n\nUser: {prompt}\n\nAssistant:"
-            
-            print(f"\n[Gemini] Generating response with conversation context...")
-            print(f"[Gemini] Prompt: {prompt[:100]}...")
-            
-            # Generate response
-            response = model.generate_content(
-                complete_prompt,
-                generation_config={
-                    'max_output_tokens': 500,
-                    'temperature': 0.7,
-                }
-            )
-            
-            ai_response = response.text
-            print(f"[Gemini] SUCCESS! Response generated")
-
-        except Exception as gemini_error:
-            # Log the error for debugging
-            error_msg = str(gemini_error)
-            print(f"\n[Gemini Error] {error_msg}")
-            
-            # Provide user-friendly error messages
-            error_lower = error_msg.lower()
-            if 'api_key' in error_lower or 'invalid' in error_lower or '401' in error_msg or '403' in error_msg:
-                raise Exception("Invalid Gemini API Key\n\nPlease check your API key in the .env file. The key may be incorrect or expired.")
-            elif 'quota' in error_lower or '429' in error_msg:
-                raise Exception("Gemini API Rate Limit Exceeded\n\nPlease wait a few moments and try again.")
-            else:
-                raise Exception(f"Gemini API error: {error_msg}")
+        if lead_info:
+            system_message += f" {lead_info}."
+        
+        # Add conversation history if available
+        chat_history = []
+        if conversation_history:
+            for msg in conversation_history[-6:]:  # Last 6 messages for context
+                role = msg.get('role', 'user')
+                content = msg.get('content', '')
+                if role == 'user':
+                    chat_history.append(f"User: {content}")
+                elif role == 'assistant':
+                    chat_history.append(f"Assistant: {content}")
+        
+        # Build the complete prompt
+        if chat_history:
+            history_text = "\n".join(chat_history)
+            complete_prompt = f"{system_message}\n\nConversation history:\n{history_text}\n\nUser: {prompt}\n\nAssistant:"
+        else:
+            complete_prompt = f"{system_message}\n\nUser: {prompt}\n\nAssistant:"
+        
+        ai_response = generate(complete_prompt, max_output_tokens=500, temperature=0.7)
 
         # Log the activity
         lead_id = context.get('lead', {}).get('id')
@@ -123,7 +81,6 @@ def generate_ai_response(request):
 
 @api_view(['GET'])
 def get_agent_activity(request):
-    # Avoid select_related to prevent recursion issues with Python 3.13
     activities = AgentActivity.objects.filter(user=request.user).order_by('-timestamp')
 
     # Apply filters
@@ -154,7 +111,7 @@ def get_agent_activity(request):
         type = serializers.CharField()
         description = serializers.CharField()
         channel = serializers.CharField(allow_null=True)
-        leadId = serializers.IntegerField(source='lead.id', allow_null=True)
+        leadId = serializers.IntegerField(source='lead_id', allow_null=True)
         timestamp = serializers.DateTimeField()
         details = serializers.JSONField(allow_null=True)
     
@@ -1,5 +1,27 @@
 from django.contrib import admin
-from .models import Automation
+from .models import Automation, AutomationJob, ScheduledExecution, AutomationExecution
 
 admin.site.register(Automation)
 
+
+@admin.register(AutomationJob)
+class AutomationJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'lane', 'trigger', 'status', 'attempts', 'user', 'run_at', 'locked_by', 'created_at']
+    list_filter = ['lane', 'kind', 'status', 'trigger']
+    search_fields = ['user__email', 'last_error']
+    readonly_fields = ['created_at', 'updated_at', 'completed_at']
+
+
+@admin.register(ScheduledExecution)
+class ScheduledExecutionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'automation', 'lead', 'trigger', 'status', 'attempts', 'due_at', 'dispatched_at']
+    list_filter = ['status', 'trigger']
+    search_fields = ['user__email', 'lead__name', 'automation__name']
+    readonly_fields = ['created_at', 'dispatched_at']
+
+
+@admin.register(AutomationExecution)
+class AutomationExecutionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'automation', 'lead', 'event_key', 'created_at']
+    search_fields = ['event_key', 'lead__name', 'automation__name']
+    readonly_fields = ['created_at']
@@ -0,0 +1,112 @@
+"""
+Scheduled Execution Dispatcher
+Runs delayed automations at their due time.
+
+Only rows with `due_at <= now()` are read, via the (status, due_at) index, so each
+tick costs the same no matter how many leads or future executions exist.
+
+Rows are claimed with a visibility timeout (as in jobs.py) and marked dispatched
+only after their batch has run, so an execution whose dispatcher dies mid-run
+is claimed again instead of being lost.
+"""
+
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def claim_due_executions(batch_size, visibility_timeout=None):
+    """
+    Claim up to `batch_size` due executions and mark them running
+
+    Due means pending with `due_at` passed, or running with an expired visibility
+    timeout (the previous dispatcher died). Rows locked by a concurrent dispatcher
+    are skipped.
+    """
+    from .models import ScheduledExecution
+
+    if visibility_timeout is None:
+        visibility_timeout = getattr(settings, 'AUTOMATION_DISPATCH_VISIBILITY_TIMEOUT', 300)
+
+    now = timezone.now()
+    due = Q(status='pending', due_at__lte=now) | Q(status='running', locked_until__lt=now)
+    with transaction.atomic():
+        executions = list(
+            ScheduledExecution.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('user', 'automation', 'lead')
+            .filter(due)
+            .order_by('due_at')[:batch_size]
+        )
+        if not executions:
+            return []
+
+        # Executions whose dispatcher died on the last allowed attempt are not retried again
+        max_attempts = getattr(settings, 'AUTOMATION_DISPATCH_MAX_ATTEMPTS', 3)
+        exhausted = [execution.id for execution in executions if execution.attempts >= max_attempts]
+        if exhausted:
+            ScheduledExecution.objects.filter(id__in=exhausted).update(status='failed', locked_until=None)
+            executions = [execution for execution in executions if execution.id not in exhausted]
+
+        locked_until = now + timedelta(seconds=visibility_timeout)
+        ScheduledExecution.objects.filter(id__in=[execution.id for execution in executions]).update(
+            status='running',
+            attempts=F('attempts') + 1,
+            locked_until=locked_until,
+        )
+    return executions
+
+
+def complete_executions(executions):
+    """Mark claimed executions dispatched"""
+    from .models import ScheduledExecution
+
+    ScheduledExecution.objects.filter(id__in=[execution.id for execution in executions]).update(
+        status='dispatched',
+        dispatched_at=timezone.now(),
+        locked_until=None,
+    )
+
+
+def dispatch_due_executions(batch_size=None):
+    """
+    Execute every scheduled automation whose due time has passed
+
+    Returns:
+        Number of automations executed
+    """
+    from .jobs import deserialize_context
+    from .pipeline import AutomationPipeline
+    from .services import AutomationExecutor
+
+    batch_size = batch_size or getattr(settings, 'AUTOMATION_DISPATCH_BATCH_SIZE', 200)
+    executed_count = 0
+
+    while True:
+        executions = claim_due_executions(batch_size)
+        executors = []
+        for execution in executions:
+            context = deserialize_context(execution.user, execution.payload)
+            if context is None:
+                continue
+            context['lead'] = execution.lead
+            context['scheduled'] = True
+            executors.append(AutomationExecutor(execution.automation, context))
+
+        try:
+            executed_count += len(AutomationPipeline().run(executors))
+        except Exception as e:
+            # Left running; claimed again when the visibility timeout passes
+            logger.error(f"Error dispatching scheduled executions: {str(e)}")
+        else:
+            complete_executions(executions)
+
+        if len(executions) < batch_size:
+            break
+
+    logger.info(f"Dispatched {executed_count} scheduled executions")
+    return executed_count
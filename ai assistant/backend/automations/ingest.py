@@ -0,0 +1,177 @@
+"""
+Bulk Ingest Mode
+Defers Lead/Booking signal side effects during imports and CRM syncs.
+
+Inside `bulk_ingest()`, the post_save receivers record what happened (new leads,
+lead status changes, new bookings, booking status changes) instead of enqueueing
+one job per row and pushing each new booking to the calendar. On exit the recorded
+events are enqueued as one 'batch' AutomationJob per user, which the worker runs
+through the automation pipeline in chunks.
+
+    with bulk_ingest():
+        for row in rows:
+            Lead.objects.create(...)
+"""
+
+import contextvars
+import logging
+from contextlib import contextmanager
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_current_batch = contextvars.ContextVar('automation_ingest_batch', default=None)
+
+
+class IngestBatch:
+    """Signal events recorded during a bulk ingest, per user"""
+
+    def __init__(self):
+        self.events = {}
+
+    def _events_for(self, user_id):
+        if user_id not in self.events:
+            self.events[user_id] = {
+                'new_lead_ids': [],
+                'lead_status_changes': [],
+                'new_booking_ids': [],
+                'booking_status_changes': [],
+            }
+        return self.events[user_id]
+
+    def lead_created(self, lead):
+        self._events_for(lead.user_id)['new_lead_ids'].append(lead.pk)
+
+    def lead_status_changed(self, lead, old_status):
+        self._events_for(lead.user_id)['lead_status_changes'].append(
+            [lead.pk, old_status, lead.status, lead.updated_at.isoformat()]
+        )
+
+    def booking_created(self, booking):
+        self._events_for(booking.user_id)['new_booking_ids'].append(booking.pk)
+
+    def booking_status_changed(self, booking):
+        self._events_for(booking.user_id)['booking_status_changes'].append([booking.pk, booking.status])
+
+    def enqueue(self):
+        """Enqueue one batch job per user with recorded events"""
+        from accounts.models import User
+        from .jobs import enqueue_job
+
+        users = User.objects.in_bulk([user_id for user_id, events in self.events.items() if any(events.values())])
+        return [
+            enqueue_job('', dict(self.events[user_id], user=user), kind='batch')
+            for user_id, user in users.items()
+        ]
+
+
+def current_ingest():
+    """The active IngestBatch, or None outside bulk_ingest()"""
+    return _current_batch.get()
+
+
+@contextmanager
+def bulk_ingest():
+    """
+    Defer Lead/Booking signal side effects until the block exits
+
+    Nested blocks share the outermost batch. Events are enqueued even if the block
+    raises, since rows written before the error are already saved; inside a
+    transaction that rolls back, the enqueued jobs roll back with them. If that
+    enqueue fails too, the failure is logged and the block's own error propagates.
+    """
+    if _current_batch.get() is not None:
+        yield _current_batch.get()
+        return
+
+    batch = IngestBatch()
+    token = _current_batch.set(batch)
+    completed = False
+    try:
+        yield batch
+        completed = True
+    finally:
+        _current_batch.reset(token)
+        if completed:
+            jobs = batch.enqueue()
+            logger.info(f"Bulk ingest finished, enqueued {len(jobs)} batch jobs")
+        else:
+            try:
+                jobs = batch.enqueue()
+                logger.info(f"Bulk ingest failed, enqueued {len(jobs)} batch jobs for the rows already saved")
+            except Exception as e:
+                logger.error(f"Bulk ingest failed and its batch jobs could not be enqueued: {str(e)}")
+
+
+def run_ingest_batch(context, chunk_size=None):
+    """
+    Process a 'batch' job: calendar pushes and automations for all recorded events
+
+    Returns:
+        Number of automations executed
+    """
+    from leads.models import Lead
+    from bookings.models import Booking
+    from bookings.signals import BOOKING_STATUS_TRIGGERS, add_booking_to_calendar
+    from .jobs import heartbeat
+    from .pipeline import AutomationPipeline
+    from .rules import get_automation_rules
+    from .services import AutomationExecutor
+
+    user = context['user']
+    chunk_size = chunk_size or getattr(settings, 'AUTOMATION_SCAN_CHUNK_SIZE', 500)
+
+    lead_ids = set(context.get('new_lead_ids', []))
+    lead_ids.update(change[0] for change in context.get('lead_status_changes', []))
+    leads = Lead.objects.in_bulk(lead_ids)
+
+    booking_ids = set(context.get('new_booking_ids', []))
+    booking_ids.update(change[0] for change in context.get('booking_status_changes', []))
+    bookings = Booking.objects.select_related('lead').in_bulk(booking_ids)
+
+    # (trigger, context) pairs; rows deleted since the ingest are skipped
+    events = []
+    for lead_id in context.get('new_lead_ids', []):
+        if lead_id in leads:
+            events.append(('new_lead', {'user': user, 'lead': leads[lead_id]}))
+    for lead_id, old_status, new_status, changed_at in context.get('lead_status_changes', []):
+        if lead_id in leads:
+            events.append(('lead_status_changed', {
+                'user': user,
+                'lead': leads[lead_id],
+                'old_status': old_status,
+                'new_status': new_status,
+                'changed_at': changed_at,
+            }))
+
+    new_bookings = [bookings[booking_id] for booking_id in context.get('new_booking_ids', []) if booking_id in bookings]
+    for booking in new_bookings:
+        events.append(('booking_created', {'user': user, 'lead': booking.lead, 'booking': booking}))
+    for booking_id, status in context.get('booking_status_changes', []):
+        if booking_id in bookings:
+            booking = bookings[booking_id]
+            for trigger in BOOKING_STATUS_TRIGGERS.get(status, ()):
+                events.append((trigger, {'user': user, 'lead': booking.lead, 'booking': booking}))
+
+    if new_bookings:
+        from calendar_integration.services import CalendarService
+        calendar = CalendarService(user, provider='google')
+        for booking in new_bookings:
+            heartbeat()
+            add_booking_to_calendar(booking, calendar)
+
+    rules = {}
+    executors = []
+    for trigger, event_context in events:
+        if trigger not in rules:
+            rules[trigger] = get_automation_rules(user, trigger)
+        for automation in rules[trigger]:
+            executors.append(AutomationExecutor(automation, event_context))
+
+    executed_count = 0
+    for start in range(0, len(executors), chunk_size):
+        heartbeat()
+        executed_count += len(AutomationPipeline().run(executors[start:start + chunk_size]))
+
+    logger.info(f"Ingest batch for user {user.id}: {len(events)} events, {executed_count} automations executed")
+    return executed_count
@@ -0,0 +1,396 @@
+"""
+Automation Job Queue
+Durable, database-backed queue so that signals only enqueue work and
+separate worker processes (`manage.py run_automation_worker`) run it.
+
+Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+worker processes can run side by side without double-processing a job.
+A claimed job carries a visibility timeout (`locked_until`); if the worker
+dies mid-job, the job becomes claimable again once the timeout passes.
+
+Jobs run in one of two lanes. The interactive lane (inbound auto-replies,
+event-driven triggers) and the bulk lane (scheduled scan chunks, bulk imports,
+campaigns) are claimed by separate worker threads, so a large bulk run never
+delays replies.
+"""
+
+import contextvars
+import logging
+import random
+import socket
+import os
+from datetime import timedelta
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Context keys holding model instances, serialized as `<key>_id`
+CONTEXT_MODELS = {
+    'lead': ('leads', 'Lead'),
+    'booking': ('bookings', 'Booking'),
+    'message': ('user_messages', 'Message'),
+    'campaign': ('campaigns', 'Campaign'),
+}
+
+# Job kinds processed in the bulk lane; everything else is interactive
+BULK_KINDS = {'batch', 'scan', 'campaign'}
+
+# (job, visibility timeout) of the job running in this thread, for heartbeat()
+_running_job = contextvars.ContextVar('running_automation_job', default=None)
+
+
+class JobLost(Exception):
+    """The running job was claimed by another worker after its visibility timeout passed"""
+
+
+def default_worker_id():
+    """Identify a worker process as host:pid"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def serialize_context(context):
+    """
+    Convert a trigger context into a JSON-safe payload
+
+    Model instances are stored by primary key; plain values are kept as-is.
+    The user is stored on the job itself, so it is not part of the payload.
+    """
+    payload = {}
+    for key, value in (context or {}).items():
+        if key == 'user':
+            continue
+        if isinstance(value, models.Model):
+            payload[f'{key}_id'] = value.pk
+        else:
+            payload[key] = value
+    return payload
+
+
+def deserialize_context(user, payload):
+    """
+    Rebuild a trigger context from a job payload
+
+    Returns None if a referenced object no longer exists (e.g. the lead was deleted
+    before the job ran), in which case the job has nothing left to do.
+    """
+    from django.apps import apps
+
+    context = {'user': user}
+    for key, value in (payload or {}).items():
+        name = key[:-3] if key.endswith('_id') else None
+        if name in CONTEXT_MODELS:
+            model = apps.get_model(*CONTEXT_MODELS[name])
+            instance = model.objects.filter(pk=value).first()
+            if instance is None:
+                logger.info(f"{model.__name__} {value} no longer exists, skipping job")
+                return None
+            context[name] = instance
+        else:
+            context[key] = value
+    return context
+
+
+def enqueue_job(trigger_type, context, kind='trigger', run_at=None, lane=None, dedupe_key=''):
+    """
+    Add a job to the automation queue
+
+    Args:
+        trigger_type: One of Automation.TRIGGER_CHOICES (or '' for non-trigger jobs)
+        context: Trigger context; 'user' may be omitted for jobs spanning several users
+        kind: One of AutomationJob.KIND_CHOICES
+        run_at: Earliest time the job may run (defaults to now)
+        lane: 'interactive' or 'bulk' (defaults by kind, see BULK_KINDS)
+        dedupe_key: Key under which later debounce_job() calls merge into this job
+
+    Returns:
+        AutomationJob instance
+    """
+    from .models import AutomationJob
+
+    job = AutomationJob.objects.create(
+        user=context.get('user'),
+        kind=kind,
+        lane=lane or ('bulk' if kind in BULK_KINDS else 'interactive'),
+        trigger=trigger_type or '',
+        payload=serialize_context(context),
+        dedupe_key=dedupe_key,
+        max_attempts=getattr(settings, 'AUTOMATION_JOB_MAX_ATTEMPTS', 5),
+        run_at=run_at or timezone.now(),
+    )
+    logger.info(f"Enqueued automation job {job.id} ({kind}:{trigger_type})")
+    return job
+
+
+def enqueue_jobs(trigger_type, contexts, kind='trigger', lane=None):
+    """
+    Add several jobs of one kind to the queue with a single insert
+
+    Args:
+        trigger_type: As for enqueue_job
+        contexts: One context per job
+        kind: One of AutomationJob.KIND_CHOICES
+        lane: 'interactive' or 'bulk' (defaults by kind, see BULK_KINDS)
+
+    Returns:
+        List of AutomationJob instances
+    """
+    from .models import AutomationJob
+
+    now = timezone.now()
+    max_attempts = getattr(settings, 'AUTOMATION_JOB_MAX_ATTEMPTS', 5)
+    jobs = AutomationJob.objects.bulk_create([
+        AutomationJob(
+            user=context.get('user'),
+            kind=kind,
+            lane=lane or ('bulk' if kind in BULK_KINDS else 'interactive'),
+            trigger=trigger_type or '',
+            payload=serialize_context(context),
+            max_attempts=max_attempts,
+            run_at=now,
+        )
+        for context in contexts
+    ])
+    logger.info(f"Enqueued {len(jobs)} automation jobs ({kind}:{trigger_type})")
+    return jobs
+
+
+def debounce_job(context, kind, dedupe_key, delay, max_delay):
+    """
+    Enqueue a job that runs once calls with the same key stop coming in
+
+    A pending job with the same key takes over the new context and is pushed back
+    to `delay` seconds from now, but never past `max_delay` seconds after it was
+    first enqueued, so a steady stream of calls still gets processed. Jobs already
+    running are left alone; a new pending job is created instead.
+
+    Args:
+        context: Job context (replaces the pending job's context)
+        kind: One of AutomationJob.KIND_CHOICES
+        dedupe_key: Identifies the jobs that merge, e.g. 'auto_reply:<lead>:<channel>'
+        delay: Seconds of quiet before the job runs
+        max_delay: Longest the job may be postponed, in seconds
+
+    Returns:
+        AutomationJob instance
+    """
+    from .models import AutomationJob
+
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            AutomationJob.objects.select_for_update()
+            .filter(dedupe_key=dedupe_key, status='pending')
+            .order_by('id')
+            .first()
+        )
+        if job is not None:
+            job.payload = serialize_context(context)
+            job.run_at = min(now + timedelta(seconds=delay), job.created_at + timedelta(seconds=max_delay))
+            job.save(update_fields=['payload', 'run_at', 'updated_at'])
+            logger.info(f"Debounced automation job {job.id} ({dedupe_key}) to {job.run_at:%H:%M:%S}")
+            return job
+
+    # Two callers racing here may both create a job; the handler must tolerate that
+    # (auto-replies check whether the burst is still unanswered)
+    return enqueue_job('', context, kind=kind, run_at=now + timedelta(seconds=delay), dedupe_key=dedupe_key)
+
+
+def _visibility_timeout(lane):
+    if lane == 'bulk':
+        return getattr(settings, 'AUTOMATION_BULK_VISIBILITY_TIMEOUT', 1800)
+    return getattr(settings, 'AUTOMATION_JOB_VISIBILITY_TIMEOUT', 300)
+
+
+def claim_jobs(worker_id, batch_size=10, visibility_timeout=None, lane=None):
+    """
+    Claim up to `batch_size` runnable jobs for this worker
+
+    Runnable means pending and due, or running with an expired visibility timeout
+    (the previous worker died). Rows locked by other workers are skipped.
+    With `lane`, only jobs in that lane are claimed.
+    """
+    from .models import AutomationJob
+
+    if visibility_timeout is None:
+        visibility_timeout = _visibility_timeout(lane)
+
+    now = timezone.now()
+    runnable = Q(status='pending', run_at__lte=now) | Q(status='running', locked_until__lt=now)
+    if lane:
+        runnable &= Q(lane=lane)
+
+    with transaction.atomic():
+        jobs = list(
+            AutomationJob.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('user')
+            .filter(runnable)
+            .order_by('run_at', 'id')[:batch_size]
+        )
+        if not jobs:
+            return []
+
+        # Jobs whose worker died on the last allowed attempt are not retried again
+        exhausted = [job.id for job in jobs if job.attempts >= job.max_attempts]
+        if exhausted:
+            AutomationJob.objects.filter(id__in=exhausted).update(
+                status='failed',
+                last_error='Visibility timeout expired on final attempt',
+                locked_until=None,
+                completed_at=now,
+                updated_at=now,
+            )
+            jobs = [job for job in jobs if job.id not in exhausted]
+
+        locked_until = now + timedelta(seconds=visibility_timeout)
+        AutomationJob.objects.filter(id__in=[job.id for job in jobs]).update(
+            status='running',
+            attempts=F('attempts') + 1,
+            locked_by=worker_id,
+            locked_until=locked_until,
+            updated_at=now,
+        )
+
+    for job in jobs:
+        job.status = 'running'
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.locked_until = locked_until
+    return jobs
+
+
+def renew_job(job, visibility_timeout):
+    """
+    Push a claimed job's visibility timeout forward
+
+    Returns:
+        False if the job is no longer this worker's (it was claimed again after
+        its timeout passed), True otherwise
+    """
+    from .models import AutomationJob
+
+    now = timezone.now()
+    locked_until = now + timedelta(seconds=visibility_timeout)
+    renewed = AutomationJob.objects.filter(id=job.id, status='running', locked_by=job.locked_by).update(
+        locked_until=locked_until,
+        updated_at=now,
+    )
+    if not renewed:
+        logger.warning(f"Automation job {job.id} was claimed by another worker, skipping it")
+        return False
+    job.locked_until = locked_until
+    return True
+
+
+def heartbeat():
+    """
+    Keep the running job's claim alive between chunks of long work
+
+    Renews the lock once less than half of the visibility timeout is left;
+    outside a job it does nothing.
+
+    Raises:
+        JobLost: Another worker has taken the job over; stop working on it
+    """
+    running = _running_job.get()
+    if running is None:
+        return
+    job, visibility_timeout = running
+    if job.locked_until - timezone.now() > timedelta(seconds=visibility_timeout / 2):
+        return
+    if not renew_job(job, visibility_timeout):
+        raise JobLost(f"Automation job {job.id} was claimed by another worker")
+
+
+def run_job(job):
+    """Execute a claimed job"""
+    context = deserialize_context(job.user, job.payload)
+    if context is None:
+        return
+
+    if job.kind == 'auto_reply':
+        from messages.services import process_inbound_message
+        process_inbound_message(context['message'])
+    elif job.kind == 'trigger':
+        from .services import trigger_automations
+        trigger_automations(job.trigger, context)
+    elif job.kind == 'batch':
+        from .ingest import run_ingest_batch
+        run_ingest_batch(context)
+    elif job.kind == 'scan':
+        from .scanner import ScheduledScanner
+        ScheduledScanner().execute_chunk(job.trigger, [tuple(pair) for pair in context['pairs']])
+    elif job.kind == 'campaign':
+        from campaigns.services import run_campaign
+        run_campaign(context['campaign'])
+    else:
+        raise ValueError(f"Unknown automation job kind: {job.kind}")
+
+
+def complete_job(job):
+    """Mark a job as done"""
+    from .models import AutomationJob
+
+    now = timezone.now()
+    AutomationJob.objects.filter(id=job.id, locked_by=job.locked_by).update(
+        status='done',
+        locked_until=None,
+        completed_at=now,
+        updated_at=now,
+    )
+
+
+def fail_job(job, error):
+    """Record a failed attempt; reschedule with exponential backoff or give up"""
+    from .models import AutomationJob
+
+    now = timezone.now()
+    updates = {'last_error': str(error)[:2000], 'locked_until': None, 'updated_at': now}
+
+    if job.attempts >= job.max_attempts:
+        updates.update(status='failed', completed_at=now)
+        logger.error(f"Automation job {job.id} failed permanently after {job.attempts} attempts: {error}")
+    else:
+        base_delay = getattr(settings, 'AUTOMATION_JOB_RETRY_DELAY', 30)
+        delay = base_delay * (2 ** (job.attempts - 1))
+        delay = delay / 2 + random.uniform(0, delay / 2)  # jitter
+        updates.update(status='pending', run_at=now + timedelta(seconds=delay))
+        logger.warning(f"Automation job {job.id} attempt {job.attempts} failed, retrying in {delay:.0f}s: {error}")
+
+    AutomationJob.objects.filter(id=job.id, locked_by=job.locked_by).update(**updates)
+
+
+def process_jobs(worker_id, batch_size=10, visibility_timeout=None, lane=None):
+    """
+    Claim and run one batch of jobs
+
+    The jobs run one after another, so each has its visibility timeout renewed
+    just before it starts; a job that was handed to another worker in the
+    meantime is skipped. Bulk jobs run long, so the bulk lane claims one at a
+    time and renews the claim while it runs (see heartbeat).
+
+    Returns:
+        Number of jobs claimed
+    """
+    if visibility_timeout is None:
+        visibility_timeout = _visibility_timeout(lane)
+    if lane == 'bulk':
+        batch_size = 1
+    jobs = claim_jobs(worker_id, batch_size=batch_size, visibility_timeout=visibility_timeout, lane=lane)
+    for index, job in enumerate(jobs):
+        if index and not renew_job(job, visibility_timeout):
+            continue
+        token = _running_job.set((job, visibility_timeout))
+        try:
+            run_job(job)
+        except JobLost as e:
+            logger.warning(f"{str(e)}, stopping it")
+        except Exception as e:
+            fail_job(job, e)
+        else:
+            complete_job(job)
+        finally:
+            _running_job.reset(token)
+    return len(jobs)
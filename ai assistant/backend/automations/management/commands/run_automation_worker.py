@@ -0,0 +1,145 @@
+"""
+Management command to run an automation worker
+Claims queued automation jobs and executes them outside the request cycle.
+Run several processes (on one or more nodes) to scale sending horizontally.
+
+Each lane gets its own pool of worker threads: interactive threads (inbound
+auto-replies, event triggers) never pick up bulk jobs (scheduled scan chunks,
+imports), so replies keep flowing while a large bulk run drains.
+
+Usage:
+    python manage.py run_automation_worker
+    python manage.py run_automation_worker --interactive-concurrency 8 --bulk-concurrency 2
+    python manage.py run_automation_worker --lane bulk
+    python manage.py run_automation_worker --once
+"""
+
+import signal
+import threading
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from automations.jobs import process_jobs, default_worker_id
+from messaging.smtp import close_pooled_connection
+
+
+class Command(BaseCommand):
+    help = 'Process queued automation jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'AUTOMATION_JOB_BATCH_SIZE', 10),
+            help='Number of interactive jobs to claim at a time (default: 10); bulk threads claim one'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=getattr(settings, 'AUTOMATION_JOB_POLL_INTERVAL', 1.0),
+            help='Seconds to sleep when the queue is empty (default: 1.0)'
+        )
+        parser.add_argument(
+            '--visibility-timeout',
+            type=int,
+            default=None,
+            help='Seconds before a claimed job is handed to another worker '
+                 '(default: AUTOMATION_JOB_VISIBILITY_TIMEOUT / AUTOMATION_BULK_VISIBILITY_TIMEOUT)'
+        )
+        parser.add_argument(
+            '--worker-id',
+            type=str,
+            default=None,
+            help='Worker identifier recorded on claimed jobs (default: host:pid)'
+        )
+        parser.add_argument(
+            '--lane',
+            choices=['all', 'interactive', 'bulk'],
+            default='all',
+            help='Lane(s) this process serves (default: all)'
+        )
+        parser.add_argument(
+            '--interactive-concurrency',
+            type=int,
+            default=getattr(settings, 'AUTOMATION_INTERACTIVE_CONCURRENCY', 4),
+            help='Worker threads for the interactive lane (default: 4)'
+        )
+        parser.add_argument(
+            '--bulk-concurrency',
+            type=int,
+            default=getattr(settings, 'AUTOMATION_BULK_CONCURRENCY', 1),
+            help='Worker threads for the bulk lane (default: 1)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process a single batch per thread and exit'
+        )
+
+    def handle(self, *args, **options):
+        worker_id = options['worker_id'] or default_worker_id()
+        self.stopping = threading.Event()
+        self.processed = 0
+        self.processed_lock = threading.Lock()
+
+        def request_stop(signum, frame):
+            self.stdout.write('Stop requested, finishing current batch...')
+            self.stopping.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        concurrency = {
+            'interactive': options['interactive_concurrency'],
+            'bulk': options['bulk_concurrency'],
+        }
+        lanes = ['interactive', 'bulk'] if options['lane'] == 'all' else [options['lane']]
+
+        threads = []
+        for lane in lanes:
+            for index in range(concurrency[lane]):
+                thread = threading.Thread(
+                    target=self.work,
+                    args=(f'{worker_id}:{lane}:{index}', lane, options),
+                    name=f'automation-{lane}-{index}',
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+
+        self.stdout.write(
+            f'Automation worker {worker_id} started ('
+            + ', '.join(f'{lane}: {concurrency[lane]} threads' for lane in lanes) + ')'
+        )
+
+        # Signals are delivered to the main thread; wait with a timeout so it keeps handling them
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Automation worker {worker_id} stopped after {self.processed} jobs')
+        )
+
+    def work(self, worker_id, lane, options):
+        """Claim-and-run loop for one thread of one lane"""
+        batch_size = options['batch_size'] if lane == 'interactive' else 1
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                claimed = process_jobs(
+                    worker_id,
+                    batch_size=batch_size,
+                    visibility_timeout=options['visibility_timeout'],
+                    lane=lane,
+                )
+                with self.processed_lock:
+                    self.processed += claimed
+
+                if options['once']:
+                    break
+                if not claimed:
+                    self.stopping.wait(options['poll_interval'])
+        finally:
+            close_pooled_connection()
+            connection.close()
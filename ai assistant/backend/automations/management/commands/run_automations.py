@@ -1,22 +1,94 @@
 """
 Management command to check and execute scheduled automations
-Run this periodically (e.g., via cron) to execute delayed automations
+Run this periodically (e.g., via cron) to execute delayed automations,
+or as a long-running daemon on every app node (only the elected leader scans)
 
 Usage:
     python manage.py run_automations
+    python manage.py run_automations --daemon --interval 15
 """
 
+import signal
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from automations.services import check_scheduled_automations
+from automations.scheduler import AutomationScheduler
 
 
 class Command(BaseCommand):
     help = 'Check and execute scheduled automations'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Number of due pairs to execute per batch (default: AUTOMATION_SCAN_CHUNK_SIZE)'
+        )
+        parser.add_argument(
+            '--inline',
+            action='store_true',
+            help='Execute due automations in this process instead of queueing them for bulk-lane workers'
+        )
+        parser.add_argument(
+            '--daemon',
+            action='store_true',
+            help='Keep running, scanning every --interval seconds while this node is the leader'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'AUTOMATION_SCHEDULER_INTERVAL', 30),
+            help='Seconds between scans in daemon mode (default: 30)'
+        )
+
     def handle(self, *args, **options):
-        self.stdout.write('Checking scheduled automations...')
-        executed_count = check_scheduled_automations()
-        self.stdout.write(
-            self.style.SUCCESS(f'Successfully executed {executed_count} scheduled automations')
+        scheduler = AutomationScheduler(
+            interval=options['interval'],
+            chunk_size=options['chunk_size'],
+            enqueue=False if options['inline'] else None,
         )
+        self.queued = scheduler.enqueue
+
+        if not options['daemon']:
+            self.stdout.write('Checking scheduled automations...')
+            try:
+                stats = scheduler.tick()
+            finally:
+                scheduler.lock.release()
+            if not stats['leader']:
+                self.stdout.write(self.style.WARNING('Another scheduler is running, skipping'))
+                return
+            self.stdout.write(
+                self.style.SUCCESS(f"Successfully {self.scheduled_verb} {stats['scheduled']} scheduled automations")
+            )
+            self.stdout.write(
+                self.style.SUCCESS(f"Successfully executed {stats['delayed']} delayed automations")
+            )
+            return
+
+        def request_stop(signum, frame):
+            self.stdout.write('Stop requested, finishing current tick...')
+            scheduler.stop()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        self.stdout.write(f"Automation scheduler started (interval {options['interval']}s)")
+        scheduler.run(on_tick=self.report_tick)
+        self.stdout.write(self.style.SUCCESS('Automation scheduler stopped'))
+
+    def report_tick(self, stats):
+        if 'error' in stats:
+            self.stdout.write(self.style.ERROR(f"Tick failed: {stats['error']}"))
+        elif not stats['leader']:
+            self.stdout.write(f"Standby (another node is leader), {stats['seconds']:.3f}s")
+        else:
+            self.stdout.write(
+                f"Leader tick: {stats['scheduled']} scheduled {self.scheduled_verb} in {stats['scan_seconds']:.3f}s, "
+                f"{stats['delayed']} delayed in {stats['dispatch_seconds']:.3f}s, "
+                f"total {stats['seconds']:.3f}s"
+            )
 
+    @property
+    def scheduled_verb(self):
+        return 'queued' if self.queued else 'executed'
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('automations', '0004_alter_automation_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AutomationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('trigger', 'Trigger Automations'), ('auto_reply', 'Inbound Auto-Reply')], default='trigger', max_length=20)),
+                ('trigger', models.CharField(blank=True, help_text='Trigger type for trigger jobs', max_length=50)),
+                ('payload', models.JSONField(blank=True, default=dict, help_text='Serialized trigger context (object ids and values)')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('max_attempts', models.IntegerField(default=5)),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Earliest time the job may run')),
+                ('locked_until', models.DateTimeField(blank=True, help_text='Claim expires at this time if the worker dies', null=True)),
+                ('locked_by', models.CharField(blank=True, max_length=255)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='automation_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['run_at', 'id'],
+                'indexes': [models.Index(fields=['status', 'run_at'], name='automations_status_9a6a7f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('leads', '0004_lead_leads_lead_user_id_292aba_idx'),
+        ('automations', '0005_automationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledExecution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigger', models.CharField(max_length=50)),
+                ('payload', models.JSONField(blank=True, default=dict, help_text='Serialized trigger context (besides user and lead)')),
+                ('due_at', models.DateTimeField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('dispatched', 'Dispatched'), ('cancelled', 'Cancelled')], default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('dispatched_at', models.DateTimeField(blank=True, null=True)),
+                ('automation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_executions', to='automations.automation')),
+                ('lead', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_executions', to='leads.lead')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_executions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['due_at'],
+                'indexes': [models.Index(fields=['status', 'due_at'], name='automations_status_0b85c5_idx')],
+            },
+        ),
+    ]
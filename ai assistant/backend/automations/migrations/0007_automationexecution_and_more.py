@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0004_lead_leads_lead_user_id_292aba_idx'),
+        ('automations', '0006_scheduledexecution'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AutomationExecution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_key', models.CharField(help_text='Identifies the trigger event (see services.trigger_event_key)', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('automation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='executions', to='automations.automation')),
+                ('lead', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='automation_executions', to='leads.lead')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='automationexecution',
+            constraint=models.UniqueConstraint(fields=('automation', 'lead', 'event_key'), name='unique_automation_execution'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('automations', '0007_automationexecution_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='automationjob',
+            name='kind',
+            field=models.CharField(choices=[('trigger', 'Trigger Automations'), ('auto_reply', 'Inbound Auto-Reply'), ('batch', 'Bulk Ingest Batch')], default='trigger', max_length=20),
+        ),
+    ]
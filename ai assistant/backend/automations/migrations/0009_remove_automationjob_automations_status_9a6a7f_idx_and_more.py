@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('automations', '0008_alter_automationjob_kind'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='automationjob',
+            name='automations_status_9a6a7f_idx',
+        ),
+        migrations.AddField(
+            model_name='automationjob',
+            name='lane',
+            field=models.CharField(choices=[('interactive', 'Interactive'), ('bulk', 'Bulk')], default='interactive', help_text='Workers process each lane with its own concurrency budget', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='automationjob',
+            name='kind',
+            field=models.CharField(choices=[('trigger', 'Trigger Automations'), ('auto_reply', 'Inbound Auto-Reply'), ('batch', 'Bulk Ingest Batch'), ('scan', 'Scheduled Scan Chunk')], default='trigger', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='automationjob',
+            name='user',
+            field=models.ForeignKey(blank=True, help_text='Empty for jobs spanning several users (scan chunks)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='automation_jobs', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='automationjob',
+            index=models.Index(fields=['lane', 'status', 'run_at'], name='automations_lane_ba1d50_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('automations', '0010_alter_automationjob_kind_campaign'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='automationjob',
+            name='dedupe_key',
+            field=models.CharField(blank=True, help_text='Pending jobs with the same key are merged (see debounce_job)', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='automationjob',
+            index=models.Index(fields=['dedupe_key', 'status'], name='automations_dedupe__6b47d5_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:08
+
+from django.db import migrations, models
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('automations', '0012_cache_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledexecution',
+            name='attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scheduledexecution',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, help_text='Claim expires at this time if the dispatcher dies', null=True),
+        ),
+        migrations.AlterField(
+            model_name='scheduledexecution',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('dispatched', 'Dispatched'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='pending', max_length=20),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from accounts.models import User
 from leads.models import Lead
 
@@ -71,3 +72,120 @@ class Automation(models.Model):
         
         return True
 
+
+
+class AutomationJob(models.Model):
+    """
+    Durable queue entry for automation work.
+    Signals enqueue jobs; `run_automation_worker` processes claim and execute them.
+    """
+    KIND_CHOICES = [
+        ('trigger', 'Trigger Automations'),
+        ('auto_reply', 'Inbound Auto-Reply'),
+        ('batch', 'Bulk Ingest Batch'),
+        ('scan', 'Scheduled Scan Chunk'),
+        ('campaign', 'Campaign Send'),
+    ]
+
+    LANE_CHOICES = [
+        ('interactive', 'Interactive'),
+        ('bulk', 'Bulk'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='automation_jobs', null=True, blank=True,
+                             help_text='Empty for jobs spanning several users (scan chunks)')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='trigger')
+    lane = models.CharField(max_length=20, choices=LANE_CHOICES, default='interactive',
+                            help_text='Workers process each lane with its own concurrency budget')
+    trigger = models.CharField(max_length=50, blank=True, help_text='Trigger type for trigger jobs')
+    payload = models.JSONField(default=dict, blank=True, help_text='Serialized trigger context (object ids and values)')
+    dedupe_key = models.CharField(max_length=100, blank=True,
+                                  help_text='Pending jobs with the same key are merged (see debounce_job)')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+
+    # Retry / visibility timeout bookkeeping
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now, help_text='Earliest time the job may run')
+    locked_until = models.DateTimeField(null=True, blank=True, help_text='Claim expires at this time if the worker dies')
+    locked_by = models.CharField(max_length=255, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['run_at', 'id']
+        indexes = [
+            models.Index(fields=['lane', 'status', 'run_at']),
+            models.Index(fields=['dedupe_key', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.trigger or '-'} ({self.status})"
+
+
+class ScheduledExecution(models.Model):
+    """
+    A delayed automation waiting for its due time.
+    Written when a trigger fires before the automation's delay has elapsed;
+    the dispatcher executes rows whose `due_at` has passed. A claimed row is
+    `running` until the run finishes; if the dispatcher dies first, the row is
+    claimed again once `locked_until` passes.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('dispatched', 'Dispatched'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='scheduled_executions')
+    automation = models.ForeignKey(Automation, on_delete=models.CASCADE, related_name='scheduled_executions')
+    lead = models.ForeignKey(Lead, on_delete=models.CASCADE, related_name='scheduled_executions')
+    trigger = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True, help_text='Serialized trigger context (besides user and lead)')
+    due_at = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    locked_until = models.DateTimeField(null=True, blank=True, help_text='Claim expires at this time if the dispatcher dies')
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['due_at']
+        indexes = [
+            models.Index(fields=['status', 'due_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.automation.name} for lead {self.lead_id} at {self.due_at} ({self.status})"
+
+
+class AutomationExecution(models.Model):
+    """
+    Execution ledger: one row per (automation, lead, trigger event).
+    The unique constraint turns duplicate triggers of the same event into no-ops.
+    """
+    automation = models.ForeignKey(Automation, on_delete=models.CASCADE, related_name='executions')
+    lead = models.ForeignKey(Lead, on_delete=models.CASCADE, related_name='automation_executions')
+    event_key = models.CharField(max_length=255, help_text='Identifies the trigger event (see services.trigger_event_key)')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['automation', 'lead', 'event_key'], name='unique_automation_execution'),
+        ]
+
+    def __str__(self):
+        return f"{self.automation_id}:{self.lead_id}:{self.event_key}"
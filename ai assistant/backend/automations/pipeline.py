@@ -0,0 +1,325 @@
+"""
+Automation Pipeline
+Executes a batch of automations in stages, each stage touching the database in bulk:
+
+    prepare   -> conditions, delays (per item, in memory)
+    claim     -> execution ledger, one SELECT + one INSERT
+    generate  -> message content (template or AI, AI calls run in a thread pool)
+    persist   -> Message.bulk_create
+    send      -> concurrent, capped per channel and account; results recorded in the outbox
+    log       -> Lead.last_contacted update, AgentActivity.bulk_create
+    record    -> one F() update of trigger counters per automation
+
+Every stage records its own timing in `AutomationPipeline.timings`.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from leads.models import Lead
+from messages.conversations import record_messages
+from messages.models import Message
+from ai_integration.models import AgentActivity
+
+logger = logging.getLogger(__name__)
+
+
+# What each automation type does. `message_type` describes the generated message
+# (None: no message is sent); `details` lists the activity detail keys after automation_id.
+TYPE_SPECS = {
+    'lead_followup': {
+        'message_type': 'follow-up',
+        'activity_type': 'automation_ran',
+        'description': 'Lead follow-up automation triggered for {lead_name}',
+        'details': ('automation_name', 'message_id'),
+        'touches_last_contacted': True,
+    },
+    'booking_reminder': {
+        'message_type': lambda context: "reminder about " + (
+            "Your booking is scheduled" if context.get('booking') else "Your upcoming session"
+        ),
+        'activity_type': 'automation_ran',
+        'description': 'Booking reminder sent to {lead_name}',
+        'details': ('automation_name', 'message_id', 'booking_id'),
+    },
+    'confirmation': {
+        'message_type': 'confirmation message',
+        'activity_type': 'automation_ran',
+        'description': 'Confirmation sent to {lead_name}',
+        'details': ('message_id',),
+    },
+    'post_session': {
+        'message_type': 'post-session follow-up',
+        'activity_type': 'automation_ran',
+        'description': 'Post-session follow-up sent to {lead_name}',
+        'details': ('message_id',),
+    },
+    'no_show_followup': {
+        'message_type': 'no-show follow-up message',
+        'activity_type': 'automation_ran',
+        'description': 'No-show follow-up sent to {lead_name}',
+        'details': ('message_id', 'booking_id'),
+    },
+    'crm_update': {
+        # Placeholder - actual CRM updates would go here; for now the activity is logged
+        'message_type': None,
+        'activity_type': 'crm_updated',
+        'description': 'CRM updated for {lead_name} via automation',
+        'details': ('automation_name', 'updates'),
+    },
+}
+
+
+def message_type_for(automation, context):
+    """Message type passed to generation for an automation, or None if it sends nothing"""
+    message_type = TYPE_SPECS[automation.type]['message_type']
+    if callable(message_type):
+        return message_type(context)
+    return message_type
+
+
+class AutomationPipeline:
+    """Runs a batch of AutomationExecutors through the staged pipeline"""
+
+    STAGES = ('prepare', 'claim', 'generate', 'persist', 'send', 'log', 'record')
+
+    def __init__(self, generation_workers=None):
+        self.generation_workers = generation_workers or getattr(settings, 'AUTOMATION_GENERATION_WORKERS', 8)
+        self.timings = {}
+
+    def _timed(self, stage, func, *args):
+        started = time.monotonic()
+        try:
+            return func(*args)
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + time.monotonic() - started
+
+    def run(self, executors):
+        """
+        Execute a batch of automations
+
+        Args:
+            executors: AutomationExecutor instances (automation + context each)
+
+        Returns:
+            List of executors that executed
+        """
+        self.timings = {}
+        executors = self._timed('prepare', self.prepare, executors)
+        executors = self._timed('claim', self.claim, executors)
+        if not executors:
+            return []
+
+        try:
+            self._timed('generate', self.generate, executors)
+            self._timed('persist', self.persist, executors)
+        except Exception:
+            # Let the trigger events be retried, except where a message already exists
+            self.release([executor for executor in executors if executor.message is None])
+            raise
+
+        # From here the messages exist and the outbox relay sends whatever this batch
+        # doesn't, so a failing stage is logged rather than retried (a retry would
+        # send the messages twice)
+        try:
+            self._timed('send', self.send, executors)
+        except Exception as e:
+            logger.error(f"Automation pipeline send failed, left to the outbox relay: {str(e)}")
+        for stage in ('log', 'record'):
+            try:
+                with transaction.atomic():
+                    self._timed(stage, getattr(self, stage), executors)
+            except Exception as e:
+                logger.error(f"Automation pipeline stage {stage} failed for {len(executors)} automations: {str(e)}")
+
+        logger.info(
+            f"Automation pipeline executed {len(executors)} automations ("
+            + ", ".join(f"{stage} {self.timings.get(stage, 0.0):.3f}s" for stage in self.STAGES)
+            + ")"
+        )
+        return executors
+
+    def prepare(self, executors):
+        """Drop executors that should not run now (conditions, missing lead, pending delay)"""
+        return [executor for executor in executors if executor.prepare()]
+
+    def claim(self, executors):
+        """
+        Claim the execution ledger entries for a batch
+
+        Existing entries are read in one query and the rest inserted in one; if a
+        concurrent run inserts an entry in between, the batch falls back to per-item
+        claims so exactly one run wins each entry.
+        """
+        from .models import AutomationExecution
+
+        claimed = []
+        pending = {}
+        for executor in executors:
+            if not executor.use_ledger:
+                claimed.append(executor)
+                continue
+            key = (executor.automation.pk, executor.lead.pk, executor.event_key)
+            if key in pending:
+                logger.info(f"Automation {key[0]} already queued for lead {key[1]} in this batch, skipping")
+                continue
+            pending[key] = executor
+
+        if not pending:
+            return claimed
+
+        existing = set(
+            AutomationExecution.objects.filter(
+                automation_id__in={key[0] for key in pending},
+                lead_id__in={key[1] for key in pending},
+                event_key__in={key[2] for key in pending},
+            ).values_list('automation_id', 'lead_id', 'event_key')
+        )
+        for key in existing & set(pending):
+            logger.info(f"Automation {key[0]} already executed for lead {key[1]} ({key[2]}), skipping")
+            del pending[key]
+
+        rows = [
+            AutomationExecution(automation_id=key[0], lead_id=key[1], event_key=key[2])
+            for key in pending
+        ]
+        try:
+            with transaction.atomic():
+                AutomationExecution.objects.bulk_create(rows)
+        except IntegrityError:
+            # Lost a race for at least one entry; claim one by one
+            return claimed + [executor for executor in pending.values() if executor.claim_execution()]
+
+        for executor, row in zip(pending.values(), rows):
+            executor.execution = row
+        return claimed + list(pending.values())
+
+    def generate(self, executors):
+        """Generate message content; AI generation runs concurrently"""
+        needs_ai = []
+        for executor in executors:
+            message_type = message_type_for(executor.automation, executor.context)
+            if message_type is None:
+                continue
+            if executor.automation.message_template:
+                executor.content = executor.generate_message(executor.lead, message_type)
+            else:
+                needs_ai.append((executor, message_type))
+
+        if not needs_ai:
+            return
+
+        workers = min(self.generation_workers, len(needs_ai))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            contents = pool.map(
+                lambda item: item[0].generate_message(item[0].lead, item[1]),
+                needs_ai,
+            )
+            for (executor, _), content in zip(needs_ai, contents):
+                executor.content = content
+
+    def persist(self, executors):
+        """Create all outbound Message rows in one bulk insert, claimed for sending by this batch"""
+        from messaging.outbox import claimed_fields
+
+        now = timezone.now()
+        sending = [executor for executor in executors if executor.content is not None]
+        messages = [
+            Message(
+                user=executor.user,
+                lead=executor.lead,
+                channel=executor.automation.channel,
+                direction='outbound',
+                content=executor.content,
+                ai_generated=True,
+                automated=True,
+                timestamp=now,
+                **claimed_fields(now),  # If this worker dies, the message relay sends it
+            )
+            for executor in sending
+        ]
+        Message.objects.bulk_create(messages)
+        for executor, message in zip(sending, messages):
+            executor.message = message
+        record_messages(messages)
+
+    def send(self, executors):
+        """Send all messages concurrently and record the results in the outbox (see messaging/outbox.py)"""
+        from messaging.outbox import deliver_claimed
+
+        messages = [executor.message for executor in executors if executor.message is not None]
+        sent_count, failed_count = deliver_claimed(messages)
+        if failed_count:
+            logger.warning(f"{failed_count} of {len(messages)} automation messages not sent, left to the outbox retries")
+
+    def log(self, executors):
+        """Update leads' last_contacted and log one activity per execution"""
+        now = timezone.now()
+
+        contacted = {
+            executor.lead.pk: executor.lead
+            for executor in executors
+            if TYPE_SPECS[executor.automation.type].get('touches_last_contacted')
+        }
+        if contacted:
+            # update() rather than save(): last_contacted is bookkeeping, no lead signals
+            Lead.objects.filter(pk__in=contacted).update(last_contacted=now, updated_at=now)
+            for lead in contacted.values():
+                lead.last_contacted = now
+
+        AgentActivity.objects.bulk_create([
+            AgentActivity(
+                user=executor.user,
+                type=TYPE_SPECS[executor.automation.type]['activity_type'],
+                description=TYPE_SPECS[executor.automation.type]['description'].format(lead_name=executor.lead.name),
+                channel=executor.automation.channel if executor.message is not None else None,
+                lead=executor.lead,
+                details=self._activity_details(executor),
+            )
+            for executor in executors
+        ])
+
+    def _activity_details(self, executor):
+        booking = executor.context.get('booking')
+        values = {
+            'automation_name': executor.automation.name,
+            'message_id': executor.message.id if executor.message is not None else None,
+            'booking_id': booking.id if booking else None,
+            'updates': executor.context.get('updates', {}),
+        }
+        details = {'automation_id': executor.automation.id}
+        for key in TYPE_SPECS[executor.automation.type]['details']:
+            details[key] = values[key]
+        return details
+
+    def record(self, executors):
+        """Bump trigger counters with one F() update per automation"""
+        from .models import Automation
+
+        now = timezone.now()
+        counts = {}
+        for executor in executors:
+            counts[executor.automation.pk] = counts.get(executor.automation.pk, 0) + 1
+
+        for automation_id, count in counts.items():
+            Automation.objects.filter(pk=automation_id).update(
+                times_triggered=F('times_triggered') + count,
+                last_triggered=now,
+            )
+        for executor in executors:
+            executor.automation.times_triggered += 1
+            executor.automation.last_triggered = now
+
+    def release(self, executors):
+        """Drop the ledger entries claimed by this batch"""
+        from .models import AutomationExecution
+
+        execution_ids = [executor.execution.pk for executor in executors if executor.execution is not None]
+        if execution_ids:
+            AutomationExecution.objects.filter(pk__in=execution_ids).delete()
+        for executor in executors:
+            executor.execution = None
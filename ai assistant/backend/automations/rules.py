@@ -0,0 +1,83 @@
+"""
+Automation Rule Index
+Per-user index of enabled automations keyed by trigger, with the UserSettings
+automation-type and channel gates already applied.
+
+The index is cached in-process and in the shared cache, and is invalidated by
+Automation and UserSettings save/delete signals (see signals.py), so dispatching
+a trigger costs no automation queries in the common case, and no cache read
+either while the process's copy of the version is fresh. Invalidation reaches
+other processes only through a shared cache backend, within
+CACHE_VERSION_CHECK_INTERVAL seconds (see core/cache.py).
+"""
+
+import copy
+import logging
+from django.conf import settings
+from core.cache import VersionedCache
+
+logger = logging.getLogger(__name__)
+
+# UserSettings flag gating each automation type (types not listed are always allowed)
+TYPE_SETTING_FIELDS = {
+    'lead_followup': 'lead_followup_enabled',
+    'booking_reminder': 'booking_reminder_enabled',
+    'confirmation': 'confirmation_enabled',
+    'post_session': 'post_session_enabled',
+}
+
+# UserSettings flag gating each channel
+CHANNEL_SETTING_FIELDS = {
+    'email': 'email_enabled',
+    'sms': 'sms_enabled',
+    'whatsapp': 'whatsapp_enabled',
+    'facebook': 'facebook_enabled',
+    'instagram': 'instagram_enabled',
+}
+
+_rule_cache = VersionedCache(
+    'automation_rules',
+    timeout=getattr(settings, 'AUTOMATION_RULE_CACHE_TIMEOUT', 3600),
+)
+
+
+def compile_rules(user_id):
+    """
+    Build the rule index for a user
+
+    Returns:
+        Dict mapping trigger type to a list of Automation instances
+    """
+    from .models import Automation
+    from settings.models import UserSettings
+
+    user_settings = UserSettings.objects.filter(user_id=user_id).first()
+
+    rules = {}
+    for automation in Automation.objects.filter(user_id=user_id, enabled=True):
+        if user_settings:
+            type_field = TYPE_SETTING_FIELDS.get(automation.type)
+            if type_field and not getattr(user_settings, type_field):
+                continue
+            channel_field = CHANNEL_SETTING_FIELDS.get(automation.channel)
+            if channel_field and not getattr(user_settings, channel_field):
+                logger.info(f"Skipping automation {automation.id} - channel {automation.channel} is disabled")
+                continue
+        rules.setdefault(automation.trigger, []).append(automation)
+    return rules
+
+
+def get_automation_rules(user, trigger_type):
+    """
+    Enabled automations for a user and trigger, after settings gates
+
+    Returns copies, so callers may modify them without touching the cache.
+    """
+    user_id = getattr(user, 'pk', user)
+    rules = _rule_cache.get(user_id, lambda: compile_rules(user_id))
+    return [copy.copy(automation) for automation in rules.get(trigger_type, [])]
+
+
+def invalidate_automation_rules(user_id):
+    """Drop a user's rule index in every process"""
+    _rule_cache.invalidate(user_id)
@@ -0,0 +1,281 @@
+"""
+Scheduled Automation Scanner
+Computes every due (automation, lead) and (automation, booking) pair with one
+SQL query per trigger type instead of looping automation by automation.
+
+Pairs are walked with keyset pagination on (automation_id, object_id) in
+fixed-size chunks, and each chunk is executed as one AutomationPipeline batch
+with its automations, users, leads and bookings loaded in bulk.
+"""
+
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import CharField, Exists, OuterRef, Q, Value
+from django.db.models.functions import Cast, Concat
+from django.utils import timezone
+from leads.models import Lead
+
+logger = logging.getLogger(__name__)
+
+# Lead statuses still worth following up when there has been no contact
+ACTIVE_LEAD_STATUSES = ['new', 'contacted', 'qualified']
+
+# Booking statuses that still need a reminder
+UPCOMING_BOOKING_STATUSES = ['scheduled', 'confirmed']
+
+
+def _distinct_delays(trigger):
+    """Distinct (delay_days, delay_hours) pairs among enabled automations for a trigger"""
+    from .models import Automation
+
+    return list(
+        Automation.objects.filter(enabled=True, trigger=trigger)
+        .order_by()
+        .values_list('delay_days', 'delay_hours')
+        .distinct()
+    )
+
+
+def due_no_contact_filter(now):
+    """
+    Q selecting leads due for a `no_contact_days` automation (joined via user__automations)
+
+    A lead is due once it has gone `delay_days` (or `delay_hours // 24` when no days
+    are set) without contact. Automations are grouped by distinct delay, so the
+    cutoff is computed once per group rather than once per automation.
+
+    Pairs already executed in the lead's current no-contact period (a ledger row
+    newer than `last_contacted`) are left out, so automations that don't touch
+    `last_contacted` aren't rescanned on every tick.
+    """
+    from .models import AutomationExecution
+
+    delay_q = Q()
+    for delay_days, delay_hours in _distinct_delays('no_contact_days'):
+        days = delay_days or delay_hours // 24
+        delay_q |= Q(
+            user__automations__delay_days=delay_days,
+            user__automations__delay_hours=delay_hours,
+            last_contacted__lt=now - timedelta(days=days),
+        )
+    if not delay_q:
+        return None
+
+    return Q(
+        user__automations__enabled=True,
+        user__automations__trigger='no_contact_days',
+        status__in=ACTIVE_LEAD_STATUSES,
+        last_contacted__isnull=False,
+    ) & delay_q & ~Q(Exists(
+        AutomationExecution.objects.filter(
+            automation_id=OuterRef('user__automations__id'),
+            lead_id=OuterRef('id'),
+            created_at__gte=OuterRef('last_contacted'),
+        )
+    ))
+
+
+def due_booking_reminder_filter(now):
+    """
+    Q selecting bookings due for a `booking_reminder_hours` automation (joined via user__automations)
+
+    A booking is due once it starts within the automation's delay window
+    (delay_days * 24 + delay_hours) and that automation hasn't reminded it yet
+    (no ledger row for the booking), so each reminder automation fires once per
+    booking.
+    """
+    from .models import AutomationExecution
+
+    window_q = Q()
+    for delay_days, delay_hours in _distinct_delays('booking_reminder_hours'):
+        window_q |= Q(
+            user__automations__delay_days=delay_days,
+            user__automations__delay_hours=delay_hours,
+            start_time__lte=now + timedelta(days=delay_days, hours=delay_hours),
+        )
+    if not window_q:
+        return None
+
+    return Q(
+        user__automations__enabled=True,
+        user__automations__trigger='booking_reminder_hours',
+        status__in=UPCOMING_BOOKING_STATUSES,
+        start_time__gt=now,
+    ) & window_q & ~Q(Exists(
+        AutomationExecution.objects.filter(
+            automation_id=OuterRef('user__automations__id'),
+            lead_id=OuterRef('lead_id'),
+            event_key=Concat(Value('booking_reminder_hours:booking:'), Cast(OuterRef('id'), CharField())),
+        )
+    ))
+
+
+def iter_due_pairs(model, due_filter, chunk_size):
+    """
+    Yield chunks of (automation_id, object_id) pairs matching `due_filter`
+
+    Uses keyset pagination on (automation_id, object_id). The keyset condition is
+    combined into the same filter() call as `due_filter` so both apply to the same
+    automation join.
+    """
+    last = None
+    while True:
+        condition = due_filter
+        if last is not None:
+            condition = condition & (
+                Q(user__automations__id__gt=last[0]) |
+                Q(user__automations__id=last[0], id__gt=last[1])
+            )
+
+        chunk = list(
+            model.objects.filter(condition)
+            .order_by('user__automations__id', 'id')
+            .values_list('user__automations__id', 'id')[:chunk_size]
+        )
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last = chunk[-1]
+
+
+def scan_in_progress(trigger):
+    """True while scan chunk jobs from an earlier scan of `trigger` are still queued or running"""
+    from .models import AutomationJob
+
+    return AutomationJob.objects.filter(kind='scan', trigger=trigger, status__in=['pending', 'running']).exists()
+
+
+class ScheduledScanner:
+    """
+    Finds due scheduled automations and executes them in batches
+
+    With `enqueue=True` each chunk of due pairs is queued as a bulk-lane 'scan' job
+    instead of being executed in this process; a trigger is not rescanned while
+    chunks from its previous scan are still draining.
+    """
+
+    def __init__(self, chunk_size=None, enqueue=False):
+        self.chunk_size = chunk_size or getattr(settings, 'AUTOMATION_SCAN_CHUNK_SIZE', 500)
+        self.enqueue = enqueue
+        self.automations = {}
+
+    def _load_automations(self, automation_ids):
+        """Load automations (with users) not seen in an earlier chunk"""
+        from .models import Automation
+
+        missing = set(automation_ids) - set(self.automations)
+        if missing:
+            for automation in Automation.objects.filter(id__in=missing).select_related('user'):
+                self.automations[automation.id] = automation
+
+    def _execute(self, work):
+        """
+        Run one chunk of (automation, context) pairs through the pipeline
+
+        Returns:
+            List of executors that executed
+        """
+        from .pipeline import AutomationPipeline
+        from .services import AutomationExecutor
+
+        executors = []
+        for automation, context in work:
+            # The scan already established the pair is due; skip the executor's delay check
+            context['scheduled'] = True
+            executors.append(AutomationExecutor(automation, context))
+
+        try:
+            return AutomationPipeline().run(executors)
+        except Exception as e:
+            logger.error(f"Error executing scheduled automation chunk: {str(e)}")
+            return []
+
+    def _scan(self, trigger, model, due_filter):
+        """Execute (or enqueue) every chunk of due pairs for a trigger"""
+        from .jobs import enqueue_job
+
+        if due_filter is None:
+            return 0
+        if self.enqueue and scan_in_progress(trigger):
+            logger.info(f"Previous {trigger} scan still draining, skipping")
+            return 0
+
+        count = 0
+        for chunk in iter_due_pairs(model, due_filter, self.chunk_size):
+            if self.enqueue:
+                enqueue_job(trigger, {'pairs': [list(pair) for pair in chunk]}, kind='scan')
+                count += len(chunk)
+            else:
+                count += self.execute_chunk(trigger, chunk)
+        return count
+
+    def execute_chunk(self, trigger, chunk):
+        """
+        Execute one chunk of (automation_id, object_id) due pairs
+
+        Returns:
+            Number of automations executed
+        """
+        if trigger == 'no_contact_days':
+            return self._execute_no_contact(chunk)
+        if trigger == 'booking_reminder_hours':
+            return self._execute_booking_reminders(chunk)
+        raise ValueError(f"Unknown scheduled trigger: {trigger}")
+
+    def _execute_no_contact(self, chunk):
+        self._load_automations(automation_id for automation_id, _ in chunk)
+        leads = Lead.objects.in_bulk([lead_id for _, lead_id in chunk])
+
+        work = []
+        for automation_id, lead_id in chunk:
+            automation = self.automations.get(automation_id)
+            lead = leads.get(lead_id)
+            if automation is None or lead is None:
+                continue
+            work.append((automation, {'user': automation.user, 'lead': lead}))
+        return len(self._execute(work))
+
+    def _execute_booking_reminders(self, chunk):
+        from bookings.models import Booking
+
+        self._load_automations(automation_id for automation_id, _ in chunk)
+        bookings = Booking.objects.select_related('lead').in_bulk([booking_id for _, booking_id in chunk])
+
+        work = []
+        for automation_id, booking_id in chunk:
+            automation = self.automations.get(automation_id)
+            booking = bookings.get(booking_id)
+            if automation is None or booking is None:
+                continue
+            work.append((automation, {'user': automation.user, 'lead': booking.lead, 'booking': booking}))
+
+        executed = self._execute(work)
+        reminded = {executor.context['booking'].id for executor in executed}
+        if reminded:
+            # Shown on the booking; which automations reminded it is in the execution ledger.
+            # update() rather than save(): no booking signals for bookkeeping fields
+            Booking.objects.filter(id__in=reminded).update(
+                reminder_sent=True,
+                reminder_sent_at=timezone.now(),
+            )
+        return len(executed)
+
+    def run_no_contact(self, now):
+        """Execute `no_contact_days` automations for all due leads"""
+        return self._scan('no_contact_days', Lead, due_no_contact_filter(now))
+
+    def run_booking_reminders(self, now):
+        """Execute `booking_reminder_hours` automations for all due bookings"""
+        from bookings.models import Booking
+
+        return self._scan('booking_reminder_hours', Booking, due_booking_reminder_filter(now))
+
+    def run(self):
+        """Run one full scan over all scheduled trigger types"""
+        now = timezone.now()
+        executed_count = self.run_no_contact(now)
+        executed_count += self.run_booking_reminders(now)
+        return executed_count
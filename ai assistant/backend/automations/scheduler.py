@@ -0,0 +1,134 @@
+"""
+Automation Scheduler
+Runs the scheduled scan and the delayed-execution dispatcher on a fixed tick.
+
+Only one node scans at a time: each tick first takes a PostgreSQL session-level
+advisory lock (pg_try_advisory_lock) on a dedicated connection. The node holding
+it is the leader and keeps it between ticks; the others skip the tick and try
+again on the next one, taking over if the leader's connection goes away. On
+other databases (development sqlite) every node is the leader.
+"""
+
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+# Advisory lock key shared by every scheduler node
+SCHEDULER_LOCK_ID = 7305021
+
+
+class LeaderLock:
+    """PostgreSQL advisory lock held on its own connection"""
+
+    def __init__(self, lock_id=SCHEDULER_LOCK_ID, alias='default'):
+        self.lock_id = lock_id
+        self.alias = alias
+        self.connection = None
+        self.held = False
+
+    @property
+    def supported(self):
+        return connections[self.alias].vendor == 'postgresql'
+
+    def acquire(self):
+        """
+        Try to become (or confirm still being) the leader
+
+        Returns:
+            bool: True if this node holds the lock
+        """
+        if not self.supported:
+            return True
+
+        try:
+            if self.connection is None:
+                # Separate from the request/ORM connection, which close_old_connections() may recycle
+                self.connection = connections.create_connection(self.alias)
+            with self.connection.cursor() as cursor:
+                if self.held:
+                    cursor.execute('SELECT 1')  # lock lives as long as the session
+                else:
+                    cursor.execute('SELECT pg_try_advisory_lock(%s)', [self.lock_id])
+                    self.held = cursor.fetchone()[0]
+        except Exception as e:
+            logger.warning(f"Scheduler lock connection lost: {str(e)}")
+            self._close()
+        return self.held
+
+    def release(self):
+        if self.connection is not None and self.held:
+            try:
+                with self.connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_unlock(%s)', [self.lock_id])
+            except Exception as e:
+                logger.warning(f"Error releasing scheduler lock: {str(e)}")
+        self._close()
+
+    def _close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+        self.connection = None
+        self.held = False
+
+
+class AutomationScheduler:
+    """Leader-elected loop around the scheduled scanner and dispatcher"""
+
+    def __init__(self, interval=None, chunk_size=None, lock=None, enqueue=None):
+        self.interval = interval or getattr(settings, 'AUTOMATION_SCHEDULER_INTERVAL', 30)
+        self.chunk_size = chunk_size
+        # Queue due pairs for bulk-lane workers rather than executing them in the scheduler
+        self.enqueue = getattr(settings, 'AUTOMATION_SCAN_ENQUEUE', True) if enqueue is None else enqueue
+        self.lock = lock or LeaderLock()
+        self._stop = threading.Event()
+
+    def tick(self):
+        """
+        Run one scan + dispatch if this node is the leader
+
+        Returns:
+            Dict of per-tick stats
+        """
+        from .dispatcher import dispatch_due_executions
+        from .services import check_scheduled_automations
+
+        started = time.monotonic()
+        stats = {'leader': self.lock.acquire(), 'scheduled': 0, 'delayed': 0}
+        if stats['leader']:
+            scan_started = time.monotonic()
+            stats['scheduled'] = check_scheduled_automations(chunk_size=self.chunk_size, enqueue=self.enqueue)
+            stats['scan_seconds'] = time.monotonic() - scan_started
+
+            dispatch_started = time.monotonic()
+            stats['delayed'] = dispatch_due_executions()
+            stats['dispatch_seconds'] = time.monotonic() - dispatch_started
+        stats['seconds'] = time.monotonic() - started
+        return stats
+
+    def run(self, on_tick=None):
+        """Tick every `interval` seconds until stop() is called; the current tick always finishes"""
+        try:
+            while not self._stop.is_set():
+                close_old_connections()
+                tick_started = time.monotonic()
+                try:
+                    stats = self.tick()
+                except Exception as e:
+                    logger.error(f"Scheduler tick failed: {str(e)}")
+                    stats = {'leader': self.lock.held, 'error': str(e)}
+                if on_tick:
+                    on_tick(stats)
+                self._stop.wait(max(0.0, self.interval - (time.monotonic() - tick_started)))
+        finally:
+            self.lock.release()
+            close_old_connections()
+
+    def stop(self):
+        self._stop.set()
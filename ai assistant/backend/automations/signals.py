@@ -1,56 +1,54 @@
 """
 Django signals to trigger automations on events
+Signals only enqueue jobs; `run_automation_worker` executes them
+Inside bulk_ingest() (ingest.py), Lead events are recorded for a single batch job instead
 """
 
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from leads.models import Lead
 from messages.models import Message
-from .services import trigger_automations
+from messages.services import queue_auto_reply
+from settings.models import UserSettings
+from .ingest import current_ingest
+from .jobs import enqueue_job
+from .models import Automation
+from .rules import invalidate_automation_rules
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@receiver(pre_save, sender=Lead)
-def store_previous_status(sender, instance, **kwargs):
-    """Store previous status to detect changes (only on save, not on load)"""
-    if instance.pk:
-        try:
-            # Use only() to fetch only the status field and use values() to avoid model instantiation
-            # This prevents post_init signal from firing and causing recursion
-            original = Lead.objects.filter(pk=instance.pk).values('status').first()
-            if original:
-                instance._previous_status = original['status']
-            else:
-                instance._previous_status = None
-        except Exception:
-            instance._previous_status = None
-    else:
-        instance._previous_status = None
-
-
 @receiver(post_save, sender=Lead)
 def trigger_lead_automations(sender, instance, created, **kwargs):
     """Trigger automations when a lead is created or updated"""
+    ingest = current_ingest()
+    
     if created:
         # New lead added
         logger.info(f"New lead created: {instance.id}")
-        trigger_automations('new_lead', {
+        if ingest is not None:
+            ingest.lead_created(instance)
+            return
+        enqueue_job('new_lead', {
             'user': instance.user,
             'lead': instance
         })
     else:
-        # Check if status changed
-        if hasattr(instance, '_previous_status'):
-            if instance._previous_status != instance.status:
-                logger.info(f"Lead status changed: {instance.id} ({instance._previous_status} -> {instance.status})")
-                trigger_automations('lead_status_changed', {
-                    'user': instance.user,
-                    'lead': instance,
-                    'old_status': instance._previous_status,
-                    'new_status': instance.status
-                })
+        # Check if status changed (original value captured when the lead was loaded)
+        if instance.has_field_changed('status'):
+            previous_status = instance.get_original_value('status')
+            logger.info(f"Lead status changed: {instance.id} ({previous_status} -> {instance.status})")
+            if ingest is not None:
+                ingest.lead_status_changed(instance, previous_status)
+                return
+            enqueue_job('lead_status_changed', {
+                'user': instance.user,
+                'lead': instance,
+                'old_status': previous_status,
+                'new_status': instance.status,
+                'changed_at': instance.updated_at.isoformat()
+            })
 
 
 @receiver(post_save, sender=Message)
@@ -59,17 +57,21 @@ def trigger_message_automations(sender, instance, created, **kwargs):
     if created and instance.direction == 'inbound':
         logger.info(f"Inbound message received: {instance.id}")
         
-        # Process inbound message (auto-reply)
-        try:
-            from messages.services import process_inbound_message
-            process_inbound_message(instance)
-        except Exception as e:
-            logger.error(f"Error processing inbound message: {str(e)}")
+        # Auto-reply, debounced so a burst of messages gets one reply
+        queue_auto_reply(instance)
         
         # Trigger automations
-        trigger_automations('message_received', {
+        enqueue_job('message_received', {
             'user': instance.user,
             'lead': instance.lead,
             'message': instance
         })
 
+
+@receiver(post_save, sender=Automation)
+@receiver(post_delete, sender=Automation)
+@receiver(post_save, sender=UserSettings)
+@receiver(post_delete, sender=UserSettings)
+def invalidate_rules(sender, instance, **kwargs):
+    """Rebuild the user's automation rule index after automations or settings change"""
+    invalidate_automation_rules(instance.user_id)
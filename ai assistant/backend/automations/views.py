@@ -56,7 +56,9 @@ def test_automation(request, pk):
         'lead': lead
     }
     
-    executor = AutomationExecutor(automation, context)
+    # Test runs are deliberate repeats, so they bypass the execution ledger; a delayed
+    # follow-up that isn't due is not scheduled for a real send
+    executor = AutomationExecutor(automation, context, use_ledger=False, schedule=False)
     success = executor.execute()
     
     if success:
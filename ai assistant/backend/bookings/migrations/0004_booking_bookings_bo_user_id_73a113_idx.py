@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_booking_property_booking_revenue'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'reminder_sent', 'start_time'], name='bookings_bo_user_id_73a113_idx'),
+        ),
+    ]
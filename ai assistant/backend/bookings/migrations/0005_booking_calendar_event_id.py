@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_booking_bookings_bo_user_id_73a113_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='calendar_event_id',
+            field=models.CharField(blank=True, help_text='Event ID in the connected calendar; set once the booking was pushed', max_length=255),
+        ),
+    ]
@@ -6,9 +6,10 @@ from django.db import models
 from django.utils import timezone
 from accounts.models import User
 from leads.models import Lead
+from core.tracking import TrackedFieldsMixin
 
 
-class Booking(models.Model):
+class Booking(TrackedFieldsMixin, models.Model):
     STATUS_CHOICES = [
         ('scheduled', 'Scheduled'),
         ('confirmed', 'Confirmed'),
@@ -17,6 +18,9 @@ class Booking(models.Model):
         ('no_show', 'No Show'),
     ]
     
+    # Fields whose changes signal handlers react to (see core.tracking)
+    tracked_fields = ('status',)
+    
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings')
     lead = models.ForeignKey(Lead, on_delete=models.CASCADE, related_name='bookings')
     
@@ -40,6 +44,7 @@ class Booking(models.Model):
     external_id = models.CharField(max_length=255, blank=True, help_text='ID from SimplyBook.me or other system')
     external_source = models.CharField(max_length=100, default='SimplyBook.me', help_text='Source system')
     crm_client_id = models.CharField(max_length=255, blank=True, help_text='Client ID in CRM system')
+    calendar_event_id = models.CharField(max_length=255, blank=True, help_text='Event ID in the connected calendar; set once the booking was pushed')
     
     # Reminders and follow-ups
     reminder_sent = models.BooleanField(default=False)
@@ -55,6 +60,10 @@ class Booking(models.Model):
     class Meta:
         ordering = ['-start_time']
         verbose_name_plural = 'Bookings'
+        indexes = [
+            # Scheduled reminder scan: unreminded bookings per user by start time
+            models.Index(fields=['user', 'reminder_sent', 'start_time']),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.lead.name} ({self.start_time})"
@@ -3,93 +3,89 @@ Signals for booking model
 Handles calendar integration and no-show tracking
 """
 
-from django.db.models.signals import post_save, post_init
+from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
 from datetime import timedelta
 from .models import Booking
-from automations.services import trigger_automations
+from automations.jobs import enqueue_job
+from automations.ingest import current_ingest
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# Automation triggers fired when a booking moves into a status
+BOOKING_STATUS_TRIGGERS = {
+    'no_show': ('no_show', 'no_show_followup'),
+    'completed': ('session_completed',),
+    'cancelled': ('booking_cancelled',),
+}
+
+
+def add_booking_to_calendar(booking, calendar=None):
+    """
+    Push a new booking to the user's calendar if configured
+    
+    The event id is stored on the booking, and a booking that already has one is
+    skipped, so a retried or re-run job doesn't create the event twice.
+    """
+    if booking.calendar_event_id:
+        return
+    try:
+        from calendar_integration.services import CalendarService
+        calendar = calendar or CalendarService(booking.user, provider='google')
+        success, event_id, error = calendar.add_booking_to_calendar(booking)
+        
+        if success:
+            if event_id:
+                # update() rather than save(): no post_save signal for bookkeeping
+                Booking.objects.filter(pk=booking.pk).update(calendar_event_id=event_id)
+                booking.calendar_event_id = event_id
+            logger.info(f"Booking {booking.id} added to calendar with event ID: {event_id}")
+        else:
+            logger.warning(f"Failed to add booking to calendar: {error}")
+    except Exception as e:
+        logger.error(f"Error adding booking to calendar: {str(e)}")
+
+
 @receiver(post_save, sender=Booking)
 def handle_booking_save(sender, instance, created, **kwargs):
     """Handle booking creation and updates"""
+    ingest = current_ingest()
+    
     if created:
         # New booking created - add to calendar
         logger.info(f"New booking created: {instance.id}")
         
+        if ingest is not None:
+            # Bulk import: calendar push and automations run in the batch job
+            ingest.booking_created(instance)
+            return
+        
         # Add to calendar if configured
-        try:
-            from calendar_integration.services import CalendarService
-            calendar = CalendarService(instance.user, provider='google')
-            success, event_id, error = calendar.add_booking_to_calendar(instance)
-            
-            if success:
-                logger.info(f"Booking {instance.id} added to calendar with event ID: {event_id}")
-            else:
-                logger.warning(f"Failed to add booking to calendar: {error}")
-        except Exception as e:
-            logger.error(f"Error adding booking to calendar: {str(e)}")
+        add_booking_to_calendar(instance)
         
         # Trigger booking_created automation
-        trigger_automations('booking_created', {
+        enqueue_job('booking_created', {
             'user': instance.user,
             'lead': instance.lead,
             'booking': instance
         })
     else:
-        # Booking updated - check for status changes
-        if hasattr(instance, '_previous_status'):
-            if instance._previous_status != instance.status:
-                logger.info(f"Booking status changed: {instance.id} ({instance._previous_status} -> {instance.status})")
-                
-                # Handle no-show
-                if instance.status == 'no_show':
-                    # Trigger no-show follow-up automation
-                    trigger_automations('no_show', {
-                        'user': instance.user,
-                        'lead': instance.lead,
-                        'booking': instance
-                    })
-                    
-                    # Also trigger no_show_followup automation type
-                    trigger_automations('no_show_followup', {
-                        'user': instance.user,
-                        'lead': instance.lead,
-                        'booking': instance
-                    })
-                
-                # Handle completion
-                elif instance.status == 'completed':
-                    # Trigger post-session follow-up
-                    trigger_automations('session_completed', {
-                        'user': instance.user,
-                        'lead': instance.lead,
-                        'booking': instance
-                    })
-                
-                # Handle cancellation
-                elif instance.status == 'cancelled':
-                    # Update CRM if needed
-                    trigger_automations('booking_cancelled', {
-                        'user': instance.user,
-                        'lead': instance.lead,
-                        'booking': instance
-                    })
-
-
-@receiver(post_init, sender=Booking)
-def store_previous_status(sender, instance, **kwargs):
-    """Store previous status to detect changes"""
-    if instance.pk:
-        try:
-            original = Booking.objects.get(pk=instance.pk)
-            instance._previous_status = original.status
-        except Booking.DoesNotExist:
-            instance._previous_status = None
-    else:
-        instance._previous_status = None
-
+        # Booking updated - check for status changes (original value captured at load time)
+        if instance.has_field_changed('status'):
+            logger.info(f"Booking status changed: {instance.id} ({instance.get_original_value('status')} -> {instance.status})")
+            
+            if ingest is not None:
+                ingest.booking_status_changed(instance)
+                return
+            
+            # no_show also triggers the no_show_followup automation type;
+            # completed triggers post-session follow-ups; cancelled updates the CRM if needed
+            for trigger in BOOKING_STATUS_TRIGGERS.get(instance.status, ()):
+                enqueue_job(trigger, {
+                    'user': instance.user,
+                    'lead': instance.lead,
+                    'booking': instance
+                })
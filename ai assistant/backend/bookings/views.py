@@ -24,8 +24,8 @@ class BookingListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        # Use only() to limit fields and prevent recursion issues
-        queryset = Booking.objects.filter(user=self.request.user).order_by('-start_time')
+        # select_related: the serializer reads lead name/email for every row
+        queryset = Booking.objects.filter(user=self.request.user).select_related('lead').order_by('-start_time')
         status_filter = self.request.query_params.get('status')
         if status_filter:
             queryset = queryset.filter(status=status_filter)
@@ -39,17 +39,7 @@ class BookingDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        # Avoid select_related to prevent recursion issues with Python 3.13
-        return Booking.objects.filter(user=self.request.user)
-    
-    def get_object(self):
-        # Manually optimize the query for detail view
-        obj = super().get_object()
-        # Prefetch lead data if needed
-        if hasattr(obj, 'lead'):
-            # Access lead to ensure it's loaded
-            _ = obj.lead.name
-        return obj
+        return Booking.objects.filter(user=self.request.user).select_related('lead')
 
 
 @api_view(['GET'])
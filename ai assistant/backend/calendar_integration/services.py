@@ -6,7 +6,7 @@ Handles calendar operations (Google Calendar, Outlook, etc.)
 import logging
 from django.conf import settings
 from datetime import datetime, timedelta
-import requests
+from core.http import get_session
 
 logger = logging.getLogger(__name__)
 
@@ -87,7 +87,7 @@ class CalendarService:
                 'Content-Type': 'application/json',
             }
             
-            response = requests.post(url, headers=headers, json=event_data, timeout=10)
+            response = get_session('google').post(url, headers=headers, json=event_data)
             
             if response.status_code == 200:
                 event = response.json()
@@ -179,7 +179,7 @@ END:VCALENDAR"""
                 'items': [{'id': 'primary'}]
             }
             
-            response = requests.post(url, headers=headers, json=data, timeout=10)
+            response = get_session('google').post(url, headers=headers, json=data)
             
             if response.status_code == 200:
                 result = response.json()
@@ -0,0 +1,17 @@
+from django.contrib import admin
+from .models import Campaign, CampaignRecipient
+
+
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'user', 'status', 'total_recipients', 'processed_count', 'sent_count', 'failed_count', 'created_at']
+    list_filter = ['status']
+    search_fields = ['name', 'user__email']
+    readonly_fields = ['created_at', 'updated_at', 'started_at', 'completed_at']
+
+
+@admin.register(CampaignRecipient)
+class CampaignRecipientAdmin(admin.ModelAdmin):
+    list_display = ['id', 'campaign', 'lead', 'channel', 'status', 'message']
+    list_filter = ['status', 'channel']
+    raw_id_fields = ['campaign', 'lead', 'message']
@@ -0,0 +1,76 @@
+from django.db import models
+from accounts.models import User
+from leads.models import Lead
+from messages.models import Message
+
+
+class Campaign(models.Model):
+    """
+    One message broadcast to a segment of a user's leads.
+    Recipients are materialized when the campaign is created; the automation
+    worker sends them in batches (see campaigns/services.py).
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='campaigns')
+    name = models.CharField(max_length=255)
+    channels = models.JSONField(default=list, help_text='Channels to send on, e.g. ["email", "sms"]')
+    segment = models.JSONField(default=dict, blank=True,
+                               help_text='Lead filters: {"status": [...], "source": [...], "service_type": [...]}')
+    message_template = models.TextField(blank=True, help_text='Message template with {lead_name}, {lead_email}')
+    ai_prompt = models.TextField(blank=True, help_text='Instructions for AI-written messages when no template is given')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+
+    # Progress
+    total_recipients = models.IntegerField(default=0)
+    processed_count = models.IntegerField(default=0)
+    sent_count = models.IntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class CampaignRecipient(models.Model):
+    """
+    One (lead, channel) a campaign sends to.
+    Moves from pending to queued in the same transaction that creates its Message,
+    so a resumed campaign never messages a lead twice.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('queued', 'Queued'),
+        ('skipped', 'Skipped'),
+    ]
+
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='recipients')
+    lead = models.ForeignKey(Lead, on_delete=models.CASCADE, related_name='campaign_recipients')
+    channel = models.CharField(max_length=20, choices=Message.CHANNEL_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'lead', 'channel'], name='unique_campaign_recipient'),
+        ]
+        indexes = [
+            # Next batch of a campaign: pending recipients in id order
+            models.Index(fields=['campaign', 'status', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.campaign_id}:{self.lead_id}:{self.channel} ({self.status})"
@@ -0,0 +1,50 @@
+from rest_framework import serializers
+from leads.models import Lead
+from messages.models import Message
+from .models import Campaign
+from .services import SEGMENT_FIELDS
+
+
+class CampaignSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Campaign
+        fields = [
+            'id', 'name', 'channels', 'segment', 'message_template', 'ai_prompt', 'status',
+            'total_recipients', 'processed_count', 'sent_count', 'failed_count',
+            'created_at', 'updated_at', 'started_at', 'completed_at'
+        ]
+        read_only_fields = (
+            'user', 'status', 'total_recipients', 'processed_count', 'sent_count', 'failed_count',
+            'created_at', 'updated_at', 'started_at', 'completed_at'
+        )
+
+    def validate_channels(self, value):
+        valid = {choice for choice, _ in Message.CHANNEL_CHOICES}
+        if not isinstance(value, list) or not value:
+            raise serializers.ValidationError('Pick at least one channel')
+        invalid = [channel for channel in value if channel not in valid]
+        if invalid:
+            raise serializers.ValidationError(f"Unknown channels: {', '.join(map(str, invalid))}")
+        return list(dict.fromkeys(value))
+
+    def validate_segment(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('Segment must be an object of lead filters')
+        unknown = set(value) - set(SEGMENT_FIELDS)
+        if unknown:
+            raise serializers.ValidationError(f"Unknown segment filters: {', '.join(sorted(unknown))}")
+        choices = {
+            'status': {choice for choice, _ in Lead.STATUS_CHOICES},
+            'service_type': {choice for choice, _ in Lead.SERVICE_TYPE_CHOICES},
+        }
+        for field, values in value.items():
+            if not isinstance(values, list):
+                raise serializers.ValidationError(f"Segment filter '{field}' must be a list")
+            if field in choices and not set(values) <= choices[field]:
+                raise serializers.ValidationError(f"Invalid values for segment filter '{field}'")
+        return value
+
+    def validate(self, attrs):
+        if not attrs.get('message_template') and not attrs.get('ai_prompt'):
+            raise serializers.ValidationError('Provide a message_template or an ai_prompt')
+        return attrs
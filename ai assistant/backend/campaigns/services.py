@@ -0,0 +1,251 @@
+"""
+Campaign Sending
+Broadcasts one message to a segment of a user's leads.
+
+    start_campaign  -> recipients materialized with one INSERT ... SELECT per
+                       channel, and a 'campaign' job queued in the bulk lane
+    run_campaign    -> (worker) renders and sends pending recipients in batches,
+                       then re-queues itself until none are left
+
+Each batch creates its Messages and marks its recipients queued in one
+transaction; the messages are created claimed and sent right away through the
+outbox (see messaging/outbox.py). A crashed worker therefore never double-sends:
+the job is retried from the recipients still pending, and messages already
+created are finished by the message relay.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+from ai_integration.gateway import generate_for
+from leads.models import ChannelIdentity, Lead
+from messages.conversations import record_messages
+from messages.models import Message
+from .models import Campaign, CampaignRecipient
+
+logger = logging.getLogger(__name__)
+
+# Lead fields a segment can filter on
+SEGMENT_FIELDS = ('status', 'source', 'service_type')
+
+# Leads a channel can reach at all; the rest are not made recipients
+CHANNEL_LEAD_FILTERS = {
+    'email': ~Q(email=''),
+    'sms': Q(phone__isnull=False) & ~Q(phone=''),
+    'whatsapp': Q(phone__isnull=False) & ~Q(phone=''),
+    # Messenger and Instagram need the lead's linked PSID / IGSID
+    'facebook': Q(Exists(ChannelIdentity.objects.filter(lead=OuterRef('pk'), channel='facebook'))),
+    'instagram': Q(Exists(ChannelIdentity.objects.filter(lead=OuterRef('pk'), channel='instagram'))),
+}
+
+
+def segment_queryset(user, segment):
+    """Leads of `user` matching a campaign segment ({field: [values]}, empty matches all)"""
+    queryset = Lead.objects.filter(user=user)
+    for field in SEGMENT_FIELDS:
+        values = (segment or {}).get(field)
+        if values:
+            queryset = queryset.filter(**{f'{field}__in': values})
+    return queryset
+
+
+def materialize_recipients(campaign):
+    """
+    Create the campaign's recipients in the database, one INSERT ... SELECT per channel
+
+    Safe to repeat: existing recipients are left alone.
+
+    Returns:
+        Total number of recipients
+    """
+    table = connection.ops.quote_name(CampaignRecipient._meta.db_table)
+    with connection.cursor() as cursor:
+        for channel in campaign.channels:
+            leads = (
+                segment_queryset(campaign.user, campaign.segment)
+                .filter(CHANNEL_LEAD_FILTERS.get(channel, Q()))
+                .order_by()
+                .values('id')
+            )
+            lead_sql, lead_params = leads.query.sql_with_params()
+            # "WHERE 1 = 1" keeps SQLite from reading ON CONFLICT as a join constraint
+            cursor.execute(
+                f"INSERT INTO {table} (campaign_id, lead_id, channel, status) "
+                f"SELECT %s, segment.id, %s, 'pending' FROM ({lead_sql}) segment WHERE 1 = 1 "
+                f"ON CONFLICT DO NOTHING",
+                [campaign.pk, channel, *lead_params],
+            )
+
+    total = CampaignRecipient.objects.filter(campaign=campaign).count()
+    Campaign.objects.filter(pk=campaign.pk).update(total_recipients=total)
+    campaign.total_recipients = total
+    return total
+
+
+def start_campaign(campaign):
+    """Materialize a new campaign's recipients and queue it for sending"""
+    from automations.jobs import enqueue_job, heartbeat
+
+    with transaction.atomic():
+        total = materialize_recipients(campaign)
+        enqueue_job('', {'user': campaign.user, 'campaign': campaign}, kind='campaign')
+    logger.info(f"Campaign {campaign.id} queued for {total} recipients")
+    return total
+
+
+def render_template(template, lead):
+    """Fill a message template for a lead"""
+    message = template.replace('{lead_name}', lead.name)
+    message = message.replace('{lead_email}', lead.email)
+    return message
+
+
+def generate_campaign_message(prompt, lead, channel):
+    """
+    Write a campaign message for one lead with AI
+
+    Returns:
+        Message text, or None if AI is unavailable (the recipient is skipped)
+    """
+    return generate_for(
+        'campaign',
+        f"{prompt}\n\nWrite this as a brief, personal {channel} message to {lead.name} ({lead.email}).",
+    )
+
+
+def render_messages(campaign, recipients):
+    """Message content per recipient (None where it could not be written); AI calls run concurrently"""
+    if campaign.message_template:
+        return [render_template(campaign.message_template, recipient.lead) for recipient in recipients]
+
+    workers = min(getattr(settings, 'AUTOMATION_GENERATION_WORKERS', 8), len(recipients))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(
+            lambda recipient: generate_campaign_message(campaign.ai_prompt, recipient.lead, recipient.channel),
+            recipients,
+        ))
+
+
+def send_batch(campaign, batch_size):
+    """
+    Render and send the next batch of pending recipients
+
+    Returns:
+        Number of recipients processed; 0 when none are left or all of the batch
+        is held by another run of the campaign
+    """
+    from messaging.outbox import claimed_fields, deliver_claimed
+
+    recipients = list(
+        CampaignRecipient.objects.filter(campaign=campaign, status='pending')
+        .select_related('lead')
+        .order_by('id')[:batch_size]
+    )
+    if not recipients:
+        return 0
+
+    contents = render_messages(campaign, recipients)
+
+    now = timezone.now()
+    with transaction.atomic():
+        # Only recipients still pending (and not locked by another run) are sent
+        pending = set(
+            CampaignRecipient.objects.select_for_update(skip_locked=True)
+            .filter(pk__in=[recipient.pk for recipient in recipients], status='pending')
+            .values_list('pk', flat=True)
+        )
+        sending = []
+        messages = []
+        for recipient, content in zip(recipients, contents):
+            if recipient.pk not in pending:
+                continue
+            if content is None:
+                recipient.status = 'skipped'
+                continue
+            message = Message(
+                user=campaign.user,
+                lead=recipient.lead,
+                channel=recipient.channel,
+                direction='outbound',
+                content=content,
+                ai_generated=not campaign.message_template,
+                automated=True,
+                timestamp=now,
+                **claimed_fields(now),
+            )
+            messages.append(message)
+            sending.append(recipient)
+        Message.objects.bulk_create(messages)
+        record_messages(messages)
+
+        for recipient, message in zip(sending, messages):
+            recipient.status = 'queued'
+            recipient.message = message
+        processed = [recipient for recipient in recipients if recipient.pk in pending]
+        CampaignRecipient.objects.bulk_update(processed, ['status', 'message'])
+    if not processed:
+        return 0
+
+    sent_count, failed_count = deliver_claimed(messages)
+
+    # Campaign messages count as contact for the no-contact automations
+    contacted = [message.lead_id for message in messages if message.status == 'sent']
+    if contacted:
+        Lead.objects.filter(pk__in=contacted).update(last_contacted=now, updated_at=now)
+
+    Campaign.objects.filter(pk=campaign.pk).update(
+        processed_count=F('processed_count') + len(processed),
+        sent_count=F('sent_count') + sent_count,
+        failed_count=F('failed_count') + failed_count,
+        updated_at=timezone.now(),
+    )
+    logger.info(f"Campaign {campaign.id} batch: {len(processed)} recipients, {sent_count} sent, {failed_count} failed")
+    return len(processed)
+
+
+def run_campaign(campaign, batch_size=None, max_batches=None):
+    """
+    Send a campaign for a while, then re-queue it if recipients are left
+
+    Bounded so one campaign holds a bulk worker thread for at most `max_batches`
+    batches; others in the bulk lane get a turn in between.
+
+    Returns:
+        True if the campaign has recipients left (a follow-up job was queued)
+    """
+    from automations.jobs import enqueue_job, heartbeat
+
+    batch_size = batch_size or getattr(settings, 'CAMPAIGN_BATCH_SIZE', 200)
+    max_batches = max_batches or getattr(settings, 'CAMPAIGN_BATCHES_PER_JOB', 25)
+
+    if campaign.status in ('completed', 'cancelled'):
+        return False
+    if campaign.status == 'pending':
+        now = timezone.now()
+        Campaign.objects.filter(pk=campaign.pk, status='pending').update(status='running', started_at=now, updated_at=now)
+
+    for _ in range(max_batches):
+        heartbeat()
+        campaign.refresh_from_db(fields=['status'])
+        if campaign.status == 'cancelled':
+            logger.info(f"Campaign {campaign.id} cancelled, stopping")
+            return False
+        if not send_batch(campaign, batch_size):
+            if CampaignRecipient.objects.filter(campaign=campaign, status='pending').exists():
+                # Another run holds the remaining recipients and finishes the campaign
+                logger.info(f"Campaign {campaign.id} is being sent by another run, stopping")
+                return False
+            now = timezone.now()
+            Campaign.objects.filter(pk=campaign.pk, status='running').update(
+                status='completed',
+                completed_at=now,
+                updated_at=now,
+            )
+            logger.info(f"Campaign {campaign.id} completed")
+            return False
+
+    enqueue_job('', {'user': campaign.user, 'campaign': campaign}, kind='campaign')
+    return True
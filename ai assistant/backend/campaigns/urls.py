@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('campaigns', views.CampaignListCreateView.as_view(), name='campaign-list'),
+    path('campaigns/<int:pk>', views.CampaignDetailView.as_view(), name='campaign-detail'),
+    path('campaigns/<int:pk>/cancel', views.cancel_campaign, name='campaign-cancel'),
+]
@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import generics, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .models import Campaign
+from .serializers import CampaignSerializer
+from .services import start_campaign
+
+
+class CampaignListCreateView(generics.ListCreateAPIView):
+    serializer_class = CampaignSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Campaign.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        # Recipients and the send job are created with the campaign, or not at all
+        with transaction.atomic():
+            campaign = serializer.save(user=self.request.user)
+            start_campaign(campaign)
+
+
+class CampaignDetailView(generics.RetrieveAPIView):
+    serializer_class = CampaignSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Campaign.objects.filter(user=self.request.user)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def cancel_campaign(request, pk):
+    """Stop a campaign; recipients not yet sent to are left out"""
+    updated = Campaign.objects.filter(
+        pk=pk, user=request.user, status__in=['pending', 'running']
+    ).update(status='cancelled', completed_at=timezone.now(), updated_at=timezone.now())
+    if not updated and not Campaign.objects.filter(pk=pk, user=request.user).exists():
+        return Response({'error': 'Campaign not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    campaign = Campaign.objects.get(pk=pk, user=request.user)
+    return Response(CampaignSerializer(campaign).data)
@@ -0,0 +1 @@
+# Shared utilities used across apps
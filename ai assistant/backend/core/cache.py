@@ -0,0 +1,160 @@
+"""
+Two-level versioned cache
+A process-local dict in front of the shared Django cache, with a version number
+per key kept in the shared cache so invalidation reaches every process.
+
+A process re-reads a key's version at most every CACHE_VERSION_CHECK_INTERVAL
+seconds, so hot lookups stay in-process and an invalidation reaches the other
+processes within that interval (the process that invalidates sees it at once).
+
+That only holds for a cache backend shared by the processes (Redis, database).
+With a process-local backend (LocMemCache) an invalidation would stay in the
+process that made it, so VersionedCache doesn't cache at all there.
+"""
+
+import time
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def cache_is_shared():
+    """False if the default cache is process-local, so other processes never see its writes"""
+    return not isinstance(caches['default'], LocMemCache)
+
+
+class VersionedCache:
+    """
+    Cache computed values per key in-process and in the shared cache
+
+    The in-process copy is used while its version is current; the version is
+    read from the shared cache at most every `version_check_interval` seconds
+    per key. `invalidate()` bumps the version, so all processes reload once they
+    next check it. Without a shared cache every lookup calls the loader.
+
+    In-process copies are also dropped after `timeout` seconds. With
+    `share_values=False` only the versions go to the shared cache; values stay
+    in-process (for values that shouldn't leave the process, e.g. credentials).
+    """
+
+    def __init__(self, namespace, timeout=3600, max_local_entries=10000, share_values=True, version_check_interval=None):
+        self.namespace = namespace
+        self.timeout = timeout
+        if version_check_interval is None:
+            version_check_interval = getattr(settings, 'CACHE_VERSION_CHECK_INTERVAL', 5)
+        self.version_check_interval = version_check_interval
+        self.share_values = share_values
+        self.max_local_entries = max_local_entries
+        self._local = {}
+
+    def _version_key(self, key):
+        return f'{self.namespace}:version:{key}'
+
+    def _value_key(self, key, version):
+        return f'{self.namespace}:{key}:{version}'
+
+    def _current_version(self, key):
+        version_key = self._version_key(key)
+        version = cache.get(version_key)
+        if version is None:
+            # Seed with a timestamp so a version evicted from the cache never
+            # resurrects a stale value stored under an old version number
+            cache.add(version_key, int(time.time() * 1000), None)
+            version = cache.get(version_key)
+        return version
+
+    def get(self, key, loader):
+        """Return the cached value for `key`, computing it with `loader()` on a miss"""
+        if not cache_is_shared():
+            return loader()
+        now = time.monotonic()
+        local = self._local.get(key)
+        if local is not None and local[2] > now and now - local[3] < self.version_check_interval:
+            return local[1]
+
+        version = self._current_version(key)
+        if local is not None and local[0] == version and local[2] > now:
+            self._local[key] = (version, local[1], local[2], now)
+            return local[1]
+
+        if self.share_values:
+            value_key = self._value_key(key, version)
+            value = cache.get(value_key)
+            if value is None:
+                value = loader()
+                cache.set(value_key, value, self.timeout)
+        else:
+            value = loader()
+
+        if len(self._local) >= self.max_local_entries:
+            self._local.clear()
+        self._local[key] = (version, value, now + self.timeout, now)
+        return value
+
+    def get_many(self, keys, loader):
+        """
+        Return cached values for several keys, computing all misses with one loader call
+
+        Args:
+            keys: Iterable of keys
+            loader: Callable taking the list of missing keys, returning a dict of key to value
+
+        Returns:
+            Dict of key to value
+        """
+        keys = list(dict.fromkeys(keys))
+        if not cache_is_shared():
+            return loader(keys) if keys else {}
+
+        now = time.monotonic()
+        values = {}
+        unchecked = []
+        for key in keys:
+            local = self._local.get(key)
+            if local is not None and local[2] > now and now - local[3] < self.version_check_interval:
+                values[key] = local[1]
+            else:
+                unchecked.append(key)
+        if not unchecked:
+            return values
+
+        versions = cache.get_many([self._version_key(key) for key in unchecked])
+        for key in unchecked:
+            if self._version_key(key) not in versions:
+                versions[self._version_key(key)] = self._current_version(key)
+
+        shared_misses = {}
+        for key in unchecked:
+            version = versions[self._version_key(key)]
+            local = self._local.get(key)
+            if local is not None and local[0] == version and local[2] > now:
+                self._local[key] = (version, local[1], local[2], now)
+                values[key] = local[1]
+            else:
+                shared_misses[self._value_key(key, version)] = (key, version)
+
+        found = cache.get_many(list(shared_misses)) if shared_misses and self.share_values else {}
+        missing = [key for value_key, (key, _) in shared_misses.items() if value_key not in found]
+        loaded = loader(missing) if missing else {}
+        if self.share_values:
+            cache.set_many(
+                {self._value_key(key, versions[self._version_key(key)]): loaded[key] for key in missing},
+                self.timeout,
+            )
+
+        if len(self._local) + len(shared_misses) > self.max_local_entries:
+            self._local.clear()
+        for value_key, (key, version) in shared_misses.items():
+            value = found[value_key] if value_key in found else loaded[key]
+            self._local[key] = (version, value, now + self.timeout, now)
+            values[key] = value
+        return values
+
+    def invalidate(self, key):
+        """Drop the value for `key` in every process (in others within version_check_interval)"""
+        self._local.pop(key, None)
+        try:
+            cache.incr(self._version_key(key))
+        except ValueError:
+            # Version not in the cache yet; nothing to invalidate
+            pass
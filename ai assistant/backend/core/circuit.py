@@ -0,0 +1,222 @@
+"""
+Circuit breakers
+Per-provider breakers shared by every worker process through the Django cache,
+so all processes act on the same picture of a provider's health.
+
+    closed     -> calls go through; outcomes are counted in time buckets
+    open       -> the failure rate over CIRCUIT_BREAKER_WINDOW seconds crossed
+                  CIRCUIT_BREAKER_FAILURE_RATE; calls are refused until the
+                  cooldown passes
+    half-open  -> after the cooldown one caller (across all processes) gets to
+                  probe; success closes the breaker, failure reopens it with
+                  twice the cooldown (up to CIRCUIT_BREAKER_MAX_COOLDOWN)
+
+Outcomes of provider HTTP calls are recorded by core.http sessions; callers
+check `allow()` before sending (see MessageSender.deliver).
+
+Calls don't touch the cache. Each process counts its own outcomes in memory and
+syncs every CIRCUIT_BREAKER_SYNC_INTERVAL seconds: it writes its counts under
+its own key (so no read-modify-write of a shared counter can lose updates, as
+with the database cache's incr), reads the other processes' counts and the
+breaker state. A process that sees the failure rate crossed syncs at once
+before opening the breaker; opening, probing and closing go straight to the
+cache.
+
+The state is only shared if the cache backend is (Redis via CACHE_URL, or the
+default database cache). With a process-local cache each process trips and
+probes on its own, which is logged once per breaker.
+"""
+
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from .cache import cache_is_shared
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 10
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker for one provider"""
+
+    def __init__(self, name):
+        self.name = name
+        self.window = getattr(settings, 'CIRCUIT_BREAKER_WINDOW', 60)
+        self.min_requests = getattr(settings, 'CIRCUIT_BREAKER_MIN_REQUESTS', 10)
+        self.failure_rate = getattr(settings, 'CIRCUIT_BREAKER_FAILURE_RATE', 0.5)
+        self.cooldown = getattr(settings, 'CIRCUIT_BREAKER_COOLDOWN', 30)
+        self.max_cooldown = getattr(settings, 'CIRCUIT_BREAKER_MAX_COOLDOWN', 600)
+        self.sync_interval = getattr(settings, 'CIRCUIT_BREAKER_SYNC_INTERVAL', 5)
+        self.process_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._lock = threading.Lock()
+        self._counts = {}        # bucket -> [successes, failures] of this process
+        self._others = {}        # bucket -> [successes, failures] of the other processes, as of the last sync
+        self._open_until = None
+        self._reset_at = 0.0     # outcomes before the last close don't count
+        self._synced_at = None
+
+    def _key(self, suffix):
+        return f'circuit:{self.name}:{suffix}'
+
+    def _buckets(self, now):
+        current = int(now // BUCKET_SECONDS)
+        return range(current - self.window // BUCKET_SECONDS + 1, current + 1)
+
+    def _first_bucket(self, now):
+        return max(self._buckets(now)[0], int(self._reset_at // BUCKET_SECONDS) + 1)
+
+    def _count(self, outcome, now):
+        bucket = int(now // BUCKET_SECONDS)
+        with self._lock:
+            counts = self._counts.setdefault(bucket, [0, 0])
+            counts[0 if outcome == 'success' else 1] += 1
+
+    def _window_counts(self, now):
+        first = self._first_bucket(now)
+        counts = {'success': 0, 'failure': 0}
+        with self._lock:
+            for source in (self._counts, self._others):
+                for bucket, (successes, failures) in source.items():
+                    if bucket >= first:
+                        counts['success'] += successes
+                        counts['failure'] += failures
+        return counts
+
+    def sync(self, now=None):
+        """Publish this process's counts and load the other processes' counts and the state"""
+        now = now or time.time()
+        first = self._first_bucket(now)
+        with self._lock:
+            self._counts = {bucket: counts for bucket, counts in self._counts.items() if bucket >= first}
+            own = {bucket: list(counts) for bucket, counts in self._counts.items()}
+
+        shared = cache.get_many([self._key('members'), self._key('open_until'), self._key('reset_at')])
+        members = {
+            member: seen for member, seen in (shared.get(self._key('members')) or {}).items()
+            if seen > now - self.window - BUCKET_SECONDS
+        }
+        if self.process_id not in members or members[self.process_id] < now - self.window / 2:
+            # Another process registering at the same time may drop this entry;
+            # the next sync puts it back
+            members[self.process_id] = now
+            cache.set(self._key('members'), members, self.window * 2)
+        cache.set(self._key(f'counts:{self.process_id}'), own, self.window + BUCKET_SECONDS)
+
+        others = {}
+        other_keys = [self._key(f'counts:{member}') for member in members if member != self.process_id]
+        for member_counts in cache.get_many(other_keys).values():
+            for bucket, (successes, failures) in member_counts.items():
+                counts = others.setdefault(bucket, [0, 0])
+                counts[0] += successes
+                counts[1] += failures
+
+        with self._lock:
+            self._others = others
+            self._open_until = shared.get(self._key('open_until'))
+            self._reset_at = max(self._reset_at, shared.get(self._key('reset_at')) or 0.0)
+            self._synced_at = now
+
+    def _refresh(self, now):
+        if self._synced_at is None or now - self._synced_at >= self.sync_interval:
+            self.sync(now)
+
+    def _open(self, now, cooldown):
+        self._open_until = now + cooldown
+        cache.set(self._key('open_until'), now + cooldown, self.max_cooldown * 2)
+        cache.set(self._key('cooldown'), cooldown, self.max_cooldown * 2)
+        cache.delete(self._key('probe'))
+        logger.warning(f"Circuit breaker for {self.name} opened for {cooldown:.0f}s")
+
+    def state(self):
+        """'closed', 'open' or 'half-open'"""
+        now = time.time()
+        self._refresh(now)
+        if self._open_until is None:
+            return 'closed'
+        return 'open' if now < self._open_until else 'half-open'
+
+    def allow(self):
+        """
+        Whether a call may be made now
+
+        While half-open only one caller is let through, as the probe.
+        """
+        now = time.time()
+        self._refresh(now)
+        if self._open_until is None:
+            return True
+        if now < self._open_until:
+            return False
+        # The probe slot expires, so a prober that died doesn't wedge the breaker
+        if not cache.add(self._key('probe'), 1, max(self.cooldown, 30)):
+            return False
+        # Got the slot; check another process didn't reopen the breaker since the last sync
+        self.sync(now)
+        if self._open_until is not None and now < self._open_until:
+            cache.delete(self._key('probe'))
+            return False
+        return True
+
+    def retry_after(self):
+        """
+        Seconds to wait before trying again, with jitter so deferred work doesn't
+        all come back at the same instant
+        """
+        remaining = max(0.0, (self._open_until or 0) - time.time())
+        return remaining + random.uniform(0, max(remaining, self.cooldown) / 2)
+
+    def record_success(self):
+        now = time.time()
+        self._count('success', now)
+        if self._open_until is not None and now >= self._open_until:
+            # Successful probe; the outage's failures no longer count against the provider
+            cache.set(self._key('reset_at'), now, self.window * 2)
+            cache.delete_many([self._key('open_until'), self._key('cooldown'), self._key('probe')])
+            with self._lock:
+                self._open_until = None
+                self._reset_at = now
+            logger.info(f"Circuit breaker for {self.name} closed")
+
+    def record_failure(self):
+        now = time.time()
+        self._count('failure', now)
+
+        if self._open_until is not None:
+            if now >= self._open_until:
+                # Failed probe: back off harder
+                cooldown = min(cache.get(self._key('cooldown'), self.cooldown) * 2, self.max_cooldown)
+                self._open(now, cooldown)
+            return
+
+        self._refresh(now)
+        if not self._tripped(now):
+            return
+        # Confirm with everyone's latest counts (and a breaker another process opened)
+        self.sync(now)
+        if self._open_until is None and self._tripped(now):
+            self._open(now, self.cooldown)
+
+    def _tripped(self, now):
+        counts = self._window_counts(now)
+        total = counts['success'] + counts['failure']
+        return total >= self.min_requests and counts['failure'] / total >= self.failure_rate
+
+
+_breakers = {}
+
+
+def get_breaker(name):
+    """Breaker for a provider ('twilio', 'meta', ...)"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name)
+        if not cache_is_shared():
+            logger.warning(f"Circuit breaker for {name} uses a process-local cache; its state is not shared between processes")
+    return breaker
@@ -0,0 +1,97 @@
+"""
+Shared HTTP client
+One keep-alive `requests.Session` per provider, with its own connection pool,
+retry policy and timeouts, so provider calls reuse TCP/TLS connections instead
+of paying DNS + handshake on every request.
+
+Retries use urllib3's Retry with exponential backoff. Idempotent methods are
+retried on connection errors and on 429/5xx responses; POST is only retried on
+connection errors, where the request never reached the provider, so a message
+is never sent twice.
+
+Every call's outcome is recorded on the provider's circuit breaker (see
+core/circuit.py): connection errors, timeouts and 429/5xx responses count as
+failures, any other response as a success.
+
+Usage:
+    from core.http import get_session
+    response = get_session('twilio').post(url, auth=auth, data=data)
+"""
+
+import threading
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .circuit import get_breaker
+
+# (connect, read) timeouts in seconds per provider
+PROVIDER_TIMEOUTS = {
+    'twilio': (3.05, 10),
+    'meta': (3.05, 10),
+    'google': (3.05, 10),
+    'simplybook': (3.05, 30),
+}
+DEFAULT_TIMEOUT = (3.05, 10)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class ProviderSession(requests.Session):
+    """Session that applies the provider's timeout and reports outcomes to its circuit breaker"""
+
+    def __init__(self, provider, timeout):
+        super().__init__()
+        self.provider = provider
+        self.timeout = timeout
+        self.breaker = get_breaker(provider)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        try:
+            response = super().request(method, url, **kwargs)
+        except requests.RequestException:
+            self.breaker.record_failure()
+            raise
+        if response.status_code in RETRY_STATUSES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+
+def build_session(provider):
+    """Create a pooled, retrying session for a provider"""
+    retry = Retry(
+        total=getattr(settings, 'HTTP_RETRY_TOTAL', 3),
+        connect=getattr(settings, 'HTTP_RETRY_TOTAL', 3),
+        backoff_factor=getattr(settings, 'HTTP_RETRY_BACKOFF', 0.3),
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=IDEMPOTENT_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=getattr(settings, 'HTTP_POOL_CONNECTIONS', 10),
+        pool_maxsize=getattr(settings, 'HTTP_POOL_MAXSIZE', 20),
+        max_retries=retry,
+    )
+    session = ProviderSession(provider, PROVIDER_TIMEOUTS.get(provider, DEFAULT_TIMEOUT))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(provider):
+    """Process-wide session for a provider ('twilio', 'meta', 'google', 'simplybook')"""
+    session = _sessions.get(provider)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(provider)
+            if session is None:
+                session = _sessions[provider] = build_session(provider)
+    return session
@@ -0,0 +1,57 @@
+"""
+Model field change tracking
+Remembers the database values of selected fields so signal handlers can detect
+changes without re-querying the row.
+"""
+
+
+class TrackedFieldsMixin:
+    """
+    Mixin for models that need to know whether a field changed since it was loaded
+
+    Usage:
+        class Lead(TrackedFieldsMixin, models.Model):
+            tracked_fields = ('status',)
+
+        # in a post_save receiver
+        if instance.has_field_changed('status'):
+            old_status = instance.get_original_value('status')
+
+    Original values are captured in from_db() as the row is loaded (no extra query)
+    and refreshed after every save, so post_save receivers still see the values the
+    row had before this save.
+    """
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._snapshot_tracked_fields()
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._snapshot_tracked_fields()
+
+    def _snapshot_tracked_fields(self):
+        # Deferred fields are not in __dict__ and are simply not tracked
+        loaded = self.__dict__
+        self._tracked_originals = {
+            name: loaded[name] for name in self.tracked_fields if name in loaded
+        }
+
+    def get_original_value(self, name):
+        """Value of a tracked field as last loaded from or saved to the database (None if unknown)"""
+        return getattr(self, '_tracked_originals', {}).get(name)
+
+    def has_field_changed(self, name):
+        """True if a tracked field differs from its loaded/saved value"""
+        originals = getattr(self, '_tracked_originals', {})
+        if name not in originals:
+            return False
+        return originals[name] != getattr(self, name)
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
@@ -53,6 +54,9 @@ INSTALLED_APPS = [
     'onboarding',
     'calendar_integration',
     'payments',
+    'campaigns',
+    'webhooks',
+    'search',
 ]
 
 MIDDLEWARE = [
@@ -180,6 +184,8 @@ SIMPLE_JWT = {
 
 # AI Settings - Using Google Gemini
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
+AI_MODEL = os.getenv('AI_MODEL', 'gemini-2.0-flash')  # model used for all generation (ai_integration/gateway.py)
+AI_REQUEST_TIMEOUT = float(os.getenv('AI_REQUEST_TIMEOUT', '20'))  # seconds per generation call, no client retries
 # Keep OpenAI for backward compatibility (optional)
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
 
@@ -195,6 +201,10 @@ EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True').lower() == 'true'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@infinitebaseagent.com')
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', '30'))  # seconds
+# Pooled SMTP connections (messaging/smtp.py): recycle after this many messages / idle seconds
+EMAIL_POOL_MAX_MESSAGES = int(os.getenv('EMAIL_POOL_MAX_MESSAGES', '100'))
+EMAIL_POOL_IDLE_TIMEOUT = int(os.getenv('EMAIL_POOL_IDLE_TIMEOUT', '60'))
 
 # SMS Settings (Twilio)
 TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID', '')
@@ -208,3 +218,113 @@ STRIPE_PUBLISHABLE_KEY = os.getenv('STRIPE_PUBLISHABLE_KEY', '')
 STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET', '')
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3000')
 
+
+# Automation job queue (processed by `manage.py run_automation_worker`)
+AUTOMATION_JOB_BATCH_SIZE = int(os.getenv('AUTOMATION_JOB_BATCH_SIZE', '10'))
+AUTOMATION_JOB_POLL_INTERVAL = float(os.getenv('AUTOMATION_JOB_POLL_INTERVAL', '1.0'))
+AUTOMATION_JOB_VISIBILITY_TIMEOUT = int(os.getenv('AUTOMATION_JOB_VISIBILITY_TIMEOUT', '300'))  # seconds
+AUTOMATION_JOB_MAX_ATTEMPTS = int(os.getenv('AUTOMATION_JOB_MAX_ATTEMPTS', '5'))
+AUTOMATION_JOB_RETRY_DELAY = int(os.getenv('AUTOMATION_JOB_RETRY_DELAY', '30'))  # seconds, doubles per attempt
+AUTOMATION_BULK_VISIBILITY_TIMEOUT = int(os.getenv('AUTOMATION_BULK_VISIBILITY_TIMEOUT', '1800'))  # seconds, bulk-lane jobs
+AUTOMATION_INTERACTIVE_CONCURRENCY = int(os.getenv('AUTOMATION_INTERACTIVE_CONCURRENCY', '4'))  # worker threads per process
+AUTOMATION_BULK_CONCURRENCY = int(os.getenv('AUTOMATION_BULK_CONCURRENCY', '1'))  # worker threads per process
+
+# Scheduled automation scanner (`manage.py run_automations [--daemon]`)
+AUTOMATION_SCAN_CHUNK_SIZE = int(os.getenv('AUTOMATION_SCAN_CHUNK_SIZE', '500'))  # due pairs per batch
+AUTOMATION_DISPATCH_BATCH_SIZE = int(os.getenv('AUTOMATION_DISPATCH_BATCH_SIZE', '200'))  # due delayed executions per batch
+AUTOMATION_DISPATCH_VISIBILITY_TIMEOUT = int(os.getenv('AUTOMATION_DISPATCH_VISIBILITY_TIMEOUT', '300'))  # seconds before a claimed execution is retried
+AUTOMATION_DISPATCH_MAX_ATTEMPTS = int(os.getenv('AUTOMATION_DISPATCH_MAX_ATTEMPTS', '3'))
+AUTOMATION_GENERATION_WORKERS = int(os.getenv('AUTOMATION_GENERATION_WORKERS', '8'))  # concurrent AI generation calls per batch
+AUTOMATION_SCHEDULER_INTERVAL = float(os.getenv('AUTOMATION_SCHEDULER_INTERVAL', '30'))  # seconds between scans with --daemon
+AUTOMATION_SCAN_ENQUEUE = os.getenv('AUTOMATION_SCAN_ENQUEUE', 'True').lower() == 'true'  # queue due pairs as bulk-lane jobs
+
+# Cache (shared across processes: automation rule index, channel profiles, circuit breakers)
+# Set CACHE_URL to a Redis URL in production, e.g. redis://localhost:6379/0.
+# Without it the database cache is used (table created by `migrate`); a
+# process-local cache (LocMemCache) would leave every worker with its own copy.
+CACHE_URL = os.getenv('CACHE_URL', '')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+CACHE_VERSION_CHECK_INTERVAL = float(os.getenv('CACHE_VERSION_CHECK_INTERVAL', '5'))  # seconds a process trusts its cached versions (core/cache.py)
+AUTOMATION_RULE_CACHE_TIMEOUT = int(os.getenv('AUTOMATION_RULE_CACHE_TIMEOUT', '3600'))  # seconds
+
+# Outbound HTTP to providers (core/http.py): per-provider keep-alive pools and retries
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '10'))  # hosts pooled per provider
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '20'))  # keep-alive connections per host
+HTTP_RETRY_TOTAL = int(os.getenv('HTTP_RETRY_TOTAL', '3'))
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', '0.3'))  # seconds, doubles per retry
+
+# Outbound message dispatcher (messaging/dispatcher.py): concurrent sends per channel / provider account
+MESSAGING_CHANNEL_CONCURRENCY = {
+    'email': int(os.getenv('MESSAGING_EMAIL_CONCURRENCY', '4')),
+    'sms': int(os.getenv('MESSAGING_SMS_CONCURRENCY', '10')),
+    'whatsapp': int(os.getenv('MESSAGING_WHATSAPP_CONCURRENCY', '10')),
+    'facebook': int(os.getenv('MESSAGING_FACEBOOK_CONCURRENCY', '5')),
+    'instagram': int(os.getenv('MESSAGING_INSTAGRAM_CONCURRENCY', '5')),
+}
+MESSAGING_ACCOUNT_CONCURRENCY = int(os.getenv('MESSAGING_ACCOUNT_CONCURRENCY', '5'))  # per SMTP login / Twilio account / page
+
+# Outbound message outbox (sent by `manage.py run_message_relay`, see messaging/outbox.py)
+MESSAGING_OUTBOX_BATCH_SIZE = int(os.getenv('MESSAGING_OUTBOX_BATCH_SIZE', '100'))
+MESSAGING_OUTBOX_POLL_INTERVAL = float(os.getenv('MESSAGING_OUTBOX_POLL_INTERVAL', '0.5'))
+MESSAGING_OUTBOX_VISIBILITY_TIMEOUT = int(os.getenv('MESSAGING_OUTBOX_VISIBILITY_TIMEOUT', '120'))  # seconds
+MESSAGING_OUTBOX_MAX_ATTEMPTS = int(os.getenv('MESSAGING_OUTBOX_MAX_ATTEMPTS', '3'))
+MESSAGING_OUTBOX_RETRY_DELAY = int(os.getenv('MESSAGING_OUTBOX_RETRY_DELAY', '30'))  # seconds, doubles per attempt
+MESSAGING_PROFILE_CACHE_TIMEOUT = int(os.getenv('MESSAGING_PROFILE_CACHE_TIMEOUT', '300'))  # seconds a process keeps a channel profile
+
+# Delivery status callbacks (POST /api/messages/twilio/status, applied by the message relay)
+TWILIO_STATUS_CALLBACK_URL = os.getenv('TWILIO_STATUS_CALLBACK_URL', '')  # public URL of the endpoint; empty: no callbacks requested
+MESSAGING_STATUS_APPLY_INTERVAL = float(os.getenv('MESSAGING_STATUS_APPLY_INTERVAL', '5'))  # seconds
+MESSAGING_STATUS_APPLY_BATCH_SIZE = int(os.getenv('MESSAGING_STATUS_APPLY_BATCH_SIZE', '5000'))
+MESSAGING_STATUS_EVENT_MAX_AGE = int(os.getenv('MESSAGING_STATUS_EVENT_MAX_AGE', '3600'))  # seconds an unmatched event is kept
+
+# Campaigns (sent by the automation worker's bulk lane)
+CAMPAIGN_BATCH_SIZE = int(os.getenv('CAMPAIGN_BATCH_SIZE', '200'))  # recipients rendered and sent per batch
+CAMPAIGN_BATCHES_PER_JOB = int(os.getenv('CAMPAIGN_BATCHES_PER_JOB', '25'))  # batches before the campaign re-queues itself
+
+# Inbound auto-replies (messages/services.py): one reply per burst of inbound messages
+AUTO_REPLY_DEBOUNCE_SECONDS = int(os.getenv('AUTO_REPLY_DEBOUNCE_SECONDS', '10'))  # quiet time before replying
+AUTO_REPLY_MAX_DELAY_SECONDS = int(os.getenv('AUTO_REPLY_MAX_DELAY_SECONDS', '60'))  # reply at the latest this long after the first message
+AUTO_REPLY_MAX_BURST = int(os.getenv('AUTO_REPLY_MAX_BURST', '10'))  # newest messages included in the prompt
+
+# Inbound webhooks (POST /api/webhooks/twilio/inbound, /api/webhooks/meta), consumed by `manage.py run_inbound_consumer`
+TWILIO_INBOUND_WEBHOOK_URL = os.getenv('TWILIO_INBOUND_WEBHOOK_URL', '')  # public URL Twilio signs; empty: the request URL
+META_APP_SECRET = os.getenv('META_APP_SECRET', '')  # verifies X-Hub-Signature-256
+META_WEBHOOK_VERIFY_TOKEN = os.getenv('META_WEBHOOK_VERIFY_TOKEN', '')  # subscription handshake
+INBOUND_CONSUMER_BATCH_SIZE = int(os.getenv('INBOUND_CONSUMER_BATCH_SIZE', '500'))
+INBOUND_CONSUMER_POLL_INTERVAL = float(os.getenv('INBOUND_CONSUMER_POLL_INTERVAL', '0.5'))
+
+# Contact frequency caps for automated messages (messaging/caps.py); 0 disables a cap
+MESSAGING_CONTACT_CAP_WINDOW_HOURS = int(os.getenv('MESSAGING_CONTACT_CAP_WINDOW_HOURS', '24'))
+MESSAGING_CONTACT_CAP_PER_LEAD = int(os.getenv('MESSAGING_CONTACT_CAP_PER_LEAD', '3'))  # messages per lead per window, all channels
+MESSAGING_CONTACT_CAP_PER_CHANNEL = {
+    'email': int(os.getenv('MESSAGING_CONTACT_CAP_EMAIL', '0')),
+    'sms': int(os.getenv('MESSAGING_CONTACT_CAP_SMS', '0')),
+    'whatsapp': int(os.getenv('MESSAGING_CONTACT_CAP_WHATSAPP', '0')),
+    'facebook': int(os.getenv('MESSAGING_CONTACT_CAP_FACEBOOK', '0')),
+    'instagram': int(os.getenv('MESSAGING_CONTACT_CAP_INSTAGRAM', '0')),
+}
+MESSAGING_CONTACT_CAP_ACTION = os.getenv('MESSAGING_CONTACT_CAP_ACTION', 'defer')  # 'defer' or 'drop' messages over a cap
+
+# Provider circuit breakers (core/circuit.py), state shared through the cache
+CIRCUIT_BREAKER_WINDOW = int(os.getenv('CIRCUIT_BREAKER_WINDOW', '60'))  # seconds of outcomes considered
+CIRCUIT_BREAKER_MIN_REQUESTS = int(os.getenv('CIRCUIT_BREAKER_MIN_REQUESTS', '10'))  # calls in the window before it can open
+CIRCUIT_BREAKER_FAILURE_RATE = float(os.getenv('CIRCUIT_BREAKER_FAILURE_RATE', '0.5'))
+CIRCUIT_BREAKER_COOLDOWN = int(os.getenv('CIRCUIT_BREAKER_COOLDOWN', '30'))  # seconds open before a probe, doubles per failed probe
+CIRCUIT_BREAKER_MAX_COOLDOWN = int(os.getenv('CIRCUIT_BREAKER_MAX_COOLDOWN', '600'))
+CIRCUIT_BREAKER_SYNC_INTERVAL = float(os.getenv('CIRCUIT_BREAKER_SYNC_INTERVAL', '5'))  # seconds between syncs of a process's counts with the shared cache
+
+# Lead channel identities (leads/identities.py)
+LEADS_DEFAULT_COUNTRY_CODE = os.getenv('LEADS_DEFAULT_COUNTRY_CODE', '1')  # for phone numbers saved without one
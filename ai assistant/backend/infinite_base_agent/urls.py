@@ -16,5 +16,8 @@ urlpatterns = [
     path('api/', include('bookings.urls')),
     path('api/', include('onboarding.urls')),
     path('api/payments/', include('payments.urls')),
+    path('api/', include('campaigns.urls')),
+    path('api/', include('webhooks.urls')),
+    path('api/', include('search.urls')),
 ]
 
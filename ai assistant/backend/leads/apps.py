@@ -5,3 +5,5 @@ class LeadsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'leads'
 
+    def ready(self):
+        import leads.signals  # Register signals
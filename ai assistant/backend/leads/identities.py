@@ -0,0 +1,191 @@
+"""
+Lead Channel Identities
+Normalized per-channel addresses of leads (ChannelIdentity), written when a lead
+is saved so sending and inbound matching never re-parse raw phone numbers.
+
+    resolve_lead(user_id, 'phone', '+1 (555) 123-4567')  -> lead id, one index lookup
+    lead_address(lead, 'facebook')                       -> PSID to send to
+
+Message channels map onto identity channels through CHANNEL_IDENTITIES (SMS and
+WhatsApp both address the lead's phone).
+"""
+
+import logging
+import re
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Identity channel addressing each message channel
+CHANNEL_IDENTITIES = {
+    'email': 'email',
+    'sms': 'phone',
+    'whatsapp': 'phone',
+    'facebook': 'facebook',
+    'instagram': 'instagram',
+}
+
+_NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_phone(raw):
+    """
+    Normalize a phone number to E.164 (+<country code><number>)
+
+    Numbers without an international prefix get LEADS_DEFAULT_COUNTRY_CODE
+    (default '1'). A 'whatsapp:' prefix is ignored.
+
+    Returns:
+        E.164 string, or None if the input doesn't look like a phone number
+    """
+    if not raw:
+        return None
+    raw = raw.strip()
+    if raw.lower().startswith('whatsapp:'):
+        raw = raw[len('whatsapp:'):].strip()
+
+    digits = _NON_DIGITS.sub('', raw)
+    if raw.startswith('+'):
+        pass
+    elif raw.startswith('00'):
+        digits = digits[2:]
+    else:
+        country_code = getattr(settings, 'LEADS_DEFAULT_COUNTRY_CODE', '1')
+        national = digits.lstrip('0') if country_code != '1' else digits
+        if not (country_code == '1' and len(digits) == 11 and digits.startswith('1')):
+            digits = country_code + national
+
+    if not 8 <= len(digits) <= 15:
+        return None
+    return f'+{digits}'
+
+
+def normalize_email(raw):
+    """Lowercased, trimmed email, or None if empty"""
+    raw = (raw or '').strip().lower()
+    return raw or None
+
+
+def normalize(channel, raw):
+    """Normalize an external id for an identity channel"""
+    if channel == 'phone':
+        return normalize_phone(raw)
+    if channel == 'email':
+        return normalize_email(raw)
+    raw = (raw or '').strip()
+    return raw or None
+
+
+def lead_field_identities(lead):
+    """Identities derived from a lead's own fields, as {channel: external_id}"""
+    identities = {}
+    phone = normalize_phone(lead.phone)
+    if phone:
+        identities['phone'] = phone
+    email = normalize_email(lead.email)
+    if email:
+        identities['email'] = email
+    return identities
+
+
+def sync_lead_identities(lead):
+    """
+    Bring a lead's phone/email identities in line with its fields
+
+    Identities already held by another lead of the same user are left with
+    that lead (first come, first served).
+    """
+    from .models import ChannelIdentity
+
+    wanted = lead_field_identities(lead)
+    with transaction.atomic():
+        ChannelIdentity.objects.filter(lead=lead, channel__in=['phone', 'email']).exclude(
+            external_id__in=list(wanted.values())
+        ).delete()
+        ChannelIdentity.objects.bulk_create(
+            [
+                ChannelIdentity(user_id=lead.user_id, lead=lead, channel=channel, external_id=external_id)
+                for channel, external_id in wanted.items()
+            ],
+            ignore_conflicts=True,
+        )
+    lead._identities = None
+
+
+def link_identity(lead, channel, external_id):
+    """
+    Record a provider id for a lead (e.g. the PSID of a Messenger contact)
+
+    Returns:
+        True if the identity now points at this lead
+    """
+    from .models import ChannelIdentity
+
+    external_id = normalize(channel, external_id)
+    if not external_id:
+        return False
+    identity, _ = ChannelIdentity.objects.get_or_create(
+        user_id=lead.user_id, channel=channel, external_id=external_id,
+        defaults={'lead': lead},
+    )
+    lead._identities = None
+    return identity.lead_id == lead.pk
+
+
+def resolve_lead(user_id, channel, raw_external_id):
+    """
+    Find the lead behind an external id
+
+    Args:
+        user_id: Owner of the lead
+        channel: Identity channel ('phone', 'email', 'facebook', 'instagram') or
+                 message channel ('sms', 'whatsapp', ...)
+        raw_external_id: Address or provider id as received
+
+    Returns:
+        Lead id, or None
+    """
+    from .models import ChannelIdentity
+
+    channel = CHANNEL_IDENTITIES.get(channel, channel)
+    external_id = normalize(channel, raw_external_id)
+    if not external_id:
+        return None
+    return (
+        ChannelIdentity.objects.filter(user_id=user_id, channel=channel, external_id=external_id)
+        .values_list('lead_id', flat=True)
+        .first()
+    )
+
+
+def preload_identities(leads):
+    """Load the identities of several leads with one query (used by lead_address)"""
+    from .models import ChannelIdentity
+
+    leads = [lead for lead in leads if getattr(lead, '_identities', None) is None]
+    if not leads:
+        return
+    by_lead = {lead.pk: {} for lead in leads}
+    rows = ChannelIdentity.objects.filter(lead_id__in=list(by_lead)).values_list('lead_id', 'channel', 'external_id')
+    for lead_id, channel, external_id in rows:
+        by_lead[lead_id][channel] = external_id
+    for lead in leads:
+        lead._identities = by_lead[lead.pk]
+
+
+def lead_address(lead, channel):
+    """
+    Address to send a message channel to for a lead
+
+    Returns:
+        Normalized external id, or None if the lead can't be reached on the channel
+    """
+    identity_channel = CHANNEL_IDENTITIES.get(channel, channel)
+    if getattr(lead, '_identities', None) is None:
+        preload_identities([lead])
+    address = lead._identities.get(identity_channel)
+    if address is None and identity_channel in ('phone', 'email'):
+        # Lead saved without identities (bulk_create, not yet backfilled)
+        address = lead_field_identities(lead).get(identity_channel)
+    return address
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0003_lead_description_of_enquiry_lead_potential_value_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['user', 'status', 'last_contacted'], name='leads_lead_user_id_292aba_idx'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:44
+
+import re
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Normalization as of this migration (leads/identities.py at the time), kept
+# here so later changes there don't change what this backfill writes
+def normalize_phone(raw):
+    if not raw:
+        return None
+    raw = raw.strip()
+    if raw.lower().startswith('whatsapp:'):
+        raw = raw[len('whatsapp:'):].strip()
+
+    digits = re.sub(r'\D', '', raw)
+    if raw.startswith('+'):
+        pass
+    elif raw.startswith('00'):
+        digits = digits[2:]
+    else:
+        country_code = getattr(settings, 'LEADS_DEFAULT_COUNTRY_CODE', '1')
+        national = digits.lstrip('0') if country_code != '1' else digits
+        if not (country_code == '1' and len(digits) == 11 and digits.startswith('1')):
+            digits = country_code + national
+
+    if not 8 <= len(digits) <= 15:
+        return None
+    return f'+{digits}'
+
+
+def lead_field_identities(lead):
+    identities = {}
+    phone = normalize_phone(lead.phone)
+    if phone:
+        identities['phone'] = phone
+    email = (lead.email or '').strip().lower()
+    if email:
+        identities['email'] = email
+    return identities
+
+
+def backfill_identities(apps, schema_editor):
+    # Index the phone/email of existing leads; where two leads of a user share an
+    # address, the older lead keeps it
+    Lead = apps.get_model('leads', 'Lead')
+    ChannelIdentity = apps.get_model('leads', 'ChannelIdentity')
+    leads = Lead.objects.order_by('id').only('id', 'user_id', 'phone', 'email')
+    batch = []
+    for lead in leads.iterator(chunk_size=2000):
+        for channel, external_id in lead_field_identities(lead).items():
+            batch.append(ChannelIdentity(user_id=lead.user_id, lead_id=lead.id, channel=channel, external_id=external_id))
+        if len(batch) >= 2000:
+            ChannelIdentity.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    ChannelIdentity.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('leads', '0004_lead_leads_lead_user_id_292aba_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChannelIdentity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(choices=[('phone', 'Phone'), ('email', 'Email'), ('facebook', 'Facebook'), ('instagram', 'Instagram')], max_length=20)),
+                ('external_id', models.CharField(help_text='Normalized address or provider user id', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('lead', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='channel_identities', to='leads.lead')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='channel_identities', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['lead', 'channel'], name='leads_chann_lead_id_6f03d1_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='channelidentity',
+            constraint=models.UniqueConstraint(fields=('user', 'channel', 'external_id'), name='unique_channel_identity'),
+        ),
+        migrations.RunPython(backfill_identities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,92 @@
+# Full-text search over leads (name, email, notes, enquiry): a weighted tsvector
+# column kept current by a trigger, backfilled in batches and indexed with GIN.
+# The trigger, backfill and index only exist on PostgreSQL; elsewhere the column
+# stays empty and search falls back to icontains (see search/services.py).
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+BATCH_SIZE = 10000
+
+LEAD_VECTOR = """
+    setweight(to_tsvector('pg_catalog.english', coalesce({row}name, '')), 'A') ||
+    setweight(to_tsvector('pg_catalog.english', coalesce({row}email, '')), 'A') ||
+    setweight(to_tsvector('pg_catalog.english', coalesce({row}description_of_enquiry, '')), 'B') ||
+    setweight(to_tsvector('pg_catalog.english', coalesce({row}notes, '')), 'C')
+"""
+
+CREATE_TRIGGER = """
+CREATE OR REPLACE FUNCTION leads_lead_search_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {vector};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS leads_lead_search_update ON leads_lead;
+CREATE TRIGGER leads_lead_search_update
+    BEFORE INSERT OR UPDATE OF name, email, notes, description_of_enquiry ON leads_lead
+    FOR EACH ROW EXECUTE PROCEDURE leads_lead_search_update();
+""".format(vector=LEAD_VECTOR.format(row='NEW.'))
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS leads_lead_search_update ON leads_lead;
+DROP FUNCTION IF EXISTS leads_lead_search_update();
+"""
+
+
+def create_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(CREATE_TRIGGER)
+        # Existing rows in id ranges, each its own transaction (the migration is not atomic)
+        cursor.execute("SELECT coalesce(max(id), 0) FROM leads_lead")
+        max_id = cursor.fetchone()[0]
+        for start in range(0, max_id, BATCH_SIZE):
+            cursor.execute(
+                f"UPDATE leads_lead SET search_vector = {LEAD_VECTOR.format(row='')} WHERE id > %s AND id <= %s",
+                [start, start + BATCH_SIZE],
+            )
+        cursor.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS leads_search_idx "
+            "ON leads_lead USING gin (search_vector)"
+        )
+
+
+def drop_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP INDEX CONCURRENTLY IF EXISTS leads_search_idx")
+        cursor.execute(DROP_TRIGGER)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('leads', '0005_channel_identity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            # The database side is done by create_search (PostgreSQL only, built concurrently)
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='lead',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='leads_search_idx'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search, drop_search),
+            ],
+        ),
+    ]
@@ -1,8 +1,11 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from accounts.models import User
+from core.tracking import TrackedFieldsMixin
 
 
-class Lead(models.Model):
+class Lead(TrackedFieldsMixin, models.Model):
     STATUS_CHOICES = [
         ('new', 'New'),
         ('contacted', 'Contacted'),
@@ -20,6 +23,9 @@ class Lead(models.Model):
         ('other', 'Other'),
     ]
 
+    # Fields whose changes signal handlers react to (see core.tracking)
+    tracked_fields = ('status', 'email', 'phone')
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leads')
     name = models.CharField(max_length=255)
     email = models.EmailField()
@@ -42,9 +48,51 @@ class Lead(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     last_contacted = models.DateTimeField(null=True, blank=True)
 
+    # Full-text search (see search/services.py); maintained by a database trigger on
+    # name, email, notes and description_of_enquiry
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='leads_search_idx'),
+            # Scheduled no-contact scan: leads per user by status and last contact
+            models.Index(fields=['user', 'status', 'last_contacted']),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.email})"
 
+
+
+class ChannelIdentity(models.Model):
+    """
+    A lead's normalized address on a channel: E.164 phone, lowercased email,
+    Facebook PSID, Instagram-scoped id.
+    Unique per user, so an inbound sender resolves to one lead with one index lookup
+    (see leads/identities.py).
+    """
+    CHANNEL_CHOICES = [
+        ('phone', 'Phone'),  # SMS and WhatsApp
+        ('email', 'Email'),
+        ('facebook', 'Facebook'),
+        ('instagram', 'Instagram'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='channel_identities')
+    lead = models.ForeignKey(Lead, on_delete=models.CASCADE, related_name='channel_identities')
+    channel = models.CharField(max_length=20, choices=CHANNEL_CHOICES)
+    external_id = models.CharField(max_length=255, help_text='Normalized address or provider user id')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'channel', 'external_id'], name='unique_channel_identity'),
+        ]
+        indexes = [
+            # Outbound addressing: a lead's identities
+            models.Index(fields=['lead', 'channel']),
+        ]
+
+    def __str__(self):
+        return f"{self.channel}:{self.external_id} -> lead {self.lead_id}"
@@ -5,6 +5,6 @@ from .models import Lead
 class LeadSerializer(serializers.ModelSerializer):
     class Meta:
         model = Lead
-        fields = '__all__'
+        exclude = ('search_vector',)
         read_only_fields = ('user', 'created_at', 'updated_at')
 
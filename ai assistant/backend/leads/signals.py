@@ -0,0 +1,16 @@
+"""
+Django signals for leads
+Keeps a lead's channel identities (identities.py) in step with its phone and email
+"""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .identities import sync_lead_identities
+from .models import Lead
+
+
+@receiver(post_save, sender=Lead)
+def sync_identities(sender, instance, created, **kwargs):
+    """Re-index the lead's phone/email identities when they are set or changed"""
+    if created or instance.has_field_changed('phone') or instance.has_field_changed('email'):
+        sync_lead_identities(instance)
@@ -4,6 +4,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from .models import Lead
 from .serializers import LeadSerializer
+from automations.ingest import bulk_ingest
 import csv
 import io
 import logging
@@ -178,108 +179,101 @@ def upload_leads_csv(request):
         # Determine starting row number (2 for CSV with header, 2 for Excel with header)
         start_row = 2
         
-        for row_num, row in enumerate(csv_reader, start=start_row):
-            try:
-                # Extract data using column mapping
-                name = find_column_value(row, column_mapping['name'])
-                email = find_column_value(row, column_mapping['email'])
+        # Lead signals are deferred; automations run as one batch job afterwards
+        with bulk_ingest():
+            for row_num, row in enumerate(csv_reader, start=start_row):
+                try:
+                    # Extract data using column mapping
+                    name = find_column_value(row, column_mapping['name'])
+                    email = find_column_value(row, column_mapping['email'])
+                    
+                    # Validate required fields
+                    if not name or not email:
+                        skipped_count += 1
+                        errors.append(f"Row {row_num}: Missing required fields (Name or Email)")
+                        continue
+                    
+                    # Check if lead already exists (by email)
+                    existing_lead = Lead.objects.filter(user=request.user, email=email).first()
+                    
+                    # Extract optional fields
+                    phone = find_column_value(row, column_mapping['phone']) or ''
+                    source = find_column_value(row, column_mapping['source']) or 'Upload'
+                    status_value = find_column_value(row, column_mapping['status']) or 'new'
+                    service_type = find_column_value(row, column_mapping['service_type']) or ''
+                    notes = find_column_value(row, column_mapping['notes']) or ''
+                    
+                    # Parse numeric fields
+                    price = None
+                    price_str = find_column_value(row, column_mapping['price'])
+                    if price_str:
+                        try:
+                            price = float(price_str.replace(',', '').replace('$', '').strip())
+                        except (ValueError, AttributeError):
+                            pass
+                    
+                    potential_value = None
+                    value_str = find_column_value(row, column_mapping['potential_value'])
+                    if value_str:
+                        try:
+                            potential_value = float(value_str.replace(',', '').replace('$', '').strip())
+                        except (ValueError, AttributeError):
+                            pass
+                    
+                    description = find_column_value(row, column_mapping['description_of_enquiry']) or ''
+                    
+                    # Validate status
+                    valid_statuses = [choice[0] for choice in Lead.STATUS_CHOICES]
+                    if status_value not in valid_statuses:
+                        status_value = 'new'
+                    
+                    # Validate service type
+                    valid_service_types = [choice[0] for choice in Lead.SERVICE_TYPE_CHOICES]
+                    if service_type and service_type not in valid_service_types:
+                        service_type = ''
+                    
+                    if existing_lead:
+                        # Update existing lead
+                        existing_lead.name = name
+                        existing_lead.phone = phone or existing_lead.phone
+                        if source and source != 'Upload':
+                            existing_lead.source = source
+                        if status_value:
+                            existing_lead.status = status_value
+                        if service_type:
+                            existing_lead.service_type = service_type
+                        if notes:
+                            existing_lead.notes = notes if not existing_lead.notes else f"{existing_lead.notes}\n{notes}"
+                        if price is not None:
+                            existing_lead.price = price
+                        if potential_value is not None:
+                            existing_lead.potential_value = potential_value
+                        if description:
+                            existing_lead.description_of_enquiry = description
+                        existing_lead.save()
+                        updated_count += 1
+                    else:
+                        # Create new lead
+                        Lead.objects.create(
+                            user=request.user,
+                            name=name,
+                            email=email,
+                            phone=phone,
+                            source=source,
+                            status=status_value,
+                            service_type=service_type,
+                            notes=notes,
+                            price=price,
+                            potential_value=potential_value,
+                            description_of_enquiry=description
+                        )
+                        # new_lead automations run in the bulk ingest batch job
+                        created_count += 1
                 
-                # Validate required fields
-                if not name or not email:
+                except Exception as e:
                     skipped_count += 1
-                    errors.append(f"Row {row_num}: Missing required fields (Name or Email)")
-                    continue
-                
-                # Check if lead already exists (by email)
-                existing_lead = Lead.objects.filter(user=request.user, email=email).first()
-                
-                # Extract optional fields
-                phone = find_column_value(row, column_mapping['phone']) or ''
-                source = find_column_value(row, column_mapping['source']) or 'Upload'
-                status_value = find_column_value(row, column_mapping['status']) or 'new'
-                service_type = find_column_value(row, column_mapping['service_type']) or ''
-                notes = find_column_value(row, column_mapping['notes']) or ''
-                
-                # Parse numeric fields
-                price = None
-                price_str = find_column_value(row, column_mapping['price'])
-                if price_str:
-                    try:
-                        price = float(price_str.replace(',', '').replace('$', '').strip())
-                    except (ValueError, AttributeError):
-                        pass
-                
-                potential_value = None
-                value_str = find_column_value(row, column_mapping['potential_value'])
-                if value_str:
-                    try:
-                        potential_value = float(value_str.replace(',', '').replace('$', '').strip())
-                    except (ValueError, AttributeError):
-                        pass
-                
-                description = find_column_value(row, column_mapping['description_of_enquiry']) or ''
-                
-                # Validate status
-                valid_statuses = [choice[0] for choice in Lead.STATUS_CHOICES]
-                if status_value not in valid_statuses:
-                    status_value = 'new'
-                
-                # Validate service type
-                valid_service_types = [choice[0] for choice in Lead.SERVICE_TYPE_CHOICES]
-                if service_type and service_type not in valid_service_types:
-                    service_type = ''
-                
-                if existing_lead:
-                    # Update existing lead
-                    existing_lead.name = name
-                    existing_lead.phone = phone or existing_lead.phone
-                    if source and source != 'Upload':
-                        existing_lead.source = source
-                    if status_value:
-                        existing_lead.status = status_value
-                    if service_type:
-                        existing_lead.service_type = service_type
-                    if notes:
-                        existing_lead.notes = notes if not existing_lead.notes else f"{existing_lead.notes}\n{notes}"
-                    if price is not None:
-                        existing_lead.price = price
-                    if potential_value is not None:
-                        existing_lead.potential_value = potential_value
-                    if description:
-                        existing_lead.description_of_enquiry = description
-                    existing_lead.save()
-                    updated_count += 1
-                else:
-                    # Create new lead
-                    lead = Lead.objects.create(
-                        user=request.user,
-                        name=name,
-                        email=email,
-                        phone=phone,
-                        source=source,
-                        status=status_value,
-                        service_type=service_type,
-                        notes=notes,
-                        price=price,
-                        potential_value=potential_value,
-                        description_of_enquiry=description
-                    )
-                    created_count += 1
-                    
-                    # Trigger automation for new leads
-                    try:
-                        from automations.services import trigger_automations
-                        trigger_automations('new_lead', {
-                            'user': request.user,
-                            'lead': lead
-                        })
-                    except Exception as e:
-                        logger.error(f"Error triggering automation for lead {lead.id}: {str(e)}")
-            
-            except Exception as e:
-                skipped_count += 1
-                errors.append(f"Row {row_num}: {str(e)}")
-                logger.error(f"Error processing row {row_num}: {str(e)}")
+                    errors.append(f"Row {row_num}: {str(e)}")
+                    logger.error(f"Error processing row {row_num}: {str(e)}")
         
         return Response({
             'success': True,
@@ -5,4 +5,6 @@ class MessagesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'messages'
     label = 'user_messages'  # Use different label to avoid conflict with Python's messages module
-
+    
+    def ready(self):
+        import messages.signals  # Register signals
@@ -0,0 +1,64 @@
+"""
+Conversations
+Keeps the Conversation table (one row per user, lead and channel) in step with
+new messages, so the inbox is a read of one page of conversations.
+
+    record_messages(messages)  -> one upsert for a batch of new messages; the
+                                  last message fields only move forward and
+                                  inbound messages add to unread_count
+
+Messages created one at a time are recorded by the Message post_save signal
+(messages/signals.py); code that bulk-creates messages calls record_messages
+itself.
+"""
+
+from django.db import connection
+from .models import Conversation
+
+SNIPPET_LENGTH = 255
+
+
+def record_messages(messages):
+    """
+    Fold new messages into their conversations with a single upsert
+
+    Args:
+        messages: Newly created Message instances
+    """
+    threads = {}
+    for message in messages:
+        key = (message.user_id, message.lead_id, message.channel)
+        thread = threads.get(key)
+        if thread is None:
+            thread = threads[key] = {'latest': message, 'unread': 0}
+        elif (message.timestamp, message.pk) >= (thread['latest'].timestamp, thread['latest'].pk):
+            thread['latest'] = message
+        if message.direction == 'inbound':
+            thread['unread'] += 1
+    if not threads:
+        return
+
+    quote = connection.ops.quote_name
+    table = quote(Conversation._meta.db_table)
+    params = []
+    for (user_id, lead_id, channel), thread in threads.items():
+        latest = thread['latest']
+        params.extend([
+            user_id, lead_id, channel,
+            connection.ops.adapt_datetimefield_value(latest.timestamp),
+            latest.content[:SNIPPET_LENGTH], latest.direction, thread['unread'],
+        ])
+    values = ', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(threads))
+    # The last message fields are only replaced by a message at least as recent
+    newer = f"EXCLUDED.last_message_at >= {table}.last_message_at"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (user_id, lead_id, channel, last_message_at, last_snippet, last_direction, unread_count) "
+            f"VALUES {values} "
+            f"ON CONFLICT (user_id, lead_id, channel) DO UPDATE SET "
+            f"last_snippet = CASE WHEN {newer} THEN EXCLUDED.last_snippet ELSE {table}.last_snippet END, "
+            f"last_direction = CASE WHEN {newer} THEN EXCLUDED.last_direction ELSE {table}.last_direction END, "
+            f"last_message_at = CASE WHEN {newer} THEN EXCLUDED.last_message_at ELSE {table}.last_message_at END, "
+            f"unread_count = {table}.unread_count + EXCLUDED.unread_count",
+            params,
+        )
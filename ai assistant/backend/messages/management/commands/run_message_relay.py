@@ -0,0 +1,101 @@
+"""
+Management command to run the message relay
+Claims queued outbound messages from the outbox and sends them in batches.
+Run several processes to scale sending; claims never overlap (SKIP LOCKED).
+Between batches it also applies staged delivery status callbacks in bulk and,
+once an hour, prunes contact cap counters that left the window.
+
+Usage:
+    python manage.py run_message_relay
+    python manage.py run_message_relay --batch-size 200 --poll-interval 0.2
+    python manage.py run_message_relay --once
+"""
+
+import signal
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.utils import timezone
+from messaging.caps import prune_contact_counters
+from messaging.delivery import apply_status_events
+from messaging.outbox import relay_batch
+
+
+class Command(BaseCommand):
+    help = 'Send queued outbound messages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'MESSAGING_OUTBOX_BATCH_SIZE', 100),
+            help='Number of messages to claim at a time (default: 100)'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=getattr(settings, 'MESSAGING_OUTBOX_POLL_INTERVAL', 0.5),
+            help='Seconds to sleep when the outbox is empty (default: 0.5)'
+        )
+        parser.add_argument(
+            '--visibility-timeout',
+            type=int,
+            default=None,
+            help='Seconds before a claimed message is handed to another relay '
+                 '(default: MESSAGING_OUTBOX_VISIBILITY_TIMEOUT)'
+        )
+        parser.add_argument(
+            '--status-interval',
+            type=float,
+            default=getattr(settings, 'MESSAGING_STATUS_APPLY_INTERVAL', 5.0),
+            help='Seconds between applying staged delivery status callbacks (default: 5)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Send a single batch and exit'
+        )
+
+    def handle(self, *args, **options):
+        stopping = threading.Event()
+        relayed = 0
+
+        def request_stop(signum, frame):
+            self.stdout.write('Stop requested, finishing current batch...')
+            stopping.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        self.stdout.write(f"Message relay started (batch size {options['batch_size']})")
+        statuses_applied_at = None
+        pruned_hour = None
+        try:
+            while not stopping.is_set():
+                close_old_connections()
+                claimed = relay_batch(
+                    batch_size=options['batch_size'],
+                    visibility_timeout=options['visibility_timeout'],
+                )
+                relayed += claimed
+
+                now = time.monotonic()
+                if statuses_applied_at is None or now - statuses_applied_at >= options['status_interval']:
+                    apply_status_events()
+                    statuses_applied_at = now
+
+                hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+                if hour != pruned_hour:
+                    prune_contact_counters(timezone.now())
+                    pruned_hour = hour
+
+                if options['once']:
+                    break
+                if not claimed:
+                    stopping.wait(options['poll_interval'])
+        finally:
+            connection.close()
+
+        self.stdout.write(self.style.SUCCESS(f'Message relay stopped after {relayed} messages'))
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:35
+
+from django.db import migrations, models
+
+
+def fail_pending_messages(apps, schema_editor):
+    # 'pending' was never a valid status; such rows were left behind by a send that
+    # died midway. Whether they went out is unknown, so don't resend them.
+    Message = apps.get_model('user_messages', 'Message')
+    Message.objects.filter(status='pending').update(
+        status='failed',
+        last_error='Left pending by a send that did not complete',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_messages', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='last_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, help_text='Claim expires at this time if the sender dies mid-send', null=True),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, help_text='Earliest time a queued message may be (re)sent; empty means now', null=True),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='send_attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('sent', 'Sent'), ('delivered', 'Delivered'), ('read', 'Read'), ('failed', 'Failed')], default='sent', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(('status__in', ['queued', 'sending'])), fields=['status', 'next_attempt_at'], name='messages_outbox_idx'),
+        ),
+        migrations.RunPython(fail_pending_messages, migrations.RunPython.noop),
+    ]
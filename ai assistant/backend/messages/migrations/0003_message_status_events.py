@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_messages', '0002_message_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider_message_id', models.CharField(db_index=True, max_length=64)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('sent', 'Sent'), ('delivered', 'Delivered'), ('read', 'Read'), ('failed', 'Failed')], max_length=20)),
+                ('error_code', models.CharField(blank=True, max_length=20)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='provider_message_id',
+            field=models.CharField(blank=True, db_index=True, help_text='Provider id (e.g. Twilio MessageSid) used to match status callbacks', max_length=64),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0005_channel_identity'),
+        ('user_messages', '0003_message_status_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='automated',
+            field=models.BooleanField(default=False, help_text='Sent by an automation, auto-reply or campaign; subject to contact caps'),
+        ),
+        migrations.CreateModel(
+            name='LeadContactCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(choices=[('email', 'Email'), ('sms', 'SMS'), ('whatsapp', 'WhatsApp'), ('facebook', 'Facebook'), ('instagram', 'Instagram')], max_length=20)),
+                ('bucket', models.DateTimeField(help_text='Start of the hour counted')),
+                ('count', models.IntegerField(default=0)),
+                ('lead', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contact_counters', to='leads.lead')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket'], name='user_messag_bucket_eeff42_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='leadcontactcounter',
+            constraint=models.UniqueConstraint(fields=('lead', 'channel', 'bucket'), name='unique_lead_contact_bucket'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_messages', '0004_contact_caps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='reply_to',
+            field=models.ForeignKey(blank=True, help_text='Latest inbound message an auto-reply answers', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='replies', to='user_messages.message'),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('sent', 'Sent'), ('delivered', 'Delivered'), ('read', 'Read'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='sent', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='messagestatusevent',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('sent', 'Sent'), ('delivered', 'Delivered'), ('read', 'Read'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], max_length=20),
+        ),
+    ]
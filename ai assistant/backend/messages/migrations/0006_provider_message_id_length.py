@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_messages', '0005_message_reply_to'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='message',
+            name='provider_message_id',
+            field=models.CharField(blank=True, db_index=True, help_text='Provider id (Twilio MessageSid, Meta mid); matches status callbacks and drops redelivered inbound webhooks', max_length=255),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_conversations(apps, schema_editor):
+    # One conversation per (user, lead, channel) with its latest message; existing
+    # history counts as read
+    Message = apps.get_model('user_messages', 'Message')
+    Conversation = apps.get_model('user_messages', 'Conversation')
+    latest_ids = list(
+        Message.objects.order_by().values('user_id', 'lead_id', 'channel')
+        .annotate(latest_id=models.Max('id'))
+        .values_list('latest_id', flat=True)
+    )
+    for start in range(0, len(latest_ids), 2000):
+        chunk = Message.objects.filter(id__in=latest_ids[start:start + 2000])
+        Conversation.objects.bulk_create([
+            Conversation(
+                user_id=message.user_id,
+                lead_id=message.lead_id,
+                channel=message.channel,
+                last_message_at=message.timestamp,
+                last_snippet=message.content[:255],
+                last_direction=message.direction,
+            )
+            for message in chunk
+        ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0005_channel_identity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('user_messages', '0006_provider_message_id_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(choices=[('email', 'Email'), ('sms', 'SMS'), ('whatsapp', 'WhatsApp'), ('facebook', 'Facebook'), ('instagram', 'Instagram')], max_length=20)),
+                ('last_message_at', models.DateTimeField()),
+                ('last_snippet', models.CharField(blank=True, max_length=255)),
+                ('last_direction', models.CharField(choices=[('inbound', 'Inbound'), ('outbound', 'Outbound')], max_length=10)),
+                ('unread_count', models.IntegerField(default=0, help_text='Inbound messages since the user last read the thread')),
+                ('lead', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations', to='leads.lead')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-last_message_at', '-id'],
+                'indexes': [models.Index(fields=['user', '-last_message_at', '-id'], name='user_messag_user_id_c9f3ab_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(fields=('user', 'lead', 'channel'), name='unique_conversation'),
+        ),
+        migrations.RunPython(backfill_conversations, migrations.RunPython.noop),
+    ]
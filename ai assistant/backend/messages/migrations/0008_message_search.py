@@ -0,0 +1,87 @@
+# Full-text search over message content: a tsvector column kept current by a
+# trigger, backfilled in batches and indexed with GIN. The trigger, backfill and
+# index only exist on PostgreSQL; elsewhere the column stays empty and search
+# falls back to icontains (see search/services.py).
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+BATCH_SIZE = 10000
+
+CREATE_TRIGGER = """
+CREATE OR REPLACE FUNCTION user_messages_message_search_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := to_tsvector('pg_catalog.english', coalesce(NEW.content, ''));
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS user_messages_message_search_update ON user_messages_message;
+CREATE TRIGGER user_messages_message_search_update
+    BEFORE INSERT OR UPDATE OF content ON user_messages_message
+    FOR EACH ROW EXECUTE PROCEDURE user_messages_message_search_update();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS user_messages_message_search_update ON user_messages_message;
+DROP FUNCTION IF EXISTS user_messages_message_search_update();
+"""
+
+
+def create_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(CREATE_TRIGGER)
+        # Existing rows in id ranges, each its own transaction (the migration is not atomic)
+        cursor.execute("SELECT coalesce(max(id), 0) FROM user_messages_message")
+        max_id = cursor.fetchone()[0]
+        for start in range(0, max_id, BATCH_SIZE):
+            cursor.execute(
+                "UPDATE user_messages_message "
+                "SET search_vector = to_tsvector('pg_catalog.english', coalesce(content, '')) "
+                "WHERE id > %s AND id <= %s",
+                [start, start + BATCH_SIZE],
+            )
+        cursor.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS messages_search_idx "
+            "ON user_messages_message USING gin (search_vector)"
+        )
+
+
+def drop_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP INDEX CONCURRENTLY IF EXISTS messages_search_idx")
+        cursor.execute(DROP_TRIGGER)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('user_messages', '0007_conversation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            # The database side is done by create_search (PostgreSQL only, built concurrently)
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='message',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='messages_search_idx'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search, drop_search),
+            ],
+        ),
+    ]
@@ -1,4 +1,7 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Q
 from accounts.models import User
 from leads.models import Lead
 
@@ -18,10 +21,13 @@ class Message(models.Model):
     ]
 
     STATUS_CHOICES = [
+        ('queued', 'Queued'),  # Outbound, waiting for the message relay
+        ('sending', 'Sending'),  # Claimed by a sender, see messaging/outbox.py
         ('sent', 'Sent'),
         ('delivered', 'Delivered'),
         ('read', 'Read'),
         ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),  # Auto-reply superseded before it was sent
     ]
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='messages')
@@ -30,12 +36,103 @@ class Message(models.Model):
     direction = models.CharField(max_length=10, choices=DIRECTION_CHOICES)
     content = models.TextField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='sent')
+    provider_message_id = models.CharField(max_length=255, blank=True, db_index=True,
+                                           help_text='Provider id (Twilio MessageSid, Meta mid); matches status callbacks '
+                                                     'and drops redelivered inbound webhooks')
     ai_generated = models.BooleanField(default=False)
+    automated = models.BooleanField(default=False, help_text='Sent by an automation, auto-reply or campaign; subject to contact caps')
     timestamp = models.DateTimeField(auto_now_add=True)
+    reply_to = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='replies',
+                                 help_text='Latest inbound message an auto-reply answers')
+
+    # Outbox bookkeeping (see messaging/outbox.py)
+    send_attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True, help_text='Earliest time a queued message may be (re)sent; empty means now')
+    locked_until = models.DateTimeField(null=True, blank=True, help_text='Claim expires at this time if the sender dies mid-send')
+    last_error = models.TextField(blank=True)
+
+    # Full-text search (see search/services.py); maintained by a database trigger on content
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='messages_search_idx'),
+            # Only unsent rows are indexed, so the relay's claim query stays small
+            models.Index(fields=['status', 'next_attempt_at'], name='messages_outbox_idx',
+                         condition=Q(status__in=['queued', 'sending'])),
+        ]
 
     def __str__(self):
         return f"{self.direction} {self.channel} to {self.lead.name}"
 
+
+
+class MessageStatusEvent(models.Model):
+    """
+    Delivery status callback waiting to be applied.
+    The callback endpoint only inserts these rows; messaging/delivery.py applies
+    them to Message.status in bulk.
+    """
+    provider_message_id = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=20, choices=Message.STATUS_CHOICES)
+    error_code = models.CharField(max_length=20, blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.provider_message_id} -> {self.status}"
+
+
+class LeadContactCounter(models.Model):
+    """
+    Outbound messages sent to a lead on a channel within one hour.
+    A lead has at most one row per channel per hour, so the contacts in a rolling
+    window are a sum over a handful of rows however long its history
+    (see messaging/caps.py).
+    """
+    lead = models.ForeignKey(Lead, on_delete=models.CASCADE, related_name='contact_counters')
+    channel = models.CharField(max_length=20, choices=Message.CHANNEL_CHOICES)
+    bucket = models.DateTimeField(help_text='Start of the hour counted')
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['lead', 'channel', 'bucket'], name='unique_lead_contact_bucket'),
+        ]
+        indexes = [
+            # Pruning of buckets that left the window
+            models.Index(fields=['bucket']),
+        ]
+
+    def __str__(self):
+        return f"lead {self.lead_id} {self.channel} @ {self.bucket:%Y-%m-%d %H:00}: {self.count}"
+
+
+class Conversation(models.Model):
+    """
+    One thread of messages with a lead on a channel, kept up to date as messages
+    are created (see messages/conversations.py) so the inbox never scans Message.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations')
+    lead = models.ForeignKey(Lead, on_delete=models.CASCADE, related_name='conversations')
+    channel = models.CharField(max_length=20, choices=Message.CHANNEL_CHOICES)
+    last_message_at = models.DateTimeField()
+    last_snippet = models.CharField(max_length=255, blank=True)
+    last_direction = models.CharField(max_length=10, choices=Message.DIRECTION_CHOICES)
+    unread_count = models.IntegerField(default=0, help_text='Inbound messages since the user last read the thread')
+
+    class Meta:
+        ordering = ['-last_message_at', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'lead', 'channel'], name='unique_conversation'),
+        ]
+        indexes = [
+            # Inbox: a user's threads, newest first (keyset pagination)
+            models.Index(fields=['user', '-last_message_at', '-id']),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} conversation with lead {self.lead_id}"
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Message
+from .models import Conversation, Message
 
 
 class MessageSerializer(serializers.ModelSerializer):
@@ -12,3 +12,14 @@ class MessageSerializer(serializers.ModelSerializer):
         fields = ['id', 'lead', 'lead_name', 'lead_email', 'channel', 'direction', 'content', 'status', 'ai_generated', 'timestamp']
         read_only_fields = ('user', 'timestamp', 'lead', 'lead_name', 'lead_email')
 
+
+class ConversationSerializer(serializers.ModelSerializer):
+    lead = serializers.IntegerField(source='lead.id', read_only=True)
+    lead_name = serializers.CharField(source='lead.name', read_only=True)
+    lead_email = serializers.CharField(source='lead.email', read_only=True)
+
+    class Meta:
+        model = Conversation
+        fields = ['id', 'lead', 'lead_name', 'lead_email', 'channel', 'last_message_at', 'last_snippet',
+                  'last_direction', 'unread_count']
+        read_only_fields = fields
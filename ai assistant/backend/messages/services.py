@@ -1,24 +1,124 @@
 """
 Message processing services
 Handles inbound message processing and auto-reply functionality
+
+Auto-replies are debounced per lead and channel (see queue_auto_reply): a burst
+of inbound messages is answered by one reply, generated with one AI call over
+the whole burst.
 """
 
 import logging
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
+from leads.models import Lead
 from messages.models import Message
-from ai_integration.views import generate_ai_response
+from ai_integration.gateway import generate_for
 from ai_integration.models import AgentActivity
-from messaging.services import MessageSender
+from messaging.outbox import claimed_fields, deliver_claimed
 
 logger = logging.getLogger(__name__)
 
 
+def queue_auto_reply(message: Message):
+    """
+    Schedule the auto-reply for an inbound message
+
+    The reply waits AUTO_REPLY_DEBOUNCE_SECONDS for further messages from the lead
+    on the channel (at most AUTO_REPLY_MAX_DELAY_SECONDS in total), then answers
+    them all at once. Replies to earlier messages that are still queued are
+    cancelled, since the new reply covers them.
+    """
+    from automations.jobs import debounce_job
+
+    cancelled = cancel_stale_replies(message.lead_id, message.channel)
+    if cancelled:
+        logger.info(f"Cancelled {cancelled} queued auto-replies to lead {message.lead_id} superseded by message {message.id}")
+    
+    return debounce_job(
+        {'user': message.user, 'message': message},
+        kind='auto_reply',
+        dedupe_key=f'auto_reply:{message.lead_id}:{message.channel}',
+        delay=getattr(settings, 'AUTO_REPLY_DEBOUNCE_SECONDS', 10),
+        max_delay=getattr(settings, 'AUTO_REPLY_MAX_DELAY_SECONDS', 60),
+    )
+
+
+def cancel_stale_replies(lead_id, channel):
+    """Cancel auto-replies to a lead on a channel that are still waiting in the outbox"""
+    return Message.objects.filter(
+        lead_id=lead_id,
+        channel=channel,
+        direction='outbound',
+        reply_to__isnull=False,
+        status='queued',
+    ).update(status='cancelled', last_error='Superseded by a newer inbound message', locked_until=None)
+
+
+def unanswered_messages(message: Message):
+    """
+    Inbound messages on the lead's channel up to `message` that no auto-reply has answered yet
+
+    Returns:
+        List of messages, oldest first (at most AUTO_REPLY_MAX_BURST of the newest)
+    """
+    answered = (
+        Message.objects.filter(
+            lead_id=message.lead_id,
+            channel=message.channel,
+            direction='outbound',
+            reply_to__isnull=False,
+        )
+        .exclude(status='cancelled')
+        .order_by('-reply_to_id')
+        .values_list('reply_to_id', flat=True)
+        .first()
+    ) or 0
+    burst = Message.objects.filter(
+        lead_id=message.lead_id,
+        channel=message.channel,
+        direction='inbound',
+        id__gt=answered,
+        id__lte=message.id,
+    ).order_by('-id')[:getattr(settings, 'AUTO_REPLY_MAX_BURST', 10)]
+    return list(reversed(burst))
+
+
+def has_newer_inbound(message: Message):
+    """True if the lead wrote again on the channel after `message` (its own reply job will answer)"""
+    return Message.objects.filter(
+        lead_id=message.lead_id,
+        channel=message.channel,
+        direction='inbound',
+        id__gt=message.id,
+    ).exists()
+
+
+def generate_reply(lead, burst):
+    """
+    Write one reply to a burst of inbound messages with AI
+    
+    Returns:
+        Reply text (a canned acknowledgement if AI is unavailable)
+    """
+    if len(burst) == 1:
+        prompt = f"Reply to this message from {lead.name} ({lead.email}): {burst[0].content}"
+    else:
+        lines = "\n".join(f"- {message.content}" for message in burst)
+        prompt = f"Reply to these messages from {lead.name} ({lead.email}), sent in quick succession:\n{lines}"
+    prompt += "\n\nWrite a brief, professional, and helpful response."
+    return generate_for('auto_reply', prompt, lead_name=lead.name)
+
+
 def process_inbound_message(message: Message):
     """
-    Process an inbound message and optionally send auto-reply
+    Send one auto-reply covering `message` and the unanswered messages before it
+    
+    Does nothing if the lead has written again since (the newer message's job
+    replies to the whole burst) or if the burst was already answered.
     
     Args:
-        message: Message model instance (must be inbound)
+        message: Message model instance (must be inbound); the latest of the burst
         
     Returns:
         Message or None: Auto-reply message if sent, None otherwise
@@ -28,68 +128,37 @@ def process_inbound_message(message: Message):
         return None
     
     try:
-        # Check if auto-reply is enabled (can be added to settings later)
-        # For now, we'll auto-reply to all inbound messages
-        
-        # Generate AI response
-        from django.test import RequestFactory
-        from rest_framework.test import force_authenticate
-        
-        # Create a mock request for AI generation
-        factory = RequestFactory()
-        request = factory.post('/api/ai/generate', {
-            'prompt': f"Reply to this message: {message.content}",
-            'context': {
-                'lead': {
-                    'id': message.lead.id,
-                    'name': message.lead.name,
-                    'email': message.lead.email
-                },
-                'conversationHistory': [
-                    {'role': 'user', 'content': message.content}
-                ]
-            }
-        })
-        request.user = message.user
+        if has_newer_inbound(message):
+            logger.info(f"Lead {message.lead_id} wrote again after message {message.id}, leaving the reply to the newer message")
+            return None
+        burst = unanswered_messages(message)
+        if not burst:
+            return None
         
-        # Generate response using AI
-        try:
-            from django.conf import settings
-            import google.generativeai as genai
-            
-            if settings.GEMINI_API_KEY:
-                genai.configure(api_key=settings.GEMINI_API_KEY)
-                model = genai.GenerativeModel('gemini-2.0-flash')
-                
-                prompt = f"Reply to this message from {message.lead.name} ({message.lead.email}): {message.content}\n\nWrite a brief, professional, and helpful response."
-                
-                response = model.generate_content(
-                    prompt,
-                    generation_config={'max_output_tokens': 200, 'temperature': 0.7}
-                )
-                
-                reply_content = response.text
-            else:
-                reply_content = f"Thank you for your message, {message.lead.name}. We'll get back to you soon!"
-        except Exception as e:
-            logger.error(f"Error generating AI response: {str(e)}")
-            reply_content = f"Thank you for your message, {message.lead.name}. We'll get back to you soon!"
+        reply_content = generate_reply(message.lead, burst)
         
-        # Create auto-reply message
-        auto_reply = Message.objects.create(
-            user=message.user,
-            lead=message.lead,
-            channel=message.channel,  # Reply on same channel
-            direction='outbound',
-            content=reply_content,
-            status='pending',
-            ai_generated=True,
-            timestamp=timezone.now()
-        )
+        with transaction.atomic():
+            # Serializes replies to the lead; the checks are repeated as generation takes a while
+            Lead.objects.select_for_update().filter(pk=message.lead_id).first()
+            if has_newer_inbound(message) or not unanswered_messages(message):
+                logger.info(f"Auto-reply to message {message.id} is stale, not sending")
+                return None
+            cancel_stale_replies(message.lead_id, message.channel)
+            auto_reply = Message.objects.create(
+                user=message.user,
+                lead=message.lead,
+                channel=message.channel,  # Reply on same channel
+                direction='outbound',
+                content=reply_content,
+                ai_generated=True,
+                automated=True,
+                reply_to=message,
+                timestamp=timezone.now(),
+                **claimed_fields()  # If this worker dies, the message relay sends it
+            )
         
         # Send the auto-reply
-        sender = MessageSender(message.user)
-        sent = sender.send_message(auto_reply)
+        sent, _ = deliver_claimed([auto_reply])
         
         if sent:
             # Log activity
@@ -101,12 +170,13 @@ def process_inbound_message(message: Message):
                 lead=message.lead,
                 details={
                     'original_message_id': message.id,
+                    'original_message_ids': [inbound.id for inbound in burst],
                     'reply_message_id': auto_reply.id,
                     'original_content': message.content[:100],
                 }
             )
             
-            logger.info(f"Auto-reply sent to {message.lead.email} via {message.channel}")
+            logger.info(f"Auto-reply to {len(burst)} messages sent to {message.lead.email} via {message.channel}")
             return auto_reply
         else:
             logger.warning(f"Failed to send auto-reply to {message.lead.email}")
@@ -117,4 +187,3 @@ def process_inbound_message(message: Message):
         import traceback
         traceback.print_exc()
         return None
-
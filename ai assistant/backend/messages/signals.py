@@ -0,0 +1,30 @@
+"""
+Django signals for messaging
+Keeps the cached channel profiles (messaging/profiles.py) in step with the
+settings and credentials they are built from, and conversations in step with
+new messages
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from onboarding.models import OnboardingStep
+from settings.models import UserSettings
+from messaging.profiles import invalidate_channel_profile
+from .conversations import record_messages
+from .models import Message
+
+
+@receiver(post_save, sender=UserSettings)
+@receiver(post_delete, sender=UserSettings)
+@receiver(post_save, sender=OnboardingStep)
+@receiver(post_delete, sender=OnboardingStep)
+def invalidate_profile(sender, instance, **kwargs):
+    """Rebuild the user's channel profile after their settings or credentials change"""
+    invalidate_channel_profile(instance.user_id)
+
+
+@receiver(post_save, sender=Message)
+def update_conversation(sender, instance, created, **kwargs):
+    """Move the message's conversation forward (bulk-created messages are recorded by their creator)"""
+    if created:
+        record_messages([instance])
@@ -3,5 +3,8 @@ from . import views
 
 urlpatterns = [
     path('messages', views.MessageListCreateView.as_view(), name='message-list'),
+    path('conversations', views.ConversationListView.as_view(), name='conversation-list'),
+    path('conversations/<int:pk>/read', views.mark_conversation_read, name='conversation-read'),
+    path('messages/twilio/status', views.twilio_status_callback, name='twilio-status-callback'),
 ]
 
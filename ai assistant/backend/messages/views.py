@@ -1,11 +1,14 @@
 from rest_framework import generics, status
 from rest_framework import serializers as drf_serializers
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from .models import Message
-from .serializers import MessageSerializer
+from .models import Conversation, Message
+from .serializers import ConversationSerializer, MessageSerializer
 from leads.models import Lead
+from django.conf import settings
+from twilio.request_validator import RequestValidator
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,8 +19,8 @@ class MessageListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        # Avoid select_related to prevent recursion issues with Python 3.13
-        queryset = Message.objects.filter(user=self.request.user).order_by('-timestamp')
+        # select_related: the serializer reads lead name/email for every row
+        queryset = Message.objects.filter(user=self.request.user).select_related('lead').order_by('-timestamp')
         lead_id = self.request.query_params.get('leadId', None)
         if lead_id:
             queryset = queryset.filter(lead_id=lead_id)
@@ -30,21 +33,65 @@ class MessageListCreateView(generics.ListCreateAPIView):
         except Lead.DoesNotExist:
             raise drf_serializers.ValidationError('Lead not found')
         
-        message = serializer.save(user=self.request.user, lead=lead, direction='outbound', status='pending')
-        
-        # Actually send the message if it's outbound
-        if message.direction == 'outbound':
-            try:
-                from messaging.services import MessageSender
-                sender = MessageSender(self.request.user)
-                sent = sender.send_message(message)
-                
-                if not sent:
-                    logger.warning(f"Failed to send message {message.id} via API")
-            except Exception as e:
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f"Error sending message: {str(e)}")
-                message.status = 'failed'
-                message.save()
+        # Committed to the outbox; the message relay sends it (see messaging/outbox.py)
+        serializer.save(user=self.request.user, lead=lead, direction='outbound', status='queued')
+
+
+class InboxPagination(CursorPagination):
+    """Keyset pagination on the inbox index: each page is one index range scan, however deep"""
+    ordering = ('-last_message_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class ConversationListView(generics.ListAPIView):
+    """Inbox: the user's conversations, most recent first (?channel=, ?unread=true)"""
+    serializer_class = ConversationSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = InboxPagination
+
+    def get_queryset(self):
+        queryset = Conversation.objects.filter(user=self.request.user).select_related('lead')
+        channel = self.request.query_params.get('channel')
+        if channel:
+            queryset = queryset.filter(channel=channel)
+        if self.request.query_params.get('unread') == 'true':
+            queryset = queryset.filter(unread_count__gt=0)
+        return queryset
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_conversation_read(request, pk):
+    """Reset a conversation's unread count"""
+    updated = Conversation.objects.filter(pk=pk, user=request.user).update(unread_count=0)
+    if not updated:
+        return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def twilio_status_callback(request):
+    """
+    Twilio delivery status callback (StatusCallback of sent SMS/WhatsApp messages)
+
+    Verifies the Twilio signature, stages the event and acknowledges right away;
+    events are applied to messages in bulk by the message relay (see messaging/delivery.py).
+    """
+    from messaging.delivery import record_twilio_status
+
+    auth_token = getattr(settings, 'TWILIO_AUTH_TOKEN', '')
+    if not auth_token:
+        return Response(status=status.HTTP_403_FORBIDDEN)
+
+    # Behind a proxy the public URL differs from the one Django sees; Twilio signs the public one
+    url = getattr(settings, 'TWILIO_STATUS_CALLBACK_URL', '') or request.build_absolute_uri()
+    signature = request.META.get('HTTP_X_TWILIO_SIGNATURE', '')
+    if not RequestValidator(auth_token).validate(url, request.POST, signature):
+        logger.warning("Rejected Twilio status callback with an invalid signature")
+        return Response(status=status.HTTP_403_FORBIDDEN)
 
+    record_twilio_status(request.POST)
+    return Response(status=status.HTTP_204_NO_CONTENT)
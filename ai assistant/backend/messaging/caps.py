@@ -0,0 +1,152 @@
+"""
+Contact Frequency Caps
+Limits how often automated messages (automations, auto-replies, campaigns) reach
+a lead, e.g. at most 3 per 24 hours overall and 2 per channel.
+
+Sends are counted in LeadContactCounter, one row per lead, channel and hour,
+upserted after each batch is sent. Checking a batch against the caps is one
+query over the leads' rows in the window, so the cost doesn't grow with a lead's
+message history.
+
+Automated messages over a cap are deferred until the oldest counted hour leaves
+the window (MESSAGING_CONTACT_CAP_ACTION = 'defer'), or failed for good ('drop').
+Messages written by the user are never held back, but count towards the caps.
+Concurrent senders may overshoot a cap by the messages they have in flight.
+"""
+
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection
+from messages.models import LeadContactCounter
+
+logger = logging.getLogger(__name__)
+
+CAP_REACHED_ERROR = 'Contact frequency cap reached'
+
+
+def _hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _window_start(now):
+    """First hour bucket inside the rolling window"""
+    hours = getattr(settings, 'MESSAGING_CONTACT_CAP_WINDOW_HOURS', 24)
+    return _hour(now) - timedelta(hours=hours - 1)
+
+
+def caps_enabled():
+    return bool(
+        getattr(settings, 'MESSAGING_CONTACT_CAP_PER_LEAD', 0)
+        or any(getattr(settings, 'MESSAGING_CONTACT_CAP_PER_CHANNEL', {}).values())
+    )
+
+
+def apply_contact_caps(messages, now):
+    """
+    Hold back automated messages that would exceed a lead's contact caps
+
+    Messages are admitted in order; held-back messages get status 'queued' with
+    `next_attempt_at` set (defer) or status 'failed' with CAP_REACHED_ERROR (drop).
+
+    Args:
+        messages: Claimed outbound messages about to be sent
+        now: Current time
+
+    Returns:
+        List of messages that may be sent now
+    """
+    capped = [message for message in messages if message.automated]
+    if not capped or not caps_enabled():
+        return list(messages)
+
+    lead_cap = getattr(settings, 'MESSAGING_CONTACT_CAP_PER_LEAD', 0)
+    channel_caps = getattr(settings, 'MESSAGING_CONTACT_CAP_PER_CHANNEL', {})
+    window_hours = getattr(settings, 'MESSAGING_CONTACT_CAP_WINDOW_HOURS', 24)
+    drop = getattr(settings, 'MESSAGING_CONTACT_CAP_ACTION', 'defer') == 'drop'
+
+    # Contacts in the window and the oldest hour counted, per lead and per (lead, channel)
+    counts = {}
+    oldest = {}
+    rows = LeadContactCounter.objects.filter(
+        lead_id__in={message.lead_id for message in capped},
+        bucket__gte=_window_start(now),
+    ).values_list('lead_id', 'channel', 'bucket', 'count')
+    for lead_id, channel, bucket, count in rows:
+        for key in (lead_id, (lead_id, channel)):
+            counts[key] = counts.get(key, 0) + count
+            if key not in oldest or bucket < oldest[key]:
+                oldest[key] = bucket
+
+    allowed = []
+    held = 0
+    for message in messages:
+        keys = (message.lead_id, (message.lead_id, message.channel))
+        if message.automated:
+            full = [
+                key for key, cap in zip(keys, (lead_cap, channel_caps.get(message.channel, 0)))
+                if cap and counts.get(key, 0) >= cap
+            ]
+            if full:
+                held += 1
+                if drop:
+                    message.status = 'failed'
+                    message.last_error = CAP_REACHED_ERROR
+                else:
+                    # Room opens up once the oldest counted hour leaves the window
+                    message.status = 'queued'
+                    message.next_attempt_at = max(oldest[key] for key in full) + timedelta(hours=window_hours)
+                continue
+        # Counted as it goes, so one batch can't put a lead over a cap either
+        for key in keys:
+            counts[key] = counts.get(key, 0) + 1
+            oldest.setdefault(key, _hour(now))
+        allowed.append(message)
+
+    if held:
+        logger.info(f"Contact caps {'dropped' if drop else 'deferred'} {held} of {len(messages)} messages")
+    return allowed
+
+
+def record_contacts(messages, now):
+    """
+    Count sent messages towards their leads' caps with one upsert
+
+    Args:
+        messages: Messages whose send result is known; only 'sent' ones are counted
+    """
+    counts = {}
+    bucket = _hour(now)
+    for message in messages:
+        if message.status == 'sent':
+            key = (message.lead_id, message.channel)
+            counts[key] = counts.get(key, 0) + 1
+    if not counts:
+        return
+
+    quote = connection.ops.quote_name
+    table = quote(LeadContactCounter._meta.db_table)
+    count_column = quote('count')
+    bucket_value = connection.ops.adapt_datetimefield_value(bucket)
+    params = []
+    for (lead_id, channel), count in counts.items():
+        params.extend([lead_id, channel, bucket_value, count])
+    values = ', '.join(['(%s, %s, %s, %s)'] * len(counts))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (lead_id, channel, bucket, {count_column}) VALUES {values} "
+            f"ON CONFLICT (lead_id, channel, bucket) DO UPDATE "
+            f"SET {count_column} = {table}.{count_column} + EXCLUDED.{count_column}",
+            params,
+        )
+
+
+def prune_contact_counters(now):
+    """
+    Delete counters for hours that left the window
+
+    Returns:
+        Number of rows deleted
+    """
+    deleted, _ = LeadContactCounter.objects.filter(bucket__lt=_window_start(now)).delete()
+    return deleted
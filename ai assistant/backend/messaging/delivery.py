@@ -0,0 +1,122 @@
+"""
+Delivery Status Updates
+Applies provider delivery callbacks (Twilio StatusCallback) to Message.status.
+
+The callback endpoint only inserts a MessageStatusEvent row and acknowledges.
+`apply_status_events()` (run periodically by the message relay) folds a batch of
+events into one UPDATE per resulting status, matched on
+Message.provider_message_id, so a burst of thousands of callbacks costs a
+handful of statements instead of one read-modify-write per event.
+
+Updates only move a message forward (sent -> delivered -> read); a late or
+duplicate callback never downgrades a status. Events arriving before the send
+result (and its provider id) is recorded are kept and retried on the next run,
+up to MESSAGING_STATUS_EVENT_MAX_AGE seconds.
+"""
+
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from messages.models import Message, MessageStatusEvent
+
+logger = logging.getLogger(__name__)
+
+# Twilio MessageStatus values that change our status; the rest (queued, accepted, sending, ...) are ignored
+TWILIO_STATUSES = {
+    'sent': 'sent',
+    'delivered': 'delivered',
+    'read': 'read',
+    'undelivered': 'failed',
+    'failed': 'failed',
+}
+
+# Statuses each callback status may replace, which keeps updates monotonic
+REPLACEABLE_STATUSES = {
+    'sent': ['queued', 'sending'],
+    'failed': ['queued', 'sending', 'sent'],
+    'delivered': ['queued', 'sending', 'sent'],
+    'read': ['queued', 'sending', 'sent', 'delivered'],
+}
+
+# When several events for one message arrive in a batch, the furthest one wins
+STATUS_RANK = {'sent': 1, 'failed': 2, 'delivered': 3, 'read': 4}
+
+
+def record_twilio_status(params):
+    """
+    Stage a Twilio status callback
+
+    Args:
+        params: Callback form parameters (MessageSid, MessageStatus, ErrorCode)
+
+    Returns:
+        The created MessageStatusEvent, or None if the callback carries nothing to apply
+    """
+    status = TWILIO_STATUSES.get(params.get('MessageStatus', ''))
+    sid = params.get('MessageSid', '')
+    if not status or not sid:
+        return None
+    return MessageStatusEvent.objects.create(
+        provider_message_id=sid,
+        status=status,
+        error_code=params.get('ErrorCode', '') or '',
+    )
+
+
+def apply_status_events(batch_size=None, max_age=None):
+    """
+    Apply one batch of staged status events to their messages
+
+    Returns:
+        Number of events consumed (applied or expired)
+    """
+    batch_size = batch_size or getattr(settings, 'MESSAGING_STATUS_APPLY_BATCH_SIZE', 5000)
+    if max_age is None:
+        max_age = getattr(settings, 'MESSAGING_STATUS_EVENT_MAX_AGE', 3600)
+
+    with transaction.atomic():
+        events = list(
+            MessageStatusEvent.objects.select_for_update(skip_locked=True)
+            .order_by('id')[:batch_size]
+        )
+        if not events:
+            return 0
+
+        # Furthest status per message
+        latest = {}
+        for event in events:
+            current = latest.get(event.provider_message_id)
+            if current is None or STATUS_RANK[event.status] >= STATUS_RANK[current.status]:
+                latest[event.provider_message_id] = event
+
+        # One UPDATE per (status, error code)
+        groups = {}
+        for sid, event in latest.items():
+            groups.setdefault((event.status, event.error_code), []).append(sid)
+        updated = 0
+        for (status, error_code), sids in groups.items():
+            updates = {'status': status}
+            if status == 'failed':
+                updates['last_error'] = f"Provider reported delivery failure (error {error_code or 'unknown'})"
+            updated += Message.objects.filter(
+                provider_message_id__in=sids,
+                status__in=REPLACEABLE_STATUSES[status],
+            ).update(**updates)
+
+        # Events for unknown ids wait for the send result to be recorded, until they expire
+        known = set(
+            Message.objects.filter(provider_message_id__in=list(latest))
+            .values_list('provider_message_id', flat=True)
+        )
+        expired_before = timezone.now() - timedelta(seconds=max_age)
+        consumed = [
+            event.id for event in events
+            if event.provider_message_id in known or event.received_at < expired_before
+        ]
+        MessageStatusEvent.objects.filter(id__in=consumed).delete()
+
+    if consumed:
+        logger.info(f"Applied {len(consumed)} status events ({updated} messages updated)")
+    return len(consumed)
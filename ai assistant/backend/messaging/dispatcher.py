@@ -0,0 +1,207 @@
+"""
+Outbound Message Dispatcher
+Sends a batch of messages concurrently instead of one blocking call after another.
+
+An asyncio event loop fans the sends out to a thread pool (the provider clients
+are blocking), bounded by two sets of limits:
+
+    MESSAGING_CHANNEL_CONCURRENCY   - per channel (email, sms, whatsapp, ...)
+    MESSAGING_ACCOUNT_CONCURRENCY   - per provider account (SMTP login, Twilio
+                                      account, Facebook page, Instagram account)
+
+With SMTP configured, the email messages of a batch are grouped by SMTP account
+and each group goes out in one pass over a thread's pooled connection (see
+MessageSender.deliver_emails), split into as many passes as the limits allow.
+
+The limits hold for the whole process: every send takes a slot from
+process-wide semaphores, shared by all batches in flight (worker threads,
+relay). Each batch also schedules no more sends than the limits at a time, so
+one batch can't fill the thread pool with sends waiting for a slot.
+
+All database reads (leads, cached channel profiles) happen up front
+in the calling thread; the send threads only talk to providers. Statuses are
+set on the instances and written back by the caller (see messaging/outbox.py).
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from leads.identities import preload_identities
+from .profiles import get_channel_profiles
+from .services import MessageSender
+from . import smtp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL_CONCURRENCY = {
+    'email': 4,
+    'sms': 10,
+    'whatsapp': 10,
+    'facebook': 5,
+    'instagram': 5,
+}
+
+# Long-lived send threads, so each keeps its pooled SMTP connection between batches
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                channel_limits = getattr(settings, 'MESSAGING_CHANNEL_CONCURRENCY', DEFAULT_CHANNEL_CONCURRENCY)
+                _pool = ThreadPoolExecutor(
+                    max_workers=max(1, sum(channel_limits.values())),
+                    thread_name_prefix='message-dispatch',
+                )
+    return _pool
+
+
+# Process-wide send slots per channel and per provider account
+_channel_slots = {}
+_account_slots = {}
+_slots_lock = threading.Lock()
+
+
+def _slot(slots, key, limit):
+    slot = slots.get(key)
+    if slot is None:
+        with _slots_lock:
+            slot = slots.get(key)
+            if slot is None:
+                slot = slots[key] = threading.BoundedSemaphore(limit)
+    return slot
+
+
+def _deliver(sender, message, channel_slot, account_slot):
+    """Send one message holding its channel and account slots (runs in a pool thread)"""
+    with channel_slot, account_slot:
+        return sender.deliver(message)
+
+
+def _deliver_emails(sender, messages, channel_slot, account_slot):
+    """Send a group of email messages over one pooled connection (runs in a pool thread)"""
+    with channel_slot, account_slot:
+        return sender.deliver_emails(messages)
+
+
+def _email_groups(messages, senders, parts):
+    """
+    Split off the email messages that can share pooled SMTP connections
+
+    Messages of users with email disabled stay single, so deliver() fails them.
+
+    Returns:
+        Tuple of (list of (account, messages) groups, remaining messages)
+    """
+    if not smtp.is_configured():
+        return [], messages
+
+    by_account = {}
+    single = []
+    for message in messages:
+        sender = senders[message.user_id]
+        if message.channel == 'email' and sender.profile.channel_enabled('email'):
+            by_account.setdefault(sender.account_key('email'), []).append(message)
+        else:
+            single.append(message)
+
+    groups = []
+    for account, account_messages in by_account.items():
+        size = -(-len(account_messages) // parts)
+        for start in range(0, len(account_messages), size):
+            groups.append((account, account_messages[start:start + size]))
+    return groups, single
+
+
+def build_senders(users):
+    """
+    One MessageSender per user with its channel profile resolved (see profiles.py)
+
+    Args:
+        users: Dict of user id to User
+    """
+    profiles = get_channel_profiles(users)
+    return {
+        user_id: MessageSender(user, profile=profiles[user_id])
+        for user_id, user in users.items()
+    }
+
+
+async def _send_all(messages, senders, pool):
+    channel_limits = getattr(settings, 'MESSAGING_CHANNEL_CONCURRENCY', DEFAULT_CHANNEL_CONCURRENCY)
+    account_limit = getattr(settings, 'MESSAGING_ACCOUNT_CONCURRENCY', 5)
+    channel_semaphores = {}
+    account_semaphores = {}
+    loop = asyncio.get_running_loop()
+
+    def limits(channel, account):
+        if channel not in channel_semaphores:
+            channel_semaphores[channel] = asyncio.Semaphore(channel_limits.get(channel, 1))
+        if account not in account_semaphores:
+            account_semaphores[account] = asyncio.Semaphore(account_limit)
+        return (
+            channel_semaphores[channel],
+            account_semaphores[account],
+            _slot(_channel_slots, channel, channel_limits.get(channel, 1)),
+            _slot(_account_slots, account, account_limit),
+        )
+
+    async def send_one(message):
+        sender = senders[message.user_id]
+        channel = message.channel
+        channel_semaphore, account_semaphore, channel_slot, account_slot = limits(channel, sender.account_key(channel))
+
+        async with channel_semaphore, account_semaphore:
+            try:
+                return int(await loop.run_in_executor(pool, _deliver, sender, message, channel_slot, account_slot))
+            except Exception as e:
+                logger.error(f"Error sending message {message.id}: {str(e)}")
+                message.status = 'failed'
+                message.last_error = str(e)
+                return 0
+
+    async def send_group(account, group):
+        sender = senders[group[0].user_id]
+        channel_semaphore, account_semaphore, channel_slot, account_slot = limits('email', account)
+
+        async with channel_semaphore, account_semaphore:
+            try:
+                return await loop.run_in_executor(pool, _deliver_emails, sender, group, channel_slot, account_slot)
+            except Exception as e:
+                logger.error(f"Error sending {len(group)} email messages: {str(e)}")
+                for message in group:
+                    message.status = 'failed'
+                    message.last_error = str(e)
+                return 0
+
+    groups, single = _email_groups(messages, senders, min(channel_limits.get('email', 1), account_limit))
+    return await asyncio.gather(
+        *(send_group(account, group) for account, group in groups),
+        *(send_one(message) for message in single),
+    )
+
+
+def send_concurrently(messages, senders):
+    """
+    Send already-loaded messages concurrently, setting their statuses (not saved)
+
+    Args:
+        messages: Message instances with `lead` loaded
+        senders: Dict of user id to MessageSender (see build_senders)
+
+    Returns:
+        Number of messages sent successfully
+    """
+    if not messages:
+        return 0
+
+    # Recipient addresses for the whole batch in one query, before the threads need them
+    preload_identities([message.lead for message in messages])
+
+    return sum(asyncio.run(_send_all(messages, senders, _get_pool())))
+
@@ -0,0 +1,248 @@
+"""
+Message Outbox
+Outbound messages are committed as `queued` rows and delivered by the message
+relay (`manage.py run_message_relay`), so request handlers never wait on a
+provider and a message is not lost if a process dies mid-send.
+
+The relay claims queued rows with SELECT ... FOR UPDATE SKIP LOCKED and marks
+them `sending` with a visibility timeout (`locked_until`); a row whose sender
+died becomes claimable again once the timeout passes. Results are written back
+with narrow bulk UPDATEs (status and bookkeeping columns only), one per outcome.
+
+Workers that already hold the message in memory (automation pipeline, inbound
+auto-replies) create it pre-claimed (see `claimed_fields`) and deliver it
+themselves with `deliver_claimed`; the relay only picks it up if they die.
+"""
+
+import logging
+import random
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from messages.models import Message
+from .caps import CAP_REACHED_ERROR, apply_contact_caps, record_contacts
+from .dispatcher import build_senders, send_concurrently
+
+logger = logging.getLogger(__name__)
+
+
+def _visibility_timeout():
+    return getattr(settings, 'MESSAGING_OUTBOX_VISIBILITY_TIMEOUT', 120)
+
+
+def claimed_fields(now=None):
+    """
+    Field values for an outbound Message created already claimed by the caller
+
+    Usage:
+        message = Message.objects.create(..., **claimed_fields())
+        deliver_claimed([message])
+    """
+    now = now or timezone.now()
+    return {
+        'status': 'sending',
+        'send_attempts': 1,
+        'locked_until': now + timedelta(seconds=_visibility_timeout()),
+    }
+
+
+def claim_messages(batch_size=100, visibility_timeout=None):
+    """
+    Claim up to `batch_size` sendable outbound messages
+
+    Sendable means queued and due, or sending with an expired visibility timeout
+    (the previous sender died). Rows locked by other relays are skipped.
+
+    Returns:
+        List of claimed Message instances with lead and user loaded
+    """
+    if visibility_timeout is None:
+        visibility_timeout = _visibility_timeout()
+
+    now = timezone.now()
+    due = Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now)
+    sendable = (Q(status='queued') & due) | Q(status='sending', locked_until__lt=now)
+
+    with transaction.atomic():
+        messages = list(
+            Message.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('lead', 'user')
+            .filter(sendable, direction='outbound')
+            .order_by('id')[:batch_size]
+        )
+        if not messages:
+            return []
+
+        # Messages whose sender died on the last allowed attempt are not sent again
+        max_attempts = getattr(settings, 'MESSAGING_OUTBOX_MAX_ATTEMPTS', 3)
+        exhausted = [message.id for message in messages if message.send_attempts >= max_attempts]
+        if exhausted:
+            Message.objects.filter(id__in=exhausted).update(
+                status='failed',
+                last_error='Visibility timeout expired on final attempt',
+                locked_until=None,
+            )
+            messages = [message for message in messages if message.id not in exhausted]
+
+        locked_until = now + timedelta(seconds=visibility_timeout)
+        Message.objects.filter(id__in=[message.id for message in messages]).update(
+            status='sending',
+            send_attempts=F('send_attempts') + 1,
+            locked_until=locked_until,
+        )
+
+    for message in messages:
+        message.status = 'sending'
+        message.send_attempts += 1
+        message.locked_until = locked_until
+    return messages
+
+
+def record_results(messages):
+    """
+    Write send results back: sent, deferred, rescheduled with backoff, or failed for good
+
+    Args:
+        messages: Claimed messages whose status was set by MessageSender.deliver
+
+    Returns:
+        Tuple of (sent_count, failed_count); failed includes deferred and rescheduled messages
+    """
+    now = timezone.now()
+    max_attempts = getattr(settings, 'MESSAGING_OUTBOX_MAX_ATTEMPTS', 3)
+    base_delay = getattr(settings, 'MESSAGING_OUTBOX_RETRY_DELAY', 30)
+
+    sent = [message for message in messages if message.status == 'sent']
+    for message in sent:
+        message.locked_until = None
+        message.last_error = ''
+    # Provider ids differ per row, so the sent rows go out as one CASE ... WHEN update
+    Message.objects.bulk_update(sent, ['status', 'provider_message_id', 'locked_until', 'last_error'])
+
+    # Not attempted (provider circuit open, contact cap reached): back to the queue at the
+    # time chosen, without using up an attempt
+    deferred = [message for message in messages if message.status == 'queued']
+    for message in deferred:
+        message.send_attempts -= 1
+        message.locked_until = None
+    Message.objects.bulk_update(deferred, ['status', 'next_attempt_at', 'send_attempts', 'locked_until'])
+
+    # One UPDATE per (outcome, attempt, error): retries of the same attempt share a backoff
+    groups = {}
+    for message in messages:
+        if message.status in ('sent', 'queued'):
+            continue
+        if message.last_error == CAP_REACHED_ERROR:
+            # Dropped by the contact caps; retrying would not help
+            groups.setdefault((False, message.send_attempts, message.last_error), []).append(message)
+            continue
+        message.last_error = message.last_error or f"Delivery via {message.channel} failed"
+        retry = message.send_attempts < max_attempts
+        groups.setdefault((retry, message.send_attempts, message.last_error), []).append(message)
+
+    for (retry, attempts, error), group in groups.items():
+        updates = {'locked_until': None, 'last_error': error[:2000]}
+        if retry:
+            delay = base_delay * (2 ** (attempts - 1))
+            delay = delay / 2 + random.uniform(0, delay / 2)  # jitter
+            updates.update(status='queued', next_attempt_at=now + timedelta(seconds=delay))
+            logger.warning(f"{len(group)} messages failed on attempt {attempts}, retrying in {delay:.0f}s: {error}")
+        else:
+            updates.update(status='failed')
+            logger.error(f"{len(group)} messages failed permanently after {attempts} attempts: {error}")
+
+        Message.objects.filter(pk__in=[message.pk for message in group]).update(**updates)
+        for message in group:
+            message.status = updates['status']
+            message.locked_until = None
+            message.next_attempt_at = updates.get('next_attempt_at', message.next_attempt_at)
+
+    return (len(sent), len(messages) - len(sent))
+
+
+def extend_claims(messages):
+    """
+    Renew the visibility timeout of messages the caller still holds
+
+    A message whose claim expired and was taken over by the relay (its
+    `locked_until` changed) is not renewed; the relay sends it.
+
+    Returns:
+        The messages whose claim was renewed
+    """
+    now = timezone.now()
+    locked_until = now + timedelta(seconds=_visibility_timeout())
+    by_claim = {}
+    for message in messages:
+        by_claim.setdefault(message.locked_until, []).append(message.id)
+
+    held = set()
+    with transaction.atomic():
+        for claimed_until, message_ids in by_claim.items():
+            held.update(
+                Message.objects.select_for_update()
+                .filter(id__in=message_ids, status='sending', locked_until=claimed_until)
+                .values_list('id', flat=True)
+            )
+        Message.objects.filter(id__in=held).update(locked_until=locked_until)
+
+    renewed = [message for message in messages if message.id in held]
+    for message in renewed:
+        message.locked_until = locked_until
+    if len(renewed) < len(messages):
+        logger.warning(f"{len(messages) - len(renewed)} claimed messages were taken over by the relay")
+    return renewed
+
+
+def deliver_claimed(messages):
+    """
+    Send claimed messages concurrently and record the results
+
+    Messages go out in slices of MESSAGING_OUTBOX_BATCH_SIZE, the batch size the
+    visibility timeout is meant for; each later slice has its claim renewed
+    first, so the relay doesn't take over messages still waiting their turn.
+    Automated messages over a lead's contact caps are held back (see messaging/caps.py).
+
+    Args:
+        messages: Claimed Message instances (lead and user loaded)
+
+    Returns:
+        Tuple of (sent_count, failed_count)
+    """
+    batch_size = getattr(settings, 'MESSAGING_OUTBOX_BATCH_SIZE', 100)
+    sent_count = failed_count = 0
+    for start in range(0, len(messages), batch_size):
+        batch = messages[start:start + batch_size]
+        if start:
+            batch = extend_claims(batch)
+        if not batch:
+            continue
+
+        for message in batch:
+            message.last_error = ''
+        now = timezone.now()
+        sending = apply_contact_caps(batch, now)
+        senders = build_senders({message.user_id: message.user for message in sending})
+        send_concurrently(sending, senders)
+        record_contacts(sending, now)
+        sent, failed = record_results(batch)
+        sent_count += sent
+        failed_count += failed
+    return (sent_count, failed_count)
+
+
+def relay_batch(batch_size=None, visibility_timeout=None):
+    """
+    Claim and send one batch of queued messages
+
+    Returns:
+        Number of messages claimed
+    """
+    batch_size = batch_size or getattr(settings, 'MESSAGING_OUTBOX_BATCH_SIZE', 100)
+    messages = claim_messages(batch_size=batch_size, visibility_timeout=visibility_timeout)
+    if messages:
+        sent_count, failed_count = deliver_claimed(messages)
+        logger.info(f"Relayed {len(messages)} messages: {sent_count} sent, {failed_count} failed")
+    return len(messages)
@@ -0,0 +1,83 @@
+"""
+Channel Profiles
+Per-user sending configuration resolved once: channel toggles and providers from
+UserSettings, social credentials from OnboardingStep.
+
+Profiles are cached in-process and invalidated by UserSettings and OnboardingStep
+save/delete signals (see messages/signals.py) through versions kept in the shared
+cache (see core/cache.py), so building a MessageSender costs no credential
+queries in the common case. Profiles hold access tokens, so the profiles
+themselves are never written to the shared cache.
+"""
+
+from django.conf import settings
+from core.cache import VersionedCache
+
+CHANNELS = ('email', 'sms', 'whatsapp', 'facebook', 'instagram')
+
+_profile_cache = VersionedCache(
+    'channel_profiles',
+    timeout=getattr(settings, 'MESSAGING_PROFILE_CACHE_TIMEOUT', 300),
+    share_values=False,
+)
+
+
+class ChannelProfile:
+    """Resolved sending configuration for one user"""
+
+    def __init__(self, user_id, user_settings=None, onboarding=None):
+        """
+        Args:
+            user_id: User the profile belongs to
+            user_settings: The user's UserSettings, or None if they have none
+            onboarding: The user's OnboardingStep, or None if they have none
+        """
+        self.user_id = user_id
+        self.has_settings = user_settings is not None
+        self.has_onboarding = onboarding is not None
+
+        # Without UserSettings every channel is enabled
+        self.enabled = {channel: getattr(user_settings, f'{channel}_enabled', True) for channel in CHANNELS}
+        self.providers = {channel: getattr(user_settings, f'{channel}_provider', '') for channel in CHANNELS}
+
+        self.facebook_page_id = getattr(onboarding, 'facebook_page_id', '')
+        self.facebook_access_token = getattr(onboarding, 'facebook_access_token', '')
+        self.instagram_account_id = getattr(onboarding, 'instagram_account_id', '')
+        self.instagram_access_token = getattr(onboarding, 'instagram_access_token', '')
+
+    def channel_enabled(self, channel):
+        """Check if a channel is enabled (unknown channels are)"""
+        return self.enabled.get(channel, True)
+
+
+def load_channel_profiles(user_ids):
+    """
+    Build profiles from the database, two queries for any number of users
+
+    Returns:
+        Dict of user id to ChannelProfile
+    """
+    from onboarding.models import OnboardingStep
+    from settings.models import UserSettings
+
+    user_settings = {row.user_id: row for row in UserSettings.objects.filter(user_id__in=user_ids)}
+    onboarding = {row.user_id: row for row in OnboardingStep.objects.filter(user_id__in=user_ids)}
+    return {
+        user_id: ChannelProfile(user_id, user_settings.get(user_id), onboarding.get(user_id))
+        for user_id in user_ids
+    }
+
+
+def get_channel_profiles(user_ids):
+    """Cached profiles for several users (dict of user id to ChannelProfile)"""
+    return _profile_cache.get_many(user_ids, load_channel_profiles)
+
+
+def get_channel_profile(user_id):
+    """Cached profile for one user"""
+    return _profile_cache.get(user_id, lambda: load_channel_profiles([user_id])[user_id])
+
+
+def invalidate_channel_profile(user_id):
+    """Drop a user's cached profile in every process"""
+    _profile_cache.invalidate(user_id)
@@ -4,29 +4,51 @@ Handles actual sending of messages via different channels (email, SMS, WhatsApp,
 """
 
 import logging
-from django.core.mail import send_mail
+from datetime import timedelta
+from django.core.mail import EmailMessage, send_mail
 from django.conf import settings
+from django.utils import timezone
+from leads.identities import lead_address
 from messages.models import Message
-from settings.models import UserSettings
-import requests
+from .profiles import get_channel_profile
+from .smtp import get_pooled_connection
+from core.circuit import get_breaker
+from core.http import get_session
 
 logger = logging.getLogger(__name__)
 
+# Provider behind each channel that has a circuit breaker (see core/circuit.py)
+CHANNEL_PROVIDERS = {
+    'sms': 'twilio',
+    'whatsapp': 'twilio',
+    'facebook': 'meta',
+    'instagram': 'meta',
+}
+
 
 class MessageSender:
     """Service for sending messages through different channels"""
     
-    def __init__(self, user):
+    def __init__(self, user, profile=None):
+        """
+        Args:
+            user: Sending user
+            profile: The user's ChannelProfile (cached lookup when not given, see profiles.py)
+        """
         self.user = user
-        self.settings = None
-        try:
-            self.settings = UserSettings.objects.get(user=user)
-        except UserSettings.DoesNotExist:
-            pass
+        self.profile = profile or get_channel_profile(user.pk)
+    
+    def _channel_enabled(self, channel):
+        """Check if channel is enabled in user settings"""
+        return self.profile.channel_enabled(channel)
     
-    def send_message(self, message: Message):
+    def deliver(self, message: Message):
         """
-        Send a message through the appropriate channel
+        Send a message through the appropriate channel without saving it
+        
+        Sets `message.status` to 'sent' or 'failed'. While the channel's provider
+        circuit breaker is open the send is not attempted: the message goes back to
+        'queued' with `next_attempt_at` set, for the outbox to send later.
         
         Args:
             message: Message model instance
@@ -35,19 +57,19 @@ class MessageSender:
             bool: True if sent successfully, False otherwise
         """
         # Check if channel is enabled
-        if self.settings:
-            channel_enabled = {
-                'email': self.settings.email_enabled,
-                'sms': self.settings.sms_enabled,
-                'whatsapp': self.settings.whatsapp_enabled,
-                'facebook': self.settings.facebook_enabled,
-                'instagram': self.settings.instagram_enabled,
-            }
-            
-            if not channel_enabled.get(message.channel, True):
-                logger.info(f"Channel {message.channel} is disabled for user {self.user.email}")
-                message.status = 'failed'
-                message.save()
+        if not self._channel_enabled(message.channel):
+            logger.info(f"Channel {message.channel} is disabled for user {self.user.email}")
+            message.status = 'failed'
+            return False
+        
+        provider = CHANNEL_PROVIDERS.get(message.channel)
+        if provider:
+            breaker = get_breaker(provider)
+            if not breaker.allow():
+                retry_after = breaker.retry_after()
+                logger.info(f"{provider} circuit open, deferring message {message.id} by {retry_after:.0f}s")
+                message.status = 'queued'
+                message.next_attempt_at = timezone.now() + timedelta(seconds=retry_after)
                 return False
         
         # Route to appropriate channel handler
@@ -64,65 +86,87 @@ class MessageSender:
         else:
             logger.warning(f"Unknown channel: {message.channel}")
             message.status = 'failed'
-            message.save()
             return False
     
+    def account_key(self, channel):
+        """
+        Identify the provider account a channel sends through
+        
+        Used to cap concurrent sends per account (see messaging/dispatcher.py).
+        """
+        if channel == 'email':
+            return ('smtp', getattr(settings, 'EMAIL_HOST', ''), getattr(settings, 'EMAIL_HOST_USER', ''))
+        if channel in ('sms', 'whatsapp'):
+            return ('twilio', getattr(settings, 'TWILIO_ACCOUNT_SID', ''))
+        if channel == 'facebook' and self.profile.facebook_page_id:
+            return ('facebook', self.profile.facebook_page_id)
+        if channel == 'instagram' and self.profile.instagram_account_id:
+            return ('instagram', self.profile.instagram_account_id)
+        return (channel, None)
+    
+    def deliver_emails(self, messages):
+        """
+        Send email messages over the calling thread's pooled SMTP connection in one pass
+        
+        Sets `message.status` (and `last_error` on failure) like deliver; without
+        SMTP configured they go through the console backend one by one.
+        
+        Returns:
+            Number of messages sent successfully
+        """
+        connection = get_pooled_connection()
+        if connection is None:
+            return sum(1 for message in messages if self._send_email(message))
+        
+        from_email = getattr(settings, 'EMAIL_HOST_USER', '')
+        subject = f'Message from {settings.DEFAULT_FROM_EMAIL}'
+        email_messages = [
+            EmailMessage(subject=subject, body=message.content, from_email=from_email, to=[message.lead.email])
+            for message in messages
+        ]
+        
+        try:
+            results = connection.send_each(email_messages)
+        except Exception as e:
+            logger.error(f"Error sending email batch: {str(e)}")
+            results = [False] * len(messages)
+        
+        for message, sent in zip(messages, results):
+            if sent:
+                message.status = 'sent'
+            else:
+                message.status = 'failed'
+                message.last_error = 'SMTP server did not accept the message'
+        sent_count = sum(1 for sent in results if sent)
+        logger.info(f"Sent {sent_count}/{len(messages)} emails via pooled SMTP connection")
+        return sent_count
+    
     def _send_email(self, message: Message):
         """Send email via SMTP"""
+        # If SMTP is configured, use the pooled connection
+        if get_pooled_connection() is not None:
+            return self.deliver_emails([message]) == 1
+        
         try:
             lead = message.lead
             
-            # Get email settings
-            email_host = getattr(settings, 'EMAIL_HOST', None)
-            email_port = getattr(settings, 'EMAIL_PORT', 587)
-            email_use_tls = getattr(settings, 'EMAIL_USE_TLS', True)
-            email_host_user = getattr(settings, 'EMAIL_HOST_USER', '')
-            email_host_password = getattr(settings, 'EMAIL_HOST_PASSWORD', '')
+            # Fallback to console backend (development)
+            send_mail(
+                subject=f'Message from Infinite Base Agent',
+                message=message.content,
+                from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@infinitebaseagent.com'),
+                recipient_list=[lead.email],
+                fail_silently=False,
+            )
             
-            # If SMTP is configured, use it
-            if email_host and email_host_user and email_host_password:
-                from django.core.mail import get_connection
-                connection = get_connection(
-                    host=email_host,
-                    port=email_port,
-                    username=email_host_user,
-                    password=email_host_password,
-                    use_tls=email_use_tls,
-                )
-                
-                send_mail(
-                    subject=f'Message from {settings.DEFAULT_FROM_EMAIL}',
-                    message=message.content,
-                    from_email=email_host_user,
-                    recipient_list=[lead.email],
-                    connection=connection,
-                    fail_silently=False,
-                )
-                
-                message.status = 'sent'
-                message.save()
-                logger.info(f"Email sent to {lead.email} via SMTP")
-                return True
-            else:
-                # Fallback to console backend (development)
-                send_mail(
-                    subject=f'Message from Infinite Base Agent',
-                    message=message.content,
-                    from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@infinitebaseagent.com'),
-                    recipient_list=[lead.email],
-                    fail_silently=False,
-                )
-                
-                message.status = 'sent'
-                message.save()
-                logger.info(f"Email sent to {lead.email} (console backend)")
-                print(f"\n[EMAIL SENT] To: {lead.email}\nSubject: Message from Infinite Base Agent\nContent: {message.content}\n")
-                return True
+            message.status = 'sent'
+            logger.info(f"Email sent to {lead.email} (console backend)")
+            print(f"\n[EMAIL SENT] To: {lead.email}\nSubject: Message from Infinite Base Agent\nContent: {message.content}\n")
+            return True
                 
         except Exception as e:
             logger.error(f"Error sending email: {str(e)}")
             message.status = 'failed'
-            message.save()
             return False
     
     def _send_sms(self, message: Message):
@@ -138,13 +182,12 @@ class MessageSender:
             if not all([twilio_account_sid, twilio_auth_token, twilio_phone_number]):
                 logger.warning("Twilio not configured. SMS not sent.")
                 message.status = 'failed'
-                message.save()
                 return False
             
-            if not lead.phone:
+            phone = lead_address(lead, 'sms')
+            if not phone:
                 logger.warning(f"No phone number for lead {lead.id}")
                 message.status = 'failed'
-                message.save()
                 return False
             
             # Send via Twilio API
@@ -152,27 +195,28 @@ class MessageSender:
             auth = (twilio_account_sid, twilio_auth_token)
             data = {
                 'From': twilio_phone_number,
-                'To': lead.phone,
+                'To': phone,
                 'Body': message.content
             }
+            status_callback = getattr(settings, 'TWILIO_STATUS_CALLBACK_URL', '')
+            if status_callback:
+                data['StatusCallback'] = status_callback  # Delivery updates, see messaging/delivery.py
             
-            response = requests.post(url, auth=auth, data=data, timeout=10)
+            response = get_session('twilio').post(url, auth=auth, data=data)
             
             if response.status_code == 201:
                 message.status = 'sent'
-                message.save()
-                logger.info(f"SMS sent to {lead.phone} via Twilio")
+                message.provider_message_id = response.json().get('sid', '')
+                logger.info(f"SMS sent to {phone} via Twilio")
                 return True
             else:
                 logger.error(f"Twilio API error: {response.status_code} - {response.text}")
                 message.status = 'failed'
-                message.save()
                 return False
                 
         except Exception as e:
             logger.error(f"Error sending SMS: {str(e)}")
             message.status = 'failed'
-            message.save()
             return False
     
     def _send_whatsapp(self, message: Message):
@@ -188,21 +232,15 @@ class MessageSender:
             if not all([twilio_account_sid, twilio_auth_token]):
                 logger.warning("Twilio not configured. WhatsApp not sent.")
                 message.status = 'failed'
-                message.save()
                 return False
             
-            if not lead.phone:
+            # E.164, normalized when the lead was saved
+            phone = lead_address(lead, 'whatsapp')
+            if not phone:
                 logger.warning(f"No phone number for lead {lead.id}")
                 message.status = 'failed'
-                message.save()
                 return False
             
-            # Format phone number for WhatsApp (E.164 format)
-            phone = lead.phone
-            if not phone.startswith('+'):
-                # Assume US number if no country code
-                phone = f'+1{phone.replace("-", "").replace(" ", "").replace("(", "").replace(")", "")}'
-            
             # Send via Twilio WhatsApp API
             url = f"https://api.twilio.com/2010-04-01/Accounts/{twilio_account_sid}/Messages.json"
             auth = (twilio_account_sid, twilio_auth_token)
@@ -211,24 +249,25 @@ class MessageSender:
                 'To': f'whatsapp:{phone}',
                 'Body': message.content
             }
+            status_callback = getattr(settings, 'TWILIO_STATUS_CALLBACK_URL', '')
+            if status_callback:
+                data['StatusCallback'] = status_callback  # Delivery updates, see messaging/delivery.py
             
-            response = requests.post(url, auth=auth, data=data, timeout=10)
+            response = get_session('twilio').post(url, auth=auth, data=data)
             
             if response.status_code == 201:
                 message.status = 'sent'
-                message.save()
-                logger.info(f"WhatsApp sent to {lead.phone} via Twilio")
+                message.provider_message_id = response.json().get('sid', '')
+                logger.info(f"WhatsApp sent to {phone} via Twilio")
                 return True
             else:
                 logger.error(f"Twilio WhatsApp API error: {response.status_code} - {response.text}")
                 message.status = 'failed'
-                message.save()
                 return False
                 
         except Exception as e:
             logger.error(f"Error sending WhatsApp: {str(e)}")
             message.status = 'failed'
-            message.save()
             return False
     
     def _send_facebook(self, message: Message):
@@ -237,41 +276,30 @@ class MessageSender:
             lead = message.lead
             
             # Get Facebook settings from user settings
-            from settings.models import UserSettings
-            try:
-                user_settings = UserSettings.objects.get(user=self.user)
-            except UserSettings.DoesNotExist:
+            if not self.profile.has_settings:
                 logger.warning("User settings not found for Facebook")
                 message.status = 'failed'
-                message.save()
                 return False
             
-            # Get Facebook credentials from onboarding or settings
-            from onboarding.models import OnboardingStep
-            try:
-                onboarding = OnboardingStep.objects.get(user=self.user)
-                page_id = onboarding.facebook_page_id
-                access_token = onboarding.facebook_access_token
-            except OnboardingStep.DoesNotExist:
+            # Get Facebook credentials from onboarding
+            if not self.profile.has_onboarding:
                 logger.warning("Facebook not configured. Please complete onboarding.")
                 message.status = 'failed'
-                message.save()
                 return False
+            page_id = self.profile.facebook_page_id
+            access_token = self.profile.facebook_access_token
             
             if not page_id or not access_token:
                 logger.warning("Facebook credentials not configured")
                 message.status = 'failed'
-                message.save()
                 return False
             
-            # Get Facebook user ID from lead (would be stored in lead metadata)
-            # For now, we'll need to get it from lead's social_media_id or similar
-            facebook_user_id = getattr(lead, 'facebook_user_id', None) or lead.email  # Fallback to email
+            # Page-scoped user id, linked when the lead first messaged the page
+            facebook_user_id = lead_address(lead, 'facebook')
             
             if not facebook_user_id:
                 logger.warning(f"No Facebook user ID for lead {lead.id}")
                 message.status = 'failed'
-                message.save()
                 return False
             
             # Send via Facebook Messenger API
@@ -281,19 +309,17 @@ class MessageSender:
             
             if success:
                 message.status = 'sent'
-                message.save()
+                message.provider_message_id = message_id or ''
                 logger.info(f"Facebook Messenger sent to {lead.email}")
                 return True
             else:
                 logger.error(f"Facebook Messenger error: {error}")
                 message.status = 'failed'
-                message.save()
                 return False
                 
         except Exception as e:
             logger.error(f"Error sending Facebook Messenger: {str(e)}")
             message.status = 'failed'
-            message.save()
             return False
     
     def _send_instagram(self, message: Message):
@@ -302,30 +328,24 @@ class MessageSender:
             lead = message.lead
             
             # Get Instagram settings from onboarding
-            from onboarding.models import OnboardingStep
-            try:
-                onboarding = OnboardingStep.objects.get(user=self.user)
-                instagram_account_id = onboarding.instagram_account_id
-                access_token = onboarding.instagram_access_token
-            except OnboardingStep.DoesNotExist:
+            if not self.profile.has_onboarding:
                 logger.warning("Instagram not configured. Please complete onboarding.")
                 message.status = 'failed'
-                message.save()
                 return False
+            instagram_account_id = self.profile.instagram_account_id
+            access_token = self.profile.instagram_access_token
             
             if not instagram_account_id or not access_token:
                 logger.warning("Instagram credentials not configured")
                 message.status = 'failed'
-                message.save()
                 return False
             
-            # Get Instagram user ID from lead
-            instagram_user_id = getattr(lead, 'instagram_user_id', None) or lead.email
+            # Instagram-scoped user id, linked when the lead first messaged the account
+            instagram_user_id = lead_address(lead, 'instagram')
             
             if not instagram_user_id:
                 logger.warning(f"No Instagram user ID for lead {lead.id}")
                 message.status = 'failed'
-                message.save()
                 return False
             
             # Send via Instagram DM API
@@ -335,18 +355,16 @@ class MessageSender:
             
             if success:
                 message.status = 'sent'
-                message.save()
+                message.provider_message_id = message_id or ''
                 logger.info(f"Instagram DM sent to {lead.email}")
                 return True
             else:
                 logger.error(f"Instagram DM error: {error}")
                 message.status = 'failed'
-                message.save()
                 return False
                 
         except Exception as e:
             logger.error(f"Error sending Instagram DM: {str(e)}")
             message.status = 'failed'
-            message.save()
             return False
 
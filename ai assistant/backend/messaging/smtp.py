@@ -0,0 +1,135 @@
+"""
+Pooled SMTP Connections
+Keeps one SMTP connection open per worker thread instead of paying a TCP +
+STARTTLS + AUTH handshake for every email.
+
+The connection is recycled after EMAIL_POOL_MAX_MESSAGES messages or
+EMAIL_POOL_IDLE_TIMEOUT idle seconds, and reopened transparently if the server
+drops it mid-batch.
+"""
+
+import logging
+import smtplib
+import threading
+import time
+from django.conf import settings
+from django.core.mail.backends.smtp import EmailBackend
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class PooledEmailBackend(EmailBackend):
+    """SMTP backend that stays connected between sends and reconnects when the connection drops"""
+
+    def __init__(self, max_messages=None, idle_timeout=None, **kwargs):
+        super().__init__(**kwargs)
+        self.max_messages = max_messages or getattr(settings, 'EMAIL_POOL_MAX_MESSAGES', 100)
+        self.idle_timeout = idle_timeout or getattr(settings, 'EMAIL_POOL_IDLE_TIMEOUT', 60)
+        self.sent_on_connection = 0
+        self.last_used = None
+
+    def _ensure_open(self):
+        """Open the connection, recycling it first if it is worn out or has been idle"""
+        if self.connection is not None:
+            idle = self.last_used is not None and time.monotonic() - self.last_used > self.idle_timeout
+            if idle or self.sent_on_connection >= self.max_messages:
+                self.close()
+        if self.connection is None:
+            self.open()
+            self.sent_on_connection = 0
+
+    def close(self):
+        try:
+            super().close()
+        except smtplib.SMTPException as e:
+            logger.warning(f"Error closing SMTP connection: {str(e)}")
+        self.connection = None
+
+    def _send_one(self, email_message):
+        # A dropped connection gets one reconnect; other SMTP errors fail the message
+        for attempt in range(2):
+            try:
+                self._ensure_open()
+                sent = self._send(email_message)
+                self.sent_on_connection += 1
+                self.last_used = time.monotonic()
+                return sent
+            except (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError) as e:
+                self.close()
+                if attempt:
+                    logger.error(f"SMTP connection lost, giving up on message: {str(e)}")
+                    return False
+                logger.info(f"SMTP connection lost, reconnecting: {str(e)}")
+            except (smtplib.SMTPException, OSError) as e:
+                logger.error(f"Error sending email: {str(e)}")
+                if not isinstance(e, smtplib.SMTPRecipientsRefused):
+                    self.close()
+                return False
+
+    def send_each(self, email_messages):
+        """
+        Send EmailMessages over the pooled connection
+
+        Returns:
+            List of bools, one per message, True if it was accepted by the server
+        """
+        with self._lock:
+            return [self._send_one(email_message) for email_message in email_messages]
+
+    def send_messages(self, email_messages):
+        return sum(self.send_each(email_messages))
+
+
+def _config():
+    return (
+        getattr(settings, 'EMAIL_HOST', None),
+        getattr(settings, 'EMAIL_PORT', 587),
+        getattr(settings, 'EMAIL_HOST_USER', ''),
+        getattr(settings, 'EMAIL_HOST_PASSWORD', ''),
+        getattr(settings, 'EMAIL_USE_TLS', True),
+    )
+
+
+def is_configured():
+    """True if SMTP is configured, i.e. email goes through pooled connections"""
+    host, port, username, password, use_tls = _config()
+    return bool(host and username and password)
+
+
+def get_pooled_connection():
+    """
+    The calling thread's pooled SMTP connection
+
+    Returns:
+        PooledEmailBackend, or None if SMTP is not configured (console backend)
+    """
+    if not is_configured():
+        return None
+    config = _config()
+    host, port, username, password, use_tls = config
+
+    backend = getattr(_local, 'backend', None)
+    if backend is None or _local.config != config:
+        if backend is not None:
+            backend.close()
+        backend = PooledEmailBackend(
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            use_tls=use_tls,
+            timeout=getattr(settings, 'EMAIL_TIMEOUT', 30),
+        )
+        _local.backend = backend
+        _local.config = config
+    return backend
+
+
+def close_pooled_connection():
+    """Close the calling thread's pooled SMTP connection (e.g. when a worker thread exits)"""
+    backend = getattr(_local, 'backend', None)
+    if backend is not None:
+        backend.close()
+        _local.backend = None
@@ -0,0 +1,20 @@
+from rest_framework import serializers
+from messages.serializers import MessageSerializer
+
+
+class MessageResultSerializer(MessageSerializer):
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
+
+    class Meta(MessageSerializer.Meta):
+        fields = MessageSerializer.Meta.fields + ['rank', 'headline']
+
+
+class LeadResultSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    email = serializers.CharField()
+    phone = serializers.CharField(allow_null=True)
+    status = serializers.CharField()
+    rank = serializers.FloatField()
+    headline = serializers.CharField()
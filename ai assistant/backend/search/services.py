@@ -0,0 +1,102 @@
+"""
+Full-text Search
+Searches a user's messages and leads through the stored tsvector columns
+(Message.search_vector, Lead.search_vector) and their GIN indexes. Database
+triggers keep the columns current on every insert and update (see the
+*_search migrations), so nothing is computed at query time beyond rank and
+headlines for the returned page.
+
+Queries use websearch syntax: words, "quoted phrases", OR, -excluded.
+Off PostgreSQL (the columns are not maintained there) search falls back to
+case-insensitive substring matching, without ranking.
+"""
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Concat, Left
+from leads.models import Lead
+from messages.models import Message
+
+# Text search configuration; must match the one used by the search triggers
+SEARCH_CONFIG = 'english'
+
+HEADLINE_OPTIONS = {
+    'config': SEARCH_CONFIG,
+    'start_sel': '<mark>',
+    'stop_sel': '</mark>',
+    'max_fragments': 2,
+    'max_words': 20,
+    'min_words': 8,
+}
+
+
+def full_text_enabled():
+    return connection.vendor == 'postgresql'
+
+
+def search_messages(user, text, limit=20, channel=None):
+    """
+    Best matching messages of a user
+
+    Args:
+        user: Owner of the messages
+        text: Search terms (websearch syntax)
+        limit: Maximum number of results
+        channel: Only messages on this channel
+
+    Returns:
+        List of Messages (lead loaded) annotated with `rank` and `headline`
+    """
+    queryset = Message.objects.filter(user=user).select_related('lead').defer('search_vector', 'lead__search_vector')
+    if channel:
+        queryset = queryset.filter(channel=channel)
+
+    if not full_text_enabled():
+        return list(
+            queryset.filter(content__icontains=text)
+            .annotate(rank=Value(0.0, output_field=FloatField()), headline=Left('content', 200))
+            .order_by('-timestamp')[:limit]
+        )
+
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    return list(
+        queryset.filter(search_vector=query)
+        .annotate(
+            rank=SearchRank(F('search_vector'), query),
+            headline=SearchHeadline('content', query, **HEADLINE_OPTIONS),
+        )
+        .order_by('-rank', '-timestamp')[:limit]
+    )
+
+
+def search_leads(user, text, limit=20):
+    """
+    Best matching leads of a user (name and email weigh most, then enquiry, then notes)
+
+    Returns:
+        List of Leads annotated with `rank` and `headline`
+    """
+    queryset = Lead.objects.filter(user=user).defer('search_vector')
+    document = Concat('description_of_enquiry', Value(' '), 'notes')
+
+    if not full_text_enabled():
+        matches = (
+            Q(name__icontains=text) | Q(email__icontains=text)
+            | Q(notes__icontains=text) | Q(description_of_enquiry__icontains=text)
+        )
+        return list(
+            queryset.filter(matches)
+            .annotate(rank=Value(0.0, output_field=FloatField()), headline=Left(document, 200))
+            .order_by('-updated_at')[:limit]
+        )
+
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    return list(
+        queryset.filter(search_vector=query)
+        .annotate(
+            rank=SearchRank(F('search_vector'), query),
+            headline=SearchHeadline(document, query, **HEADLINE_OPTIONS),
+        )
+        .order_by('-rank', '-updated_at')[:limit]
+    )
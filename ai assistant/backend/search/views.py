@@ -0,0 +1,41 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .serializers import LeadResultSerializer, MessageResultSerializer
+from .services import search_leads, search_messages
+
+MAX_LIMIT = 50
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search(request):
+    """
+    Search the user's messages and leads
+
+    Query params:
+        q: Search terms (words, "phrases", OR, -word)
+        type: 'messages', 'leads' or 'all' (default)
+        channel: Only messages on this channel
+        limit: Results per type (default 20, max 50)
+    """
+    text = request.query_params.get('q', '').strip()
+    if not text:
+        return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    kind = request.query_params.get('type', 'all')
+    if kind not in ('messages', 'leads', 'all'):
+        return Response({'error': "type must be 'messages', 'leads' or 'all'"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), MAX_LIMIT)
+    except ValueError:
+        return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+    results = {'query': text}
+    if kind in ('messages', 'all'):
+        messages = search_messages(request.user, text, limit=limit, channel=request.query_params.get('channel'))
+        results['messages'] = MessageResultSerializer(messages, many=True).data
+    if kind in ('leads', 'all'):
+        results['leads'] = LeadResultSerializer(search_leads(request.user, text, limit=limit), many=True).data
+    return Response(results)
@@ -8,6 +8,8 @@ import requests
 import logging
 from django.utils import timezone
 from datetime import datetime, timedelta
+from automations.ingest import bulk_ingest
+from core.http import get_session
 
 logger = logging.getLogger(__name__)
 
@@ -95,11 +97,10 @@ class SimplyBookService:
             last_error = None
             for url in endpoints:
                 try:
-                    response = requests.get(
+                    response = get_session('simplybook').get(
                         url,
                         headers=self._get_headers(),
-                        params=params,
-                        timeout=30
+                        params=params
                     )
                     
                     if response.status_code == 200:
@@ -169,11 +170,10 @@ class SimplyBookService:
             if end_date:
                 params['end_date'] = end_date.isoformat()
             
-            response = requests.get(
+            response = get_session('simplybook').get(
                 url,
                 headers=self._get_headers(),
-                params=params,
-                timeout=30
+                params=params
             )
             
             if response.status_code == 200:
@@ -218,11 +218,10 @@ class SimplyBookService:
             if end_date:
                 params['end_date'] = end_date.isoformat()
             
-            response = requests.get(
+            response = get_session('simplybook').get(
                 url,
                 headers=self._get_headers(),
-                params=params,
-                timeout=30
+                params=params
             )
             
             if response.status_code == 200:
@@ -262,11 +261,10 @@ class SimplyBookService:
             
             url = f"{self.BASE_URL}/admin/bookings"
             
-            response = requests.post(
+            response = get_session('simplybook').post(
                 url,
                 headers=self._get_headers(),
-                json=booking_data,
-                timeout=30
+                json=booking_data
             )
             
             if response.status_code == 200 or response.status_code == 201:
@@ -302,11 +300,10 @@ class SimplyBookService:
             
             url = f"{self.BASE_URL}/admin/bookings/{booking_id}"
             
-            response = requests.put(
+            response = get_session('simplybook').put(
                 url,
                 headers=self._get_headers(),
-                json=booking_data,
-                timeout=30
+                json=booking_data
             )
             
             if response.status_code == 200:
@@ -346,11 +343,10 @@ class SimplyBookService:
             if reason:
                 data['reason'] = reason
             
-            response = requests.post(
+            response = get_session('simplybook').post(
                 url,
                 headers=self._get_headers(),
-                json=data,
-                timeout=30
+                json=data
             )
             
             if response.status_code == 200:
@@ -384,11 +380,10 @@ class SimplyBookService:
             
             url = f"{self.BASE_URL}/admin/clients/{client_id}"
             
-            response = requests.put(
+            response = get_session('simplybook').put(
                 url,
                 headers=self._get_headers(),
-                json=client_data,
-                timeout=30
+                json=client_data
             )
             
             if response.status_code == 200:
@@ -447,11 +442,10 @@ class SimplyBookService:
             else:
                 # Create new client
                 url = f"{self.BASE_URL}/admin/clients"
-                response = requests.post(
+                response = get_session('simplybook').post(
                     url,
                     headers=self._get_headers(),
-                    json=client_data,
-                    timeout=30
+                    json=client_data
                 )
                 
                 if response.status_code == 200 or response.status_code == 201:
@@ -554,101 +548,103 @@ class SimplyBookService:
         if not bookings_data:
             return (0, 0, ['No bookings data provided'])
         
-        for booking_data in bookings_data:
-            try:
-                # Extract booking information
-                external_id = booking_data.get('id') or booking_data.get('booking_id') or booking_data.get('external_id')
-                client_email = booking_data.get('client_email') or booking_data.get('email') or booking_data.get('client', {}).get('email')
-                
-                if not client_email:
-                    errors.append(f"Booking missing client email: {booking_data}")
-                    continue
-                
-                if not external_id:
-                    errors.append(f"Booking missing external ID: {booking_data}")
-                    continue
-                
-                # Find or create lead
+        # Lead/Booking signals are deferred; automations and calendar pushes run as one batch job
+        with bulk_ingest():
+            for booking_data in bookings_data:
                 try:
-                    lead = Lead.objects.get(user=user, email=client_email)
-                except Lead.DoesNotExist:
-                    # Create lead if doesn't exist
-                    client_name = booking_data.get('client_name') or booking_data.get('name') or 'Unknown'
-                    lead = Lead.objects.create(
+                    # Extract booking information
+                    external_id = booking_data.get('id') or booking_data.get('booking_id') or booking_data.get('external_id')
+                    client_email = booking_data.get('client_email') or booking_data.get('email') or booking_data.get('client', {}).get('email')
+                    
+                    if not client_email:
+                        errors.append(f"Booking missing client email: {booking_data}")
+                        continue
+                    
+                    if not external_id:
+                        errors.append(f"Booking missing external ID: {booking_data}")
+                        continue
+                    
+                    # Find or create lead
+                    try:
+                        lead = Lead.objects.get(user=user, email=client_email)
+                    except Lead.DoesNotExist:
+                        # Create lead if doesn't exist
+                        client_name = booking_data.get('client_name') or booking_data.get('name') or 'Unknown'
+                        lead = Lead.objects.create(
+                            user=user,
+                            email=client_email,
+                            name=client_name,
+                            source='SimplyBook.me'
+                        )
+                    
+                    # Parse dates
+                    start_time_str = booking_data.get('start_time') or booking_data.get('start') or booking_data.get('date')
+                    end_time_str = booking_data.get('end_time') or booking_data.get('end')
+                    
+                    if not start_time_str:
+                        errors.append(f"Booking missing start time: {external_id}")
+                        continue
+                    
+                    try:
+                        from datetime import datetime
+                        if isinstance(start_time_str, str):
+                            start_time = datetime.fromisoformat(start_time_str.replace('Z', '+00:00'))
+                        else:
+                            start_time = start_time_str
+                        
+                        if end_time_str:
+                            if isinstance(end_time_str, str):
+                                end_time = datetime.fromisoformat(end_time_str.replace('Z', '+00:00'))
+                            else:
+                                end_time = end_time_str
+                        else:
+                            # Default to 1 hour duration
+                            from datetime import timedelta
+                            end_time = start_time + timedelta(hours=1)
+                    except Exception as e:
+                        errors.append(f"Error parsing booking dates: {str(e)}")
+                        continue
+                    
+                    # Create or update booking
+                    booking, created = Booking.objects.get_or_create(
                         user=user,
-                        email=client_email,
-                        name=client_name,
-                        source='SimplyBook.me'
+                        external_id=str(external_id),
+                        external_source='SimplyBook.me',
+                        defaults={
+                            'lead': lead,
+                            'title': booking_data.get('title') or booking_data.get('service_name') or 'Booking',
+                            'description': booking_data.get('description') or booking_data.get('notes') or '',
+                            'start_time': start_time,
+                            'end_time': end_time,
+                            'duration_minutes': booking_data.get('duration') or 60,
+                            'status': booking_data.get('status') or 'scheduled',
+                            'location': booking_data.get('location') or '',
+                            'booking_type': booking_data.get('service_name') or booking_data.get('type') or '',
+                        }
                     )
-                
-                # Parse dates
-                start_time_str = booking_data.get('start_time') or booking_data.get('start') or booking_data.get('date')
-                end_time_str = booking_data.get('end_time') or booking_data.get('end')
-                
-                if not start_time_str:
-                    errors.append(f"Booking missing start time: {external_id}")
-                    continue
-                
-                try:
-                    from datetime import datetime
-                    if isinstance(start_time_str, str):
-                        start_time = datetime.fromisoformat(start_time_str.replace('Z', '+00:00'))
-                    else:
-                        start_time = start_time_str
                     
-                    if end_time_str:
-                        if isinstance(end_time_str, str):
-                            end_time = datetime.fromisoformat(end_time_str.replace('Z', '+00:00'))
-                        else:
-                            end_time = end_time_str
+                    if created:
+                        created_count += 1
+                        logger.info(f"Created booking from SimplyBook.me: {booking.id}")
                     else:
-                        # Default to 1 hour duration
-                        from datetime import timedelta
-                        end_time = start_time + timedelta(hours=1)
-                except Exception as e:
-                    errors.append(f"Error parsing booking dates: {str(e)}")
-                    continue
-                
-                # Create or update booking
-                booking, created = Booking.objects.get_or_create(
-                    user=user,
-                    external_id=str(external_id),
-                    external_source='SimplyBook.me',
-                    defaults={
-                        'lead': lead,
-                        'title': booking_data.get('title') or booking_data.get('service_name') or 'Booking',
-                        'description': booking_data.get('description') or booking_data.get('notes') or '',
-                        'start_time': start_time,
-                        'end_time': end_time,
-                        'duration_minutes': booking_data.get('duration') or 60,
-                        'status': booking_data.get('status') or 'scheduled',
-                        'location': booking_data.get('location') or '',
-                        'booking_type': booking_data.get('service_name') or booking_data.get('type') or '',
-                    }
-                )
-                
-                if created:
-                    created_count += 1
-                    logger.info(f"Created booking from SimplyBook.me: {booking.id}")
-                else:
-                    # Update existing booking
-                    updated = False
-                    if booking.start_time != start_time:
-                        booking.start_time = start_time
-                        updated = True
-                    if booking.end_time != end_time:
-                        booking.end_time = end_time
-                        updated = True
-                    
-                    if updated:
-                        booking.save()
-                        updated_count += 1
-                        logger.info(f"Updated booking from SimplyBook.me: {booking.id}")
+                        # Update existing booking
+                        updated = False
+                        if booking.start_time != start_time:
+                            booking.start_time = start_time
+                            updated = True
+                        if booking.end_time != end_time:
+                            booking.end_time = end_time
+                            updated = True
                         
-            except Exception as e:
-                error_msg = f"Error syncing booking {booking_data.get('id', 'unknown')}: {str(e)}"
-                errors.append(error_msg)
-                logger.error(error_msg)
+                        if updated:
+                            booking.save()
+                            updated_count += 1
+                            logger.info(f"Updated booking from SimplyBook.me: {booking.id}")
+                            
+                except Exception as e:
+                    error_msg = f"Error syncing booking {booking_data.get('id', 'unknown')}: {str(e)}"
+                    errors.append(error_msg)
+                    logger.error(error_msg)
         
         return (created_count, updated_count, errors)
     
@@ -672,46 +668,48 @@ class SimplyBookService:
         if not clients_data:
             return (0, 0, ['No clients data provided'])
         
-        for client_data in clients_data:
-            try:
-                # Extract client information
-                # SimplyBook.me client structure may vary
-                email = client_data.get('email') or client_data.get('client_email') or client_data.get('email_address')
-                name = client_data.get('name') or client_data.get('client_name') or client_data.get('full_name') or 'Unknown'
-                phone = client_data.get('phone') or client_data.get('phone_number') or client_data.get('mobile')
-                
-                if not email:
-                    errors.append(f"Client missing email: {client_data}")
-                    continue
-                
-                lead, created = Lead.objects.get_or_create(
-                    user=user,
-                    email=email,
-                    defaults={
-                        'name': name,
-                        'phone': phone or '',
-                        'source': 'SimplyBook.me',
-                        'notes': f"Synced from SimplyBook.me on {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}",
-                    }
-                )
-                
-                if created:
-                    created_count += 1
-                    logger.info(f"Created lead from SimplyBook.me: {lead.email}")
-                else:
-                    updated = False
-                    if lead.name != name: lead.name = name; updated = True
-                    if phone and lead.phone != phone: lead.phone = phone; updated = True
-                    if lead.source != 'SimplyBook.me': lead.source = 'SimplyBook.me'; updated = True
+        # Lead signals are deferred; automations run as one batch job afterwards
+        with bulk_ingest():
+            for client_data in clients_data:
+                try:
+                    # Extract client information
+                    # SimplyBook.me client structure may vary
+                    email = client_data.get('email') or client_data.get('client_email') or client_data.get('email_address')
+                    name = client_data.get('name') or client_data.get('client_name') or client_data.get('full_name') or 'Unknown'
+                    phone = client_data.get('phone') or client_data.get('phone_number') or client_data.get('mobile')
                     
-                    if updated:
-                        lead.save()
-                        updated_count += 1
-                        logger.info(f"Updated lead from SimplyBook.me: {lead.email}")
+                    if not email:
+                        errors.append(f"Client missing email: {client_data}")
+                        continue
+                    
+                    lead, created = Lead.objects.get_or_create(
+                        user=user,
+                        email=email,
+                        defaults={
+                            'name': name,
+                            'phone': phone or '',
+                            'source': 'SimplyBook.me',
+                            'notes': f"Synced from SimplyBook.me on {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}",
+                        }
+                    )
+                    
+                    if created:
+                        created_count += 1
+                        logger.info(f"Created lead from SimplyBook.me: {lead.email}")
+                    else:
+                        updated = False
+                        if lead.name != name: lead.name = name; updated = True
+                        if phone and lead.phone != phone: lead.phone = phone; updated = True
+                        if lead.source != 'SimplyBook.me': lead.source = 'SimplyBook.me'; updated = True
                         
-            except Exception as e:
-                error_msg = f"Error syncing client {client_data.get('email', 'unknown')}: {str(e)}"
-                errors.append(error_msg)
-                logger.error(error_msg)
+                        if updated:
+                            lead.save()
+                            updated_count += 1
+                            logger.info(f"Updated lead from SimplyBook.me: {lead.email}")
+                            
+                except Exception as e:
+                    error_msg = f"Error syncing client {client_data.get('email', 'unknown')}: {str(e)}"
+                    errors.append(error_msg)
+                    logger.error(error_msg)
         
         return (created_count, updated_count, errors)
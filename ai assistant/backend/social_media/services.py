@@ -4,8 +4,8 @@ Handles Facebook Messenger and Instagram DM
 """
 
 import logging
-import requests
 from django.conf import settings
+from core.http import get_session
 
 logger = logging.getLogger(__name__)
 
@@ -50,7 +50,7 @@ class FacebookMessengerService:
                 'access_token': self.access_token
             }
             
-            response = requests.post(url, json=data, params=params, timeout=10)
+            response = get_session('meta').post(url, json=data, params=params)
             
             if response.status_code == 200:
                 result = response.json()
@@ -84,7 +84,7 @@ class FacebookMessengerService:
                 'fields': 'messages{message,from,created_time},participants'
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = get_session('meta').get(url, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -169,7 +169,7 @@ class InstagramDMService:
                 'access_token': self.access_token
             }
             
-            response = requests.post(url, json=data, params=params, timeout=10)
+            response = get_session('meta').post(url, json=data, params=params)
             
             if response.status_code == 200:
                 result = response.json()
@@ -203,7 +203,7 @@ class InstagramDMService:
                 'fields': 'messages{text,from,created_time},participants'
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = get_session('meta').get(url, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import InboundEvent
+
+
+@admin.register(InboundEvent)
+class InboundEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'provider', 'channel', 'account_id', 'event_id', 'received_at', 'failed_at']
+    list_filter = ['provider', 'channel', ('failed_at', admin.EmptyFieldListFilter)]
+    readonly_fields = ['received_at', 'last_error']
@@ -0,0 +1,75 @@
+"""
+Management command to run the inbound consumer
+Turns staged webhook events into inbound messages in batches and queues their
+auto-replies and automations. Several consumers can run side by side (SKIP LOCKED).
+
+Usage:
+    python manage.py run_inbound_consumer
+    python manage.py run_inbound_consumer --batch-size 1000 --poll-interval 0.2
+    python manage.py run_inbound_consumer --once
+"""
+
+import logging
+import signal
+import threading
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from webhooks.services import consume_inbound_events
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Consume staged inbound webhook events'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'INBOUND_CONSUMER_BATCH_SIZE', 500),
+            help='Number of events to consume at a time (default: 500)'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=getattr(settings, 'INBOUND_CONSUMER_POLL_INTERVAL', 0.5),
+            help='Seconds to sleep when no events are waiting (default: 0.5)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Consume a single batch and exit'
+        )
+
+    def handle(self, *args, **options):
+        stopping = threading.Event()
+        consumed = 0
+
+        def request_stop(signum, frame):
+            self.stdout.write('Stop requested, finishing current batch...')
+            stopping.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        self.stdout.write(f"Inbound consumer started (batch size {options['batch_size']})")
+        try:
+            while not stopping.is_set():
+                close_old_connections()
+                try:
+                    count = consume_inbound_events(batch_size=options['batch_size'])
+                except Exception as e:
+                    # e.g. the database is unreachable; keep polling rather than exit
+                    logger.error(f"Inbound consumer batch failed: {str(e)}")
+                    count = 0
+                consumed += count
+
+                if options['once']:
+                    break
+                if not count:
+                    stopping.wait(options['poll_interval'])
+        finally:
+            connection.close()
+
+        self.stdout.write(self.style.SUCCESS(f'Inbound consumer stopped after {consumed} events'))
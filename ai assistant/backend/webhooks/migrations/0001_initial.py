@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InboundEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(choices=[('twilio', 'Twilio'), ('meta', 'Meta')], max_length=20)),
+                ('channel', models.CharField(choices=[('email', 'Email'), ('sms', 'SMS'), ('whatsapp', 'WhatsApp'), ('facebook', 'Facebook'), ('instagram', 'Instagram')], max_length=20)),
+                ('account_id', models.CharField(blank=True, help_text='Receiving number, page or Instagram account', max_length=255)),
+                ('event_id', models.CharField(blank=True, help_text='Provider message id; redelivered events are dropped', max_length=255)),
+                ('payload', models.JSONField(default=dict, help_text='Event as received')),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='inboundevent',
+            constraint=models.UniqueConstraint(condition=models.Q(('event_id', ''), _negated=True), fields=('provider', 'event_id'), name='unique_inbound_event'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webhooks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inboundevent',
+            name='failed_at',
+            field=models.DateTimeField(blank=True, help_text='Set when consuming the event raised; failed events are not claimed again until cleared', null=True),
+        ),
+        migrations.AddField(
+            model_name='inboundevent',
+            name='last_error',
+            field=models.TextField(blank=True),
+        ),
+    ]
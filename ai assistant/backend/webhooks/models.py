@@ -0,0 +1,34 @@
+from django.db import models
+from django.db.models import Q
+from messages.models import Message
+
+
+class InboundEvent(models.Model):
+    """
+    Raw inbound message event from a provider, waiting to be consumed.
+    Webhook endpoints only verify and insert these rows; the inbound consumer
+    turns them into Messages in batches (see webhooks/services.py).
+    """
+    PROVIDER_CHOICES = [
+        ('twilio', 'Twilio'),  # SMS and WhatsApp
+        ('meta', 'Meta'),  # Messenger and Instagram
+    ]
+
+    provider = models.CharField(max_length=20, choices=PROVIDER_CHOICES)
+    channel = models.CharField(max_length=20, choices=Message.CHANNEL_CHOICES)
+    account_id = models.CharField(max_length=255, blank=True, help_text='Receiving number, page or Instagram account')
+    event_id = models.CharField(max_length=255, blank=True, help_text='Provider message id; redelivered events are dropped')
+    payload = models.JSONField(default=dict, help_text='Event as received')
+    received_at = models.DateTimeField(auto_now_add=True)
+    failed_at = models.DateTimeField(null=True, blank=True, help_text='Set when consuming the event raised; failed events are not claimed again until cleared')
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'event_id'], condition=~Q(event_id=''),
+                                    name='unique_inbound_event'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} {self.channel} event {self.event_id or self.id}"
@@ -0,0 +1,335 @@
+"""
+Inbound Webhook Gateway
+Turns provider webhooks (Twilio SMS/WhatsApp, Meta Messenger/Instagram) into
+inbound Messages without doing any work inside the webhook request.
+
+    webhook   -> signature checked, events inserted into InboundEvent with one
+                 bulk insert, 200 returned (redelivered events are ignored)
+    consumer  -> (`manage.py run_inbound_consumer`) claims a batch of events,
+                 resolves owners and leads with a few set-based queries,
+                 bulk-creates the Messages and hands them to the automation
+                 queue: one debounced auto-reply per lead and channel, plus the
+                 message_received trigger jobs
+
+Owners are found by the receiving account (the page, Instagram account or
+user's own Twilio number). Messages to the shared Twilio number go to the user
+whose lead has that phone, the most recently contacted one if several do.
+Senders without a lead get one, created with their address linked as a channel
+identity so replies can reach them.
+"""
+
+import logging
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from accounts.models import User
+from leads.identities import CHANNEL_IDENTITIES, link_identity, normalize, normalize_phone
+from leads.models import ChannelIdentity, Lead
+from messages.conversations import record_messages
+from messages.models import Message
+from .models import InboundEvent
+
+logger = logging.getLogger(__name__)
+
+# Meta webhook `object` values and the channel they carry
+META_OBJECTS = {
+    'page': 'facebook',
+    'instagram': 'instagram',
+}
+
+
+def twilio_events(params):
+    """
+    Staging rows for a Twilio inbound message webhook
+
+    Args:
+        params: Webhook form parameters (MessageSid, From, To, Body, ...)
+    """
+    sender = params.get('From', '')
+    return [InboundEvent(
+        provider='twilio',
+        channel='whatsapp' if sender.startswith('whatsapp:') else 'sms',
+        account_id=params.get('To', ''),
+        event_id=params.get('MessageSid', ''),
+        payload=dict(params.items()),
+    )]
+
+
+def meta_events(data):
+    """
+    Staging rows for a Meta webhook delivery (one per received message)
+
+    Echoes of the page's own messages and non-message events (reads, deliveries)
+    are left out.
+    """
+    channel = META_OBJECTS.get(data.get('object'))
+    if channel is None:
+        return []
+
+    events = []
+    for entry in data.get('entry', []):
+        for event in entry.get('messaging', []):
+            message = event.get('message')
+            if not message or message.get('is_echo'):
+                continue
+            events.append(InboundEvent(
+                provider='meta',
+                channel=channel,
+                account_id=str(entry.get('id', '')),
+                event_id=message.get('mid', ''),
+                payload=event,
+            ))
+    return events
+
+
+def stage_events(events):
+    """Insert staged events with one statement; already staged ones are skipped"""
+    InboundEvent.objects.bulk_create(events, ignore_conflicts=True)
+    return len(events)
+
+
+def read_event(event):
+    """
+    Sender and text of a staged event
+
+    Returns:
+        Dict, or None if the event carries no text
+    """
+    payload = event.payload
+    if event.provider == 'twilio':
+        sender, text = payload.get('From', ''), payload.get('Body', '')
+    else:
+        sender = str(payload.get('sender', {}).get('id', ''))
+        text = payload.get('message', {}).get('text', '')
+
+    identity_channel = CHANNEL_IDENTITIES[event.channel]
+    sender = normalize(identity_channel, sender)
+    if not sender or not text:
+        return None
+    return {
+        'event': event,
+        'channel': event.channel,
+        'identity_channel': identity_channel,
+        'sender': sender,
+        'text': text,
+    }
+
+
+def resolve_owners(items):
+    """
+    Set item['user_id'] from the receiving account, one query per channel kind
+
+    Items sent to a number no user owns (the shared Twilio number) keep None.
+    """
+    from onboarding.models import OnboardingStep
+
+    accounts = {}
+    for item in items:
+        accounts.setdefault(item['channel'], set()).add(item['event'].account_id)
+
+    owners = {}
+    for channel, field in (('facebook', 'facebook_page_id'), ('instagram', 'instagram_account_id')):
+        if accounts.get(channel):
+            rows = OnboardingStep.objects.filter(**{f'{field}__in': accounts[channel]}).values_list(field, 'user_id')
+            owners.update({(channel, account): user_id for account, user_id in rows})
+
+    if accounts.get('sms') or accounts.get('whatsapp'):
+        numbers = {}
+        for phone, user_id in OnboardingStep.objects.exclude(sms_twilio_phone='').values_list('sms_twilio_phone', 'user_id'):
+            numbers[normalize_phone(phone)] = user_id
+        for channel in ('sms', 'whatsapp'):
+            for account in accounts.get(channel, ()):
+                owners[(channel, account)] = numbers.get(normalize_phone(account))
+
+    for item in items:
+        item['user_id'] = owners.get((item['channel'], item['event'].account_id))
+
+
+def resolve_leads(items):
+    """
+    Set item['lead_id'] (and the owner, where unknown) from channel identities
+
+    One query per identity channel. Senders without a lead are left with None.
+    """
+    senders = {}
+    for item in items:
+        senders.setdefault(item['identity_channel'], set()).add(item['sender'])
+
+    known = {}
+    for channel, external_ids in senders.items():
+        rows = (
+            ChannelIdentity.objects.filter(channel=channel, external_id__in=external_ids)
+            .values_list('user_id', 'external_id', 'lead_id', 'lead__last_contacted')
+        )
+        for user_id, external_id, lead_id, last_contacted in rows:
+            known.setdefault((channel, external_id), []).append((user_id, lead_id, last_contacted))
+
+    for item in items:
+        candidates = known.get((item['identity_channel'], item['sender']), [])
+        if item['user_id'] is not None:
+            candidates = [candidate for candidate in candidates if candidate[0] == item['user_id']]
+        if not candidates:
+            item['lead_id'] = None
+            continue
+        # Shared number: the lead most recently contacted
+        user_id, lead_id, _ = max(candidates, key=lambda candidate: candidate[2] or datetime.min.replace(tzinfo=dt_timezone.utc))
+        item['user_id'] = user_id
+        item['lead_id'] = lead_id
+
+
+def create_leads(items):
+    """Create a lead for each new sender of a known owner, with the sender's address linked"""
+    created = {}
+    for item in items:
+        if item['lead_id'] is not None or item['user_id'] is None:
+            continue
+        key = (item['user_id'], item['identity_channel'], item['sender'])
+        lead = created.get(key)
+        if lead is None:
+            is_phone = item['identity_channel'] == 'phone'
+            lead = Lead.objects.create(
+                user_id=item['user_id'],
+                name=item['sender'] if is_phone else f"{item['channel'].title()} contact",
+                email='',
+                phone=item['sender'] if is_phone else None,
+                source=item['channel'],
+            )
+            if not is_phone:
+                link_identity(lead, item['identity_channel'], item['sender'])
+            created[key] = lead
+            logger.info(f"Created lead {lead.id} for new {item['channel']} sender")
+        item['lead_id'] = lead.id
+
+
+def hand_off(messages):
+    """
+    Queue the automation work for new inbound messages
+
+    Bulk-created messages don't fire post_save, so this does what the inbound
+    message signal does (automations/signals.py), in bulk: one debounced
+    auto-reply per lead and channel and one message_received trigger job per message.
+    """
+    from automations.jobs import enqueue_jobs
+    from messages.services import queue_auto_reply
+
+    users = User.objects.in_bulk({message.user_id for message in messages})
+    leads = Lead.objects.in_bulk({message.lead_id for message in messages})
+    latest = {}
+    for message in messages:
+        message.user = users[message.user_id]
+        message.lead = leads[message.lead_id]
+        latest[(message.lead_id, message.channel)] = message
+
+    for message in latest.values():
+        queue_auto_reply(message)
+    enqueue_jobs('message_received', [
+        {'user': message.user, 'lead': message.lead, 'message': message}
+        for message in messages
+    ])
+
+
+def claim_events(batch_size):
+    """Lock up to `batch_size` staged events, skipping failed ones and those other consumers hold"""
+    return list(
+        InboundEvent.objects.select_for_update(skip_locked=True)
+        .filter(failed_at__isnull=True)
+        .order_by('id')[:batch_size]
+    )
+
+
+def consume_events(events):
+    """
+    Turn claimed events into inbound Messages, queue their follow-up work and delete the events
+
+    Returns:
+        Number of messages created
+    """
+    items = [item for item in map(read_event, events) if item is not None]
+    if items:
+        resolve_owners(items)
+        resolve_leads(items)
+        create_leads(items)
+
+    # Provider redeliveries of messages consumed earlier
+    event_ids = {item['event'].event_id for item in items if item['event'].event_id}
+    seen = set(
+        Message.objects.filter(provider_message_id__in=event_ids, direction='inbound')
+        .values_list('provider_message_id', flat=True)
+    )
+    messages = []
+    for item in items:
+        event = item['event']
+        if item['lead_id'] is None:
+            logger.warning(f"No owner for inbound {event.channel} message to {event.account_id}, dropping event {event.id}")
+            continue
+        if event.event_id and event.event_id in seen:
+            continue
+        seen.add(event.event_id)
+        messages.append(Message(
+            user_id=item['user_id'],
+            lead_id=item['lead_id'],
+            channel=item['channel'],
+            direction='inbound',
+            content=item['text'],
+            provider_message_id=event.event_id,
+        ))
+    Message.objects.bulk_create(messages)
+    if messages:
+        record_messages(messages)
+        hand_off(messages)
+
+    InboundEvent.objects.filter(id__in=[event.id for event in events]).delete()
+    return len(messages)
+
+
+def consume_inbound_events(batch_size=None):
+    """
+    Turn one batch of staged events into inbound Messages
+
+    Events are claimed with SKIP LOCKED, so several consumers can run side by
+    side. Messages, follow-up jobs and the removal of the events commit together.
+    If the batch raises, it is consumed again one event at a time, each in its
+    own savepoint; an event that still raises is marked failed (`failed_at`) and
+    left for an operator instead of blocking the queue.
+
+    Returns:
+        Number of events consumed or marked failed
+    """
+    batch_size = batch_size or getattr(settings, 'INBOUND_CONSUMER_BATCH_SIZE', 500)
+
+    try:
+        with transaction.atomic():
+            events = claim_events(batch_size)
+            if not events:
+                return 0
+            created = consume_events(events)
+    except Exception as e:
+        logger.error(f"Inbound batch failed, consuming its events one at a time: {str(e)}")
+        return consume_inbound_events_singly(batch_size)
+
+    logger.info(f"Consumed {len(events)} inbound events, {created} messages created")
+    return len(events)
+
+
+def consume_inbound_events_singly(batch_size):
+    """
+    Consume a batch of events one at a time, marking the ones that raise as failed
+
+    Returns:
+        Number of events consumed or marked failed
+    """
+    created = failed = 0
+    with transaction.atomic():
+        events = claim_events(batch_size)
+        for event in events:
+            try:
+                with transaction.atomic():
+                    created += consume_events([event])
+            except Exception as e:
+                logger.error(f"Inbound event {event.id} failed, setting it aside: {str(e)}")
+                InboundEvent.objects.filter(id=event.id).update(failed_at=timezone.now(), last_error=str(e)[:2000])
+                failed += 1
+
+    logger.info(f"Consumed {len(events)} inbound events one at a time, {created} messages created, {failed} failed")
+    return len(events)
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('webhooks/twilio/inbound', views.twilio_inbound, name='twilio-inbound-webhook'),
+    path('webhooks/meta', views.meta_webhook, name='meta-webhook'),
+]
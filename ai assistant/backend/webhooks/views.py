@@ -0,0 +1,78 @@
+"""
+Inbound webhook endpoints
+Each endpoint verifies the provider signature, stages the events and
+acknowledges right away; the inbound consumer does the rest (see services.py).
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from twilio.request_validator import RequestValidator
+from .services import meta_events, stage_events, twilio_events
+
+logger = logging.getLogger(__name__)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def twilio_inbound(request):
+    """
+    Twilio incoming message webhook (SMS and WhatsApp numbers)
+
+    Answers with empty TwiML; the reply, if any, is sent later through the outbox.
+    """
+    auth_token = getattr(settings, 'TWILIO_AUTH_TOKEN', '')
+    if not auth_token:
+        return Response(status=status.HTTP_403_FORBIDDEN)
+
+    # Behind a proxy the public URL differs from the one Django sees; Twilio signs the public one
+    url = getattr(settings, 'TWILIO_INBOUND_WEBHOOK_URL', '') or request.build_absolute_uri()
+    signature = request.META.get('HTTP_X_TWILIO_SIGNATURE', '')
+    if not RequestValidator(auth_token).validate(url, request.POST, signature):
+        logger.warning("Rejected Twilio inbound webhook with an invalid signature")
+        return Response(status=status.HTTP_403_FORBIDDEN)
+
+    stage_events(twilio_events(request.POST))
+    return HttpResponse('<Response></Response>', content_type='text/xml')
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([AllowAny])
+def meta_webhook(request):
+    """
+    Meta webhook for Messenger (page) and Instagram messaging events
+
+    GET answers the subscription handshake; POST is checked against the
+    X-Hub-Signature-256 HMAC of the raw body.
+    """
+    if request.method == 'GET':
+        verify_token = getattr(settings, 'META_WEBHOOK_VERIFY_TOKEN', '')
+        if (verify_token and request.GET.get('hub.mode') == 'subscribe'
+                and hmac.compare_digest(request.GET.get('hub.verify_token', ''), verify_token)):
+            return HttpResponse(request.GET.get('hub.challenge', ''), content_type='text/plain')
+        return Response(status=status.HTTP_403_FORBIDDEN)
+
+    app_secret = getattr(settings, 'META_APP_SECRET', '')
+    if not app_secret:
+        return Response(status=status.HTTP_403_FORBIDDEN)
+
+    body = request.body
+    expected = 'sha256=' + hmac.new(app_secret.encode(), body, hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(request.META.get('HTTP_X_HUB_SIGNATURE_256', ''), expected):
+        logger.warning("Rejected Meta webhook with an invalid signature")
+        return Response(status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return Response(status=status.HTTP_400_BAD_REQUEST)
+
+    stage_events(meta_events(data))
+    return HttpResponse('EVENT_RECEIVED', content_type='text/plain')